@@ -0,0 +1,409 @@
+#  coding: utf-8
+#  Trub's Variants -- benchmark suite
+#     Times the whole RandEnt pipeline against synthetic game data, so no 7D2D install is needed.
+################################################################################
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Dict, List
+
+import randomizer
+
+# noinspection PyUnusedName
+__author__ = "trub64"
+
+logger = logging.getLogger(__name__)
+
+################################################################################
+# Begin Globals
+################################################################################
+
+# entity classes, entity groups, deepest extends chain below the templates
+SIZES = {
+    'vanilla': (120, 60, 3),
+    'medium': (1000, 300, 4),
+    'overhaul': (10000, 2000, 6),
+}
+
+# -z/-e/-f variant counts; the first is the default
+COUNTS = {
+    'small': (10, 30, 10),
+    'large': (50, 50, 50),
+}
+
+# flag combinations; -g and -k cannot be combined
+FLAGS = ["", "-m", "-a", "-r", "--hs", "-g", "-k", "-m -a -r --hs -g"]
+
+PHASES = ('setup', 'lookup_tables', 'generate_zombie', 'generate_enemy_animal', 'generate_friendly_animal',
+          'modlet_generate')
+
+# synthetic families: (config key, template, Class of the template, name stem, share of the entity classes,
+# stock entity classes the altered and raging AI borrow from)
+FAMILIES = (
+    ('ConfigEntityZombie', 'zombieTemplateMale', 'EntityZombie', 'zombieSynth', 0.7,
+     [name for name, _ in randomizer.RandEnt.AI_LIST if name.startswith('zombie')]),
+    ('ConfigEntityEnemyAnimal', 'animalTemplateHostile', 'EntityEnemyAnimal', 'animalSynthHostile', 0.15,
+     [name for name, _ in randomizer.RandEnt.AI_LIST if name.startswith('animal')]),
+    ('ConfigEntityFriendlyAnimal', 'animalTemplateTimid', 'EntityAnimalStag', 'animalSynthTimid', 0.15, []),
+)
+
+# properties a synthetic entity class may override: name => value generator
+OVERRIDES = {
+    'WalkType': lambda rng: str(rng.choice([1, 2, 3, 5, 6, 7])),
+    'Mass': lambda rng: str(rng.randint(60, 400)),
+    'Weight': lambda rng: str(rng.randint(20, 300)),
+    'SizeScale': lambda rng: f"{rng.uniform(0.8, 1.3):.2f}",
+    'MoveSpeed': lambda rng: f"{rng.uniform(0.1, 1.0):.2f}",
+    'MoveSpeedAggro': lambda rng: f"{rng.uniform(0.2, 1.0):.1f}, {rng.uniform(1.0, 2.0):.1f}",
+    'MoveSpeedPanic': lambda rng: f"{rng.uniform(0.5, 1.5):.2f}",
+    'SightRange': lambda rng: str(rng.randint(10, 60)),
+    'ExperienceGain': lambda rng: str(rng.randint(100, 2000)),
+    'JumpMaxDistance': lambda rng: f"{rng.uniform(1.0, 3.0):.1f}, {rng.uniform(3.0, 6.0):.1f}",
+}
+
+
+################################################################################
+# Begin Synthetic Game Data
+################################################################################
+
+
+def template_xml(name: str, class_type: str) -> str:
+    """
+    Build a template entity class, defining everything the randomizers read.
+
+    :param name: template name
+    :param class_type: value of the Class property
+    :return: XML text
+    """
+    props = [('Class', class_type), ('Mass', "170"), ('Weight', "70"), ('SizeScale', "1"), ('MoveSpeed', "0.5"),
+             ('SwimSpeed', "0.6"), ('MoveSpeedPanic', "1.2"), ('MoveSpeedAggro', "0.8, 1.2"),
+             ('JumpMaxDistance', "2.0, 3.0"), ('ExperienceGain', "200"), ('AIFeralSense', "1.5"),
+             ('AITask-1', "BreakBlock"), ('AITask-2', "Wander"), ('AITask-3', ""),
+             ('AITarget-1', "SetAsTargetIfHurt"), ('AITarget-2', "")]
+    lines = [f'<entity_class name="{name}">']
+    lines += [f'    <property name="{k}" value="{v}"/>' for k, v in props]
+    lines += ['    <drop event="Harvest" name="resourceRottingFlesh" count="10" tag="butcherHarvest"/>',
+              '    <effect_group name="Base Effects">',
+              '        <passive_effect name="HealthMax" operation="base_set" value="200"/>',
+              '        <passive_effect name="EntityDamage" operation="perc_add" value="0"/>',
+              '    </effect_group>',
+              '</entity_class>']
+    return "\n".join(lines)
+
+
+def entity_xml(rng: random.Random, name: str, extends: str) -> str:
+    """
+    Build an entity class overriding a random few properties of the class it extends.
+
+    :param rng: random source
+    :param name: entity class name
+    :param extends: entity class it extends
+    :return: XML text
+    """
+    lines = [f'<entity_class name="{name}" extends="{extends}">']
+    for prop in rng.sample(sorted(OVERRIDES), rng.randint(2, 6)):
+        lines.append(f'    <property name="{prop}" value="{OVERRIDES[prop](rng)}"/>')
+    if rng.random() < 0.5:
+        lines.append(f'    <drop event="Harvest" name="resourceBone" count="{rng.randint(1, 20)}" '
+                     f'tag="butcherHarvest"/>')
+    if rng.random() < 0.7:
+        lines += ['    <effect_group name="Base Effects">',
+                  f'        <passive_effect name="HealthMax" operation="base_set" value="{rng.randint(50, 3000)}"/>',
+                  '    </effect_group>']
+    lines.append('</entity_class>')
+    return "\n".join(lines)
+
+
+def generate_game_data(install_dir: str, entities: int, groups: int, depth: int,
+                       seed: int = 0) -> Dict[str, List[str]]:
+    """
+    Write a synthetic game install: Data/Config/entityclasses.xml, entitygroups.xml and Localization.txt.
+
+    Entity classes are split over the zombie, hostile and timid families.  Each one extends either its family
+    template or a class one level shallower, so extends chains reach `depth` classes below the template.  The stock
+    entity classes that altered and raging AI borrow from are always included.
+
+    :param install_dir: game install folder to create
+    :param entities: number of entity classes, excluding templates
+    :param groups: number of entity groups
+    :param depth: deepest extends chain below a template
+    :param seed: seed for the data
+    :return: dict of config key => entity class names of that family
+    """
+    rng = random.Random(seed)
+    config_dir = os.path.join(install_dir, 'Data', 'Config')
+    os.makedirs(config_dir, exist_ok=True)
+
+    classes = ['<entity_classes>', '<entity_class name="playerMale">',
+               '    <property name="Class" value="EntityPlayer"/>', '</entity_class>']
+    families = {}
+    for key, template, class_type, stem, share, stock in FAMILIES:
+        classes.append(template_xml(template, class_type))
+        names = [name for name in stock if name != template]
+        classes += [entity_xml(rng, name, template) for name in names]
+        levels: List[List[str]] = [[template]] + ([list(names)] if names else [])  # entity class names by depth
+        for i in range(max(int(entities * share), 1)):
+            level = min(rng.randint(1, depth), len(levels))
+            name = f"{stem}{i:05d}"
+            classes.append(entity_xml(rng, name, rng.choice(levels[level - 1])))
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(name)
+            names.append(name)
+        families[key] = names
+    classes.append('</entity_classes>')
+    with open(os.path.join(config_dir, 'entityclasses.xml'), 'w') as fp:
+        fp.write("\n".join(classes) + "\n")
+
+    everyone = [name for names in families.values() for name in names]
+    lines = ['<entitygroups>']
+    for i in range(groups):
+        lines.append(f'  <entitygroup name="synthGroup{i:04d}">')
+        for name in rng.sample(everyone, min(len(everyone), rng.randint(5, 25))):
+            lines.append(f'    <entity name="{name}" prob="{rng.choice(["0.25", "0.5", "1"])}"/>')
+        lines.append('  </entitygroup>')
+    lines.append('</entitygroups>')
+    with open(os.path.join(config_dir, 'entitygroups.xml'), 'w') as fp:
+        fp.write("\n".join(lines) + "\n")
+
+    with open(os.path.join(config_dir, 'Localization.txt'), 'w') as fp:
+        fp.write('Key,File,Type,UsedInMainMenu,NoTranslate,english,german\n')
+        for name in everyone:
+            fp.write(f'{name},entityclasses,Entity,,,"{name} EN","{name} DE"\n')
+
+    return families
+
+
+def write_config(work_dir: str, install_dir: str) -> str:
+    """
+    Write a copy of the stock config.json pointing at the synthetic game install.
+
+    :param work_dir: folder to write it in
+    :param install_dir: synthetic game install
+    :return: config file path
+    """
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json'), 'r') as fp:
+        configs = json.load(fp)
+    configs['game_install_dir'] = install_dir
+    path = os.path.join(work_dir, 'config.json')
+    with open(path, 'w') as fp:
+        json.dump(configs, fp, indent=2)
+    return path
+
+
+################################################################################
+# Begin Benchmark Runs
+################################################################################
+
+
+def run_case(options: List[str], families: Dict[str, List[str]], out_dir: str) -> Dict:
+    """
+    Run the pipeline once, timing each phase.  Runs in a process of its own, so that every case starts cold (no
+    caches, allocations or loaded modules left by earlier cases) and the MAT_ALLOWED entries borrowed below do not
+    outlive it.
+
+    :param options: randomizer command line options
+    :param families: config key => synthetic entity class names, for freaky material lookups
+    :param out_dir: folder to write the modlet in
+    :return: dict of phase => seconds, plus variant counts
+    """
+    # freaky materials are only known for stock entity names; borrow them for the synthetic ones
+    stock = sorted(randomizer.RandEnt.MAT_ALLOWED)
+    for names in families.values():
+        for i, name in enumerate(names):
+            if name not in randomizer.RandEnt.MAT_ALLOWED:
+                randomizer.RandEnt.MAT_ALLOWED[name] = randomizer.RandEnt.MAT_ALLOWED[stock[i % len(stock)]]
+
+    timings = {}
+    start = time.perf_counter()
+    engine = randomizer.RandEnt(randomizer.build_cli_parser(options))
+    engine.initial_setup()
+    engine.CONFIGS['modlet_gen_dir'] = os.path.join(out_dir, engine.CONFIGS['modlet_name'])
+    timings['setup'] = time.perf_counter() - start
+
+    for phase, step in [('lookup_tables', engine.create_lookup_tables),
+                        ('generate_zombie', engine.generate_zombie),
+                        ('generate_enemy_animal', engine.generate_enemy_animal),
+                        ('generate_friendly_animal', engine.generate_friendly_animal),
+                        ('modlet_generate', engine.modlet_generate)]:
+        start = time.perf_counter()
+        step()
+        timings[phase] = time.perf_counter() - start
+
+    return {
+        'phases': timings,
+        'total': sum(timings.values()),
+        'variants': len(engine.NEW_ENTITIES),
+    }
+
+
+def _run_case_process(results: multiprocessing.Queue, options: List[str], families: Dict[str, List[str]],
+                      out_dir: str) -> None:
+    """
+    Process entry point for run_case().
+    """
+    logging.getLogger(randomizer.__name__).setLevel(logging.WARNING)  # it logs every variant
+    results.put(run_case(options, families, out_dir))
+
+
+def run_isolated(options: List[str], families: Dict[str, List[str]], out_dir: str) -> Dict:
+    """
+    Run a case in a fresh process.
+
+    :param options: randomizer command line options
+    :param families: config key => synthetic entity class names
+    :param out_dir: folder to write the modlet in
+    :return: run_case() results
+    """
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_case_process, args=(results, options, families, out_dir))
+    process.start()
+    result = None
+    while result is None and (process.is_alive() or not results.empty()):
+        try:
+            result = results.get(timeout=1.0)
+        except queue.Empty:
+            pass
+    process.join()
+    if result is None:
+        raise RuntimeError(f"Benchmark run failed: {' '.join(options)}")
+    return result
+
+
+def git_revision() -> str:
+    """
+    Get the commit being benchmarked.
+
+    :return: commit id, or "" outside a git checkout
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(results: Dict, baseline: Dict) -> None:
+    """
+    Print per-phase timing ratios against an earlier results file; runs are matched by size, counts and flags.
+
+    :param results: current results
+    :param baseline: earlier results
+    """
+    earlier = {(run['size'], run['counts'], run['flags']): run for run in baseline['runs']}
+    print(f"\nCompared with {baseline.get('revision', '?')} (new / old time):")
+    for run in results['runs']:
+        old = earlier.get((run['size'], run['counts'], run['flags']), None)
+        if old is None:
+            continue
+        ratios = [f"{phase}={run['phases'][phase] / old['phases'][phase]:.2f}"
+                  for phase in PHASES if old['phases'].get(phase, 0) > 0]
+        print(f"  {run['size']:8s} {run['counts']:6s} {run['flags'] or '-':18s} "
+              f"total={run['total'] / old['total']:.2f}  {' '.join(ratios)}")
+
+
+################################################################################
+# Begin Main
+################################################################################
+
+
+def build_cli_parser() -> argparse.Namespace:
+    """
+    Build the set of accepted options.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the variant generator on synthetic game data")
+    parser.add_argument("--sizes", action="store", dest="sizes", default="vanilla",
+                        help=f"comma separated data sizes: {', '.join(SIZES)} (default vanilla)")
+    parser.add_argument("--counts", action="store", dest="counts", default="small",
+                        help=f"comma separated variant counts: {', '.join(COUNTS)} (default small)")
+    parser.add_argument("--flags", action="append", dest="flags", default=None,
+                        help="randomizer flags to benchmark, may be repeated (default: each of "
+                             f"{', '.join(repr(f) for f in FLAGS)})")
+    parser.add_argument("--repeat", action="store", type=int, dest="repeat", default=1,
+                        help="runs per case; the fastest is kept (default 1)")
+    parser.add_argument("--seed", action="store", type=int, dest="seed", default=1,
+                        help="seed for the synthetic data and the generator (default 1)")
+    parser.add_argument("--extra", action="store", dest="extra", default="",
+                        help="options passed to every run, e.g. '--jobs 4'")
+    parser.add_argument("--output", action="store", dest="output", default="benchmark.json",
+                        help="results file (default benchmark.json)")
+    parser.add_argument("--compare", action="store", dest="compare", default=None,
+                        help="earlier results file to compare against")
+    parser.add_argument("--keep", action="store_true", dest="keep", default=False,
+                        help="keep the synthetic game data and modlets")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Main Routine.
+    """
+    args = build_cli_parser()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'seed': args.seed,
+        'extra': args.extra,
+        'runs': [],
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="trub-benchmark-")
+    try:
+        for size in args.sizes.split(","):
+            entities, groups, depth = SIZES[size]
+            install_dir = os.path.join(work_dir, size)
+            start = time.perf_counter()
+            families = generate_game_data(install_dir, entities, groups, depth, seed=args.seed)
+            logger.info(f"## {size}: {entities} entity classes, {groups} groups, extends depth {depth} "
+                        f"({time.perf_counter() - start:.2f}s to generate)")
+            config = write_config(install_dir, install_dir)
+
+            for counts in args.counts.split(","):
+                zcount, ecount, fcount = COUNTS[counts]
+                for flags in (args.flags if args.flags is not None else FLAGS):
+                    options = (["--config", config, "--seed", str(args.seed), "--no-cache", "--rebuild",
+                                "-z", str(zcount), "-e", str(ecount), "-f", str(fcount)]
+                               + flags.split() + args.extra.split())
+                    out_dir = os.path.join(install_dir, 'out')
+                    best = None
+                    for _ in range(max(args.repeat, 1)):
+                        shutil.rmtree(out_dir, ignore_errors=True)
+                        os.makedirs(out_dir)
+                        result = run_isolated(options, families, out_dir)
+                        if best is None or result['total'] < best['total']:
+                            best = result
+                    best.update({'size': size, 'counts': counts, 'flags': flags, 'options': options[2:]})
+                    results['runs'].append(best)
+                    logger.info(f"   {counts:6s} {flags or '-':18s} {best['total']:8.3f}s  {best['variants']:6d} "
+                                f"variants  " + " ".join(f"{p}={best['phases'][p]:.3f}" for p in PHASES))
+    finally:
+        if args.keep:
+            logger.info(f"Synthetic data kept in: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, 'w') as fp:
+        json.dump(results, fp, indent=2)
+    logger.info(f"Results written to: {args.output}")
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as fp:
+            compare(results, json.load(fp))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,31 @@
 ################################################################################
 
 import argparse
+import collections
+import concurrent.futures
+import contextlib
 import copy
+import cProfile
+import csv
+import hashlib
+import heapq
 import json
 import logging
 import math
 import os
+import pickle
 import pwd
 import random
+import resource
+import shutil
 import sys
+import tempfile
+import time
+import tracemalloc
 # noinspection PyPep8Naming,StandardLibraryXml
 import xml.etree.ElementTree as ET
-from typing import Dict, Optional, Tuple
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
 
 # noinspection PyUnusedName
 __author__ = "trub64"  # as derived from Doughphunghus's original perl code
@@ -32,7 +46,920 @@ NEW_ENTITY_FILTER_OUT_LIST = {  # don't ever clone these nodes. Hardcode obvious
     'animalTemplateTimid': "Do not clone this as its a template entity",
     'animalTemplateHostile': "Do not clone this as its a template entity"
 }
-POPULATE_ENTITY_TYPE_LOOKUP_MAX_LOOPS = 2  # Increase number if entity classes nest deeply
+GROUP_ENTRY_NAME_PLACEHOLDER = "__trub_variant_name__"  # stands in for the variant name in group templates
+DEFAULT_WRITE_BUFFER_KB = 1024  # per output file buffer for the modlet writer
+DEFAULT_CACHE_DIR = ".cache"  # preprocessed game data cache, relative to this script
+
+# Preprocessed game data kept in the cache (plus the ENTITY_GRAPH state).  Element trees are not cached: the
+# expat parser rebuilds them faster than pickle can.
+GAME_DATA_CACHE_ATTRIBUTES = ('ENTITY_ORDER', 'ENTITY_TYPE_LOOKUP', 'TYPE_ENTITY_LOOKUP', 'ENTITY_GROUP_INDEX')
+
+# build manifest kept in the modlet directory, for incremental regeneration
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 2
+
+# columns of the variant statistics table, see VariantTable
+VARIANT_TABLE_TEXT = ('name', 'base', 'ai', 'bite', 'materials')
+VARIANT_TABLE_FLAGS = ('freak', 'raging')
+VARIANT_TABLE_NUMBERS = ('trub_scale', 'SizeScale', 'Mass', 'HealthMax', 'ExperienceGain', 'MoveSpeed',
+                         'MoveSpeedPanic', 'MoveSpeedAggro', 'MoveSpeedAggroMax', 'EntityDamage', 'BlockDamage',
+                         'WalkType')
+VARIANT_TABLE_CSV = "variants.csv"
+
+# how --delta-xml assumes the game resolves `extends`: a plain property is inherited unless the class sets a property
+# of the same name, any other kind of child (effect groups, drops, class properties ...) only as a whole, unless the
+# class has children of that kind itself
+DELTA_XML_INHERITANCE = "properties by name; effect groups, drops etc. by kind"
+DELTA_TOTALS = ('variants', 'written_full', 'full_elements', 'delta_elements', 'full_bytes', 'delta_bytes')
+
+# output size predictions of the load budget planner: sample variants serialized per base entity (the largest
+# counts), and the longest descriptors a localized name can get
+BUDGET_SAMPLES = 3
+BUDGET_DESCRIPTORS = " (Giant, Freak, Raging)"
+
+# display name descriptors of variants by trub_scale: the first size below the limit (None: nothing to tell)
+LOCALIZATION_SIZES = ((65, "Tiny"), (90, "Small"), (116, None), (165, "Big"), (float('inf'), "Giant"))
+
+# language columns of Localization.txt; other columns after the first five (e.g. "Context / Alternate Text") are not
+# names.  Descriptors are English, so only the english column gets them
+LOCALIZATION_LANGUAGES = ('english', 'german', 'latam', 'french', 'italian', 'japanese', 'koreana', 'polish',
+                          'brazilian', 'russian', 'turkish', 'schinese', 'tchinese', 'spanish')
+LOCALIZATION_DESCRIBED = 'english'
+
+SEED_DERIVATION = "random.Random('<seed>:<config key>:<base entity>:<variant number>')"
+
+# hot-path counters kept by every engine, reported with --profile
+PROFILE_COUNTERS = (
+    'findall',  # XPath findall() calls
+    'deepcopy',  # element trees deep-copied
+    'material_repeats',  # freaky material picks repeating a combination, all of theirs being used up
+)
+
+# Parsed game data, shared by the engines of a --profiles batch (read-only once generation starts)
+GAME_DATA_ATTRIBUTES = (
+    'CONFIGS', 'FILTER_ALLOW_ONLY_LIST_FLAG', 'NEW_ENTITY_FILTER_OUT_LIST', 'NEW_ENTITY_FILTER_ALLOW_ONLY_LIST',
+    'ENTITYCLASSES_DOM', 'ENTITY_INVENTORY', 'ENTITY_ORDER', 'RESOLVED_PROPERTIES', 'ENTITY_GRAPH',
+    'ENTITY_TYPE_LOOKUP', 'TYPE_ENTITY_LOOKUP', 'ENTITY_GROUP_INDEX', 'CONFIG_PLANS', 'game_data_cached',
+)
+
+# Parsed game data and setup results handed to --jobs workers (read-only once generation starts)
+SNAPSHOT_ATTRIBUTES = GAME_DATA_ATTRIBUTES + ('prefix', 'seed', 'variant_budget')
+
+# options a --profiles entry may not set: the batch parses the game files once, for all of them
+PROFILE_SHARED_OPTIONS = ('config', 'cache_dir', 'no_cache', 'debug', 'profiles')
+
+# config keys of an entity config section that are not properties to randomize
+CONFIG_META_KEYS = ('disable_randomizer', 'num_generation_loops', 'ignore_entity_list', 'enable_walktype_crawler_limit')
+
+# properties with hardcoded randomizers, applied in place of their config.json rand_function
+PLAN_SPEED = "alter_Speed"  # MoveSpeed, MoveSpeedPanic, SwimSpeed
+PLAN_SPEED_DUPLEX = "alter_SpeedDuplex"  # MoveSpeedAggro
+PLAN_JUMP = "alter_JumpMaxDistance"  # JumpMaxDistance
+PLAN_SPECIAL_CASES = {
+    'MoveSpeed': PLAN_SPEED,
+    'MoveSpeedPanic': PLAN_SPEED,
+    'SwimSpeed': PLAN_SPEED,
+    'MoveSpeedAggro': PLAN_SPEED_DUPLEX,
+    'JumpMaxDistance': PLAN_JUMP,
+}
+
+
+class PlanStep(NamedTuple):
+    """
+    One property of a compiled randomizer plan.  `numbers` holds the config values the randomizer needs, already
+    parsed, and `decimals` the decimal places its results are formatted with:
+
+    - setcreate_one_range: (low, high), (decimals,)
+    - setcreate_two_range: (low1, low2, high1, high2, rescale), (low decimals, high decimals)
+    - setcreate_rand_around_percent: (pct_random_int, default), (default decimals,)
+    - custom_HealthAndExperienceGain: (pct_random_int,)
+    """
+    name: str  # property name
+    kind: str  # rand_function from config.json, or one of the PLAN_* special cases
+    numbers: Tuple[float, ...] = ()
+    decimals: Tuple[int, ...] = ()
+
+
+# properties making up the AI of an entity class, replaced as a whole by -a and -r
+AI_PROPERTY_PREFIXES = ("AITask-", "AITarget-")
+AI_PROPERTY_NAMES = ("AIFeralSense", "AINoiseSeekDist", "AIPathCostScale")
+
+
+class AITemplate(NamedTuple):
+    """
+    The AI of a donor entity class, precompiled from its RandEnt.AI_LIST entry into frozen property fragments
+    (the attributes of each property element, in order), which are cloned into fresh elements for every variant.
+    """
+    donor: str  # entity class the AI comes from
+    fragments: Tuple[Tuple[Tuple[str, str], ...], ...]
+
+    @staticmethod
+    def fragment(item: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+        """
+        :param item: ("name", "value") or ("name", "value", "data")
+        :return: attributes of the property element
+        """
+        return tuple(zip(('name', 'value', 'data'), item))
+
+    @classmethod
+    def compile(cls, donor: str, items: List[Tuple[str, ...]]) -> 'AITemplate':
+        """
+        :param donor: entity class the AI comes from
+        :param items: AI entries, see RandEnt.AI_LIST
+        :return: template
+        """
+        return cls(donor, tuple(cls.fragment(item) for item in items))
+
+    @staticmethod
+    def clone(fragments: Tuple[Tuple[Tuple[str, str], ...], ...]) -> List[ET.Element]:
+        """
+        :param fragments: property fragments
+        :return: new property elements
+        """
+        elements = []
+        for attrib in fragments:
+            prop = ET.Element("property", dict(attrib))
+            prop.tail = "\n    "
+            elements.append(prop)
+        return elements
+
+
+################################################################################
+# Begin Entity Inheritance Graph
+################################################################################
+
+
+class EntityGraph(object):
+    """
+    Inheritance graph of the entity classes, built in a single pass over the inventory and resolved in
+    topological order, so any depth of `extends` nesting resolves at once.
+
+    The type of an entity class is the type of the class it extends, if that one has a type; otherwise it is the
+    value of its own `Class` property.
+    """
+
+    def __init__(self, inventory: Dict[str, ET.Element], order: List[str]):
+        """
+        Build and resolve the graph.
+
+        :param inventory: entity class name => entity class node
+        :param order: entity class names in document order
+        """
+        self.order = list(order)  # document order
+        self.parent: Dict[str, Optional[str]] = {}  # name => name of the entity class it extends
+        self.children: Dict[str, List[str]] = {name: [] for name in order}
+        self.own_class: Dict[str, str] = {}  # name => value of its own Class property
+
+        for name in order:
+            entity = inventory[name]
+            extends = entity.attrib.get('extends', None)
+            if extends is not None and extends not in inventory:
+                logger.warning(f"Entity class `{name}` extends unknown entity class `{extends}`")
+                extends = None
+            self.parent[name] = extends
+            if extends is not None:
+                self.children[extends].append(name)
+
+            for prop in entity.findall('property'):
+                if prop.attrib.get('name', None) == "Class":
+                    self.own_class[name] = prop.attrib.get('value', None)
+
+        self.resolution_order = self._topological_order()
+
+        self.entity_type: Dict[str, str] = {}  # name => resolved Class type
+        for name in self.resolution_order:
+            extends = self.parent[name]
+            if extends is not None and extends in self.entity_type:
+                self.entity_type[name] = self.entity_type[extends]
+            elif name in self.own_class:
+                self.entity_type[name] = self.own_class[name]
+
+    @classmethod
+    def restore(cls, state: Dict) -> 'EntityGraph':
+        """
+        Recreate a resolved graph from its saved attributes, as kept in the game data cache.
+
+        :param state: vars() of a resolved graph
+        :return: graph
+        """
+        graph = cls.__new__(cls)
+        graph.__dict__.update(state)
+        return graph
+
+    def _topological_order(self) -> List[str]:
+        """
+        Order the entity classes so that every class comes after the class it extends.
+
+        :return: list of entity class names
+        """
+        resolved = []
+        pending = [name for name in reversed(self.order) if self.parent[name] is None]
+        while pending:
+            name = pending.pop()
+            resolved.append(name)
+            pending.extend(reversed(self.children[name]))
+
+        if len(resolved) != len(self.order):
+            seen = set(resolved)
+            cyclic = [name for name in self.order if name not in seen]
+            raise RuntimeError(f"Exiting because entity classes extend each other in a cycle: {', '.join(cyclic)}")
+        return resolved
+
+    def ancestors(self, name: str) -> List[str]:
+        """
+        Get the extends chain of an entity class.
+
+        :param name: entity class name
+        :return: names of the classes it extends, nearest first
+        """
+        chain = []
+        extends = self.parent.get(name, None)
+        while extends is not None:
+            chain.append(extends)
+            extends = self.parent[extends]
+        return chain
+
+    def descendants(self, name: str) -> List[str]:
+        """
+        Get every entity class that extends an entity class, directly or not.
+
+        :param name: entity class name
+        :return: names of the descendant classes, depth first in document order
+        """
+        found = []
+        pending = list(reversed(self.children.get(name, [])))
+        while pending:
+            child = pending.pop()
+            found.append(child)
+            pending.extend(reversed(self.children[child]))
+        return found
+
+    def untyped(self) -> List[str]:
+        """
+        Get the entity classes for which no type could be resolved.
+
+        :return: entity class names, in document order
+        """
+        return [name for name in self.order if name not in self.entity_type]
+
+    def type_families(self) -> Dict[str, List[str]]:
+        """
+        Group the entity classes by their resolved type.
+
+        :return: dict of type => entity class names in document order
+        """
+        families = {}
+        for name in self.order:
+            entity_type = self.entity_type.get(name, None)
+            if entity_type is not None:
+                if entity_type not in families:
+                    families[entity_type] = []
+                families[entity_type].append(name)
+        return families
+
+
+class EntityClassLoader(object):
+    """
+    Parser target building the entityclasses.xml tree, less the entity classes of unwanted types: a class whose
+    parent already resolved to such a type is skipped without building any of it, one that has such a type of
+    its own is dropped once built.  Types resolve as in EntityGraph.  Classes that extend a class further down
+    the file are kept, to be settled once the whole file is read.
+    """
+
+    def __init__(self, types: Dict[str, str]):
+        """
+        :param types: entity types to keep (other keys are ignored)
+        """
+        self.types = types
+        self.builder = ET.TreeBuilder()
+        self.root: Optional[ET.Element] = None
+        self.parents: Dict[str, Optional[str]] = {}  # name => name of the entity class it extends
+        self.own_class: Dict[str, Optional[str]] = {}  # name => value of its own Class property
+        self.resolved: Dict[str, Optional[str]] = {}  # name => resolved type
+        self.dropped: Dict[str, bool] = {}  # names of the entity classes left out
+        self.closed = False  # once the whole file is read, an extends that never showed up ends the chain
+        self.depth = 0
+        self.skipping = 0  # depth within a skipped entity class
+        self.skipped_tail = False  # whitespace after a skipped entity class is its tail, and goes with it
+
+    def entity_type(self, name: str, seen: Tuple[str, ...] = ()) -> Optional[str]:
+        """
+        Resolve the type of an entity class from what is read so far.  The type is only settled (and cached) once
+        every class up its extends chain is read: until then a class further down the file may still pass one on.
+
+        :param name: entity class name
+        :param seen: classes further down the extends chain, against cycles
+        :return: type, or None if untyped
+        """
+        if name in self.resolved:
+            return self.resolved[name]
+        extends = self.parents[name]
+        inherited = None
+        settled = True
+        if extends is not None and extends not in seen:
+            if extends in self.parents:
+                inherited = self.entity_type(extends, seen + (name,))
+                settled = extends in self.resolved
+            else:
+                settled = self.closed
+        entity_type = inherited if inherited is not None else self.own_class[name]
+        if settled:
+            self.resolved[name] = entity_type
+        return entity_type
+
+    def unwanted(self, name: str) -> bool:
+        """
+        :param name: entity class name
+        :return: True if the class settled on a type that is not kept
+        """
+        entity_type = self.entity_type(name)
+        return name in self.resolved and entity_type is not None and entity_type not in self.types
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        self.depth += 1
+        self.skipped_tail = False
+        if self.skipping:
+            self.skipping += 1
+            return
+        name, extends = attrib.get('name', None), attrib.get('extends', None)
+        if self.depth == 2 and tag == 'entity_class' and name is not None and name not in self.parents and \
+                extends in self.parents and self.unwanted(extends):
+            self.parents[name] = extends
+            self.own_class[name] = None
+            self.dropped[name] = True
+            self.skipping = 1
+            return
+        element = self.builder.start(tag, attrib)
+        if self.root is None:
+            self.root = element
+
+    def end(self, tag: str) -> None:
+        self.depth -= 1
+        if self.skipping:
+            self.skipping -= 1
+            self.skipped_tail = self.skipping == 0
+            return
+        element = self.builder.end(tag)
+        name = element.attrib.get('name', None)
+        if self.depth != 1 or tag != 'entity_class' or name is None or name in self.parents:
+            return
+        extends = element.attrib.get('extends', None)
+        self.parents[name] = extends
+        self.own_class[name] = None
+        for prop in element.findall('property'):
+            if prop.attrib.get('name', None) == "Class":
+                self.own_class[name] = prop.attrib.get('value', None)
+        if self.unwanted(name):
+            self.root.remove(element)
+            self.dropped[name] = True
+
+    def data(self, data: str) -> None:
+        if not self.skipping and not self.skipped_tail:
+            self.builder.data(data)
+
+    def close(self) -> ET.Element:
+        self.closed = True
+        return self.builder.close()
+
+
+################################################################################
+# Begin Material Sampler
+################################################################################
+
+
+class MaterialSampler(object):
+    """
+    Freaky material combinations for the variants of one base entity, drawn without replacement.
+
+    Which of the (up to three) materials get replaced is decided per variant, by the --mp chance.  The combinations
+    of each such choice are numbered in mixed radix over the allowed materials and drawn by a lazy Fisher-Yates
+    shuffle, which only keeps the swapped numbers: every pick is O(1), and unique until the combinations of that
+    choice are used up, after which they repeat.
+    """
+
+    def __init__(self, groups: Tuple[Optional[List[str]], ...]):
+        """
+        :param groups: allowed materials per material slot, or None if that material is never replaced
+        """
+        self.groups = tuple(None if group is None else tuple(dict.fromkeys(group)) for group in groups)
+        self.shuffles: Dict[Tuple[bool, ...], List] = {}  # slots replaced => [numbers left, {position: number}]
+        self.drawn = 0
+
+    @property
+    def space(self) -> int:
+        """
+        :return: number of combinations replacing at least one material
+        """
+        return math.prod(len(group) + 1 for group in self.groups if group is not None) - 1
+
+    def draw(self, rand: random.Random, chance: float) -> Tuple[Tuple[Optional[str], ...], bool]:
+        """
+        Pick the materials of a variant.
+
+        :param rand: random stream of the variant
+        :param chance: chance of replacing each material
+        :return: Tuple of (material per slot, None where not replaced; False if the combination is a repeat)
+        """
+        mask = tuple(group is not None and rand.random() < chance for group in self.groups)
+        if not any(mask):
+            return (None,) * len(mask), True  # no changes is special cased
+
+        size = math.prod(len(group) for group, used in zip(self.groups, mask) if used)
+        shuffle = self.shuffles.setdefault(mask, [size, {}])
+        left, swapped = shuffle
+        fresh = left > 0
+        if not fresh:
+            number = rand.randrange(size)
+        else:
+            position = rand.randrange(left)
+            number = swapped.get(position, position)
+            last = swapped.pop(left - 1, left - 1)
+            if position != left - 1:
+                swapped[position] = last
+            shuffle[0] = left - 1
+            self.drawn += 1
+
+        choices = []
+        for group, used in zip(self.groups, mask):
+            if used:
+                number, index = divmod(number, len(group))
+                choices.append(group[index])
+            else:
+                choices.append(None)
+        return tuple(choices), fresh
+
+
+################################################################################
+# Begin Variant Records
+################################################################################
+
+
+class ElementDelta(object):
+    """
+    Compact record of an element that differs from its counterpart in the game data.  Its children are, in order:
+
+    - int: index of an unchanged child of the counterpart
+    - str: serialized XML of a changed or added child
+    - ElementDelta: a child container (e.g. an effect_group) with changes of its own
+    """
+    __slots__ = ('index', 'tag', 'attrib', 'text', 'tail', 'children')
+
+    SPLIT = "__trub_element_children__"  # stands in for the children when serializing the start and end tags
+
+    def __init__(self, index: int, element: ET.Element, children: Tuple):
+        """
+        :param index: index of the counterpart within its parent, if any
+        :param element: changed element; only its own tag, attributes, text and tail are kept
+        :param children: compacted children
+        """
+        self.index = index
+        self.tag = element.tag
+        self.attrib = dict(element.attrib)
+        self.text = element.text
+        self.tail = element.tail
+        self.children = children
+
+    @classmethod
+    def compact_children(cls, base: ET.Element, element: ET.Element, cache: Dict[ET.Element, Tuple[str, ...]]) -> Tuple:
+        """
+        Compact the children of an element against those of its counterpart.  Unchanged children are matched in
+        order, so added, removed and altered children all land on the right side of the children around them.
+
+        :param base: counterpart in the game data
+        :param element: changed element
+        :param cache: counterpart element => serialized XML of its children
+        :return: compacted children
+        """
+        base_children = list(base)
+        base_xml = cls.child_xml(base, cache)
+        positions = {}  # serialized child => indexes of the counterpart's children serializing the same
+        for index, xml in enumerate(base_xml):
+            positions.setdefault(xml, []).append(index)
+
+        children = []
+        pos = 0  # children of the counterpart before this have been matched or passed over
+        for child in element:
+            xml = ET.tostring(child, encoding='unicode')
+            index = next((i for i in positions.get(xml, ()) if i >= pos), None)
+            if index is not None:
+                children.append(index)
+                pos = index + 1
+                continue
+
+            if len(child):  # a container that changed inside: look for its counterpart to compact against
+                index = next((i for i in range(pos, len(base_children))
+                              if base_children[i].tag == child.tag and base_children[i].attrib == child.attrib), None)
+                if index is not None:
+                    delta = ElementDelta(index, child, cls.compact_children(base_children[index], child, cache))
+                    children.append(delta)
+                    pos = index + 1
+                    continue
+
+            children.append(xml)
+        return tuple(children)
+
+    @staticmethod
+    def child_xml(base: ET.Element, cache: Dict[ET.Element, Tuple[str, ...]]) -> Tuple[str, ...]:
+        """
+        Get the serialized XML of the children of an element of the game data, serializing them on first use.
+
+        :param base: game data element
+        :param cache: element => serialized XML of its children
+        :return: serialized children, in order
+        """
+        xml = cache.get(base, None)
+        if xml is None:
+            xml = tuple(ET.tostring(child, encoding='unicode') for child in base)
+            cache[base] = xml
+        return xml
+
+    def to_xml(self, base: ET.Element, cache: Dict[ET.Element, Tuple[str, ...]]) -> str:
+        """
+        Serialize the element, the same as ET.tostring() would have serialized the element it was compacted from.
+
+        :param base: counterpart in the game data
+        :param cache: counterpart element => serialized XML of its children
+        :return: XML text
+        """
+        shell = ET.Element(self.tag, self.attrib)
+        shell.tail = self.tail
+        if not self.children:
+            shell.text = self.text
+            return ET.tostring(shell, encoding='unicode')
+
+        shell.text = (self.text or "") + self.SPLIT
+        head, _, end = ET.tostring(shell, encoding='unicode').partition(self.SPLIT)
+
+        base_children = list(base)
+        base_xml = self.child_xml(base, cache)
+        parts = [head]
+        for child in self.children:
+            if isinstance(child, int):
+                parts.append(base_xml[child])
+            elif isinstance(child, str):
+                parts.append(child)
+            else:
+                parts.append(child.to_xml(base_children[child.index], cache))
+        parts.append(end)
+        return "".join(parts)
+
+
+class VariantRecord(ElementDelta):
+    """
+    A generated variant, held as the differences from its base entity class until it is written out: its own
+    attributes (name, extends, trub_* ...) and only the properties, effect groups, drops etc. that were changed or
+    added.
+    """
+    __slots__ = ('base_name', 'name')
+
+    def __init__(self, base_name: str, base: ET.Element, variant: ET.Element,
+                 cache: Dict[ET.Element, Tuple[str, ...]]):
+        """
+        :param base_name: name of the base entity class
+        :param base: base entity class node
+        :param variant: fully generated variant node
+        :param cache: game data element => serialized XML of its children
+        """
+        super().__init__(-1, variant, self.compact_children(base, variant, cache))
+        self.base_name = base_name
+        self.name = variant.attrib['name']
+
+
+class SerializedRecord(object):
+    """
+    A variant held as its final XML text: carried over from the previous build of the modlet, or already reduced
+    to its delta form (--delta-xml).
+    """
+    __slots__ = ('base_name', 'name', 'xml')
+
+    def __init__(self, base_name: str, name: str, xml: str):
+        """
+        :param base_name: name of the base entity class
+        :param name: variant name
+        :param xml: serialized variant, as found in the previous entityclasses.xml or built by delta_record()
+        """
+        self.base_name = base_name
+        self.name = name
+        self.xml = xml
+
+    def to_xml(self, base: ET.Element, cache: Dict[ET.Element, Tuple[str, ...]]) -> str:
+        """
+        Serialize the variant: the stored XML text.
+
+        :param base: base entity class node (unused)
+        :param cache: game data element => serialized XML of its children (unused)
+        :return: XML text
+        """
+        return self.xml
+
+
+################################################################################
+# Begin Variant Statistics
+################################################################################
+
+
+class VariantTable(object):
+    """
+    Statistics of the generated variants, one row per variant, kept column by column: text columns as lists,
+    flags and numbers as typed arrays.  Numbers a variant does not define (not even by inheritance) are NaN.
+
+    - name, base: variant and base entity names
+    - ai: entity class whose AI was taken, for altered AI and raging stags; bite: HandItem of a raging stag
+    - materials: ReplaceMaterial0/1/2 in effect (the freaky material choices), joined by "/"
+    - freak, raging: 1 if the variant has a freaky Material0 / is a raging stag
+    - trub_scale ... WalkType: final values of the variant, as written (MoveSpeedAggro split into its two values,
+      EntityDamage/BlockDamage as the size based perc_add)
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, object] = {}
+        for name in VARIANT_TABLE_TEXT:
+            self.columns[name] = []
+        for name in VARIANT_TABLE_FLAGS:
+            self.columns[name] = array('b')
+        for name in VARIANT_TABLE_NUMBERS:
+            self.columns[name] = array('d')
+
+    def __len__(self) -> int:
+        return len(self.columns['name'])
+
+    def append(self, row: Dict) -> None:
+        """
+        Add a variant.
+
+        :param row: column name => value; missing text is "", missing flags 0 and missing numbers NaN
+        """
+        for name in VARIANT_TABLE_TEXT:
+            self.columns[name].append(row.get(name, ""))
+        for name in VARIANT_TABLE_FLAGS:
+            self.columns[name].append(1 if row.get(name, False) else 0)
+        for name in VARIANT_TABLE_NUMBERS:
+            self.columns[name].append(row.get(name, math.nan))
+
+    def merge(self, other: 'VariantTable') -> None:
+        """
+        Add all variants of another table.
+
+        :param other: table to take the rows of
+        """
+        for name, column in other.columns.items():
+            self.columns[name].extend(column)
+
+    def rows(self, start: int = 0, end: int = None) -> List[List]:
+        """
+        Get rows as lists of values, in the order of VARIANT_TABLE_TEXT, _FLAGS and _NUMBERS, with None for NaN.
+
+        :param start: first row
+        :param end: row after the last (default: all)
+        :return: list of rows
+        """
+        names = VARIANT_TABLE_TEXT + VARIANT_TABLE_FLAGS + VARIANT_TABLE_NUMBERS
+        columns = [self.columns[name][start:end] for name in names]
+        return [[None if isinstance(v, float) and math.isnan(v) else v for v in row] for row in zip(*columns)]
+
+    def extend(self, rows: List[List]) -> None:
+        """
+        Add rows as given by rows().
+
+        :param rows: list of rows
+        """
+        names = VARIANT_TABLE_TEXT + VARIANT_TABLE_FLAGS + VARIANT_TABLE_NUMBERS
+        for row in rows:
+            self.append({name: (math.nan if value is None else value) for name, value in zip(names, row)})
+
+    def count(self, flag: str) -> int:
+        """
+        :param flag: flag column
+        :return: number of variants with the flag set
+        """
+        return sum(self.columns[flag])
+
+    def groups(self) -> Dict[str, List[int]]:
+        """
+        :return: base entity name => row numbers of its variants
+        """
+        groups = {}
+        for i, base in enumerate(self.columns['base']):
+            groups.setdefault(base, []).append(i)
+        return groups
+
+    def distribution(self, name: str, rows: List[int]) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Summarize a number column over some rows, with nearest-rank percentiles.
+
+        :param name: number column
+        :param rows: row numbers
+        :return: Tuple of (min, p50, p95, max), or None if no row has a value
+        """
+        column = self.columns[name]
+        values = sorted(v for v in (column[i] for i in rows) if not math.isnan(v))
+        if len(values) == 0:
+            return None
+        n = len(values)
+        return values[0], values[math.ceil(0.5 * n) - 1], values[math.ceil(0.95 * n) - 1], values[-1]
+
+    def write_csv(self, fp: TextIO) -> None:
+        """
+        Write the table as CSV, with a header line.
+
+        :param fp: open text file
+        """
+        writer = csv.writer(fp, lineterminator="\n")
+        writer.writerow(VARIANT_TABLE_TEXT + VARIANT_TABLE_FLAGS + VARIANT_TABLE_NUMBERS)
+        for row in self.rows():
+            writer.writerow(["" if v is None else f"{v:g}" if isinstance(v, float) else v for v in row])
+
+
+################################################################################
+# Begin Output Writer
+################################################################################
+
+
+class ModletWriter(object):
+    """
+    Buffered writer for the generated modlet files.
+
+    Each output file gets one buffered handle, opened on first use and kept for the whole run.  Everything is
+    written into a staging directory next to the modlet; on commit the files are renamed into the modlet
+    directory one by one, so a failed run never leaves a half-written modlet behind.
+    """
+
+    def __init__(self, target_dir: str, buffer_kb: int = DEFAULT_WRITE_BUFFER_KB):
+        """
+        Create the staging area for a modlet.
+
+        :param target_dir: final modlet directory
+        :param buffer_kb: buffer size per output file, in KB
+        """
+        self.target_dir = os.path.abspath(target_dir)
+        self.buffer_size = max(int(buffer_kb), 1) * 1024
+
+        # staged next to the target so the final rename stays on the same filesystem
+        parent = os.path.dirname(self.target_dir)
+        os.makedirs(parent, exist_ok=True)
+        self.staging_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(self.target_dir)}-", dir=parent)
+
+        self.handles: Dict[str, TextIO] = {}  # relative path => open file
+        self.sizes: Dict[str, int] = {}  # relative path => bytes written, once committed
+
+    def path(self, rel_path: str) -> str:
+        """
+        Final location of a modlet file.
+
+        :param rel_path: path relative to the modlet directory
+        :return: absolute path
+        """
+        return os.path.join(self.target_dir, rel_path)
+
+    def open(self, rel_path: str) -> TextIO:
+        """
+        Get the handle for a modlet file, creating it on first use.
+
+        :param rel_path: path relative to the modlet directory
+        :return: open, buffered file handle
+        """
+        fp = self.handles.get(rel_path, None)
+        if fp is None:
+            staged = os.path.join(self.staging_dir, rel_path)
+            os.makedirs(os.path.dirname(staged), exist_ok=True)
+            fp = open(staged, 'w', buffering=self.buffer_size)
+            self.handles[rel_path] = fp
+        return fp
+
+    def write(self, rel_path: str, text: str) -> None:
+        """
+        Write text to a modlet file.
+
+        :param rel_path: path relative to the modlet directory
+        :param text: text to write
+        """
+        self.open(rel_path).write(text)
+
+    def digest(self, rel_path: str) -> str:
+        """
+        Hash what has been written to a modlet file so far.
+
+        :param rel_path: path relative to the modlet directory
+        :return: hex digest of the file content
+        """
+        self.open(rel_path).flush()
+        return RandEnt.hash_files([os.path.join(self.staging_dir, rel_path)])
+
+    def commit(self) -> None:
+        """
+        Flush and close every file, then move each into place in the modlet directory.
+        """
+        for fp in self.handles.values():
+            fp.close()
+
+        for rel_path in self.handles:
+            final = self.path(rel_path)
+            staged = os.path.join(self.staging_dir, rel_path)
+            self.sizes[rel_path] = os.path.getsize(staged)
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            os.replace(staged, final)
+
+        self.handles = {}
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+    def abort(self) -> None:
+        """
+        Discard everything written so far, leaving the modlet directory untouched.
+        """
+        for fp in self.handles.values():
+            fp.close()
+        self.handles = {}
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+################################################################################
+# Begin Run Profile
+################################################################################
+
+
+class RunProfile(object):
+    """
+    Wall time, CPU time and peak memory of each phase of a run, enabled with --profile.
+
+    CPU time includes worker processes reaped during the phase.  Peak memory is traced by tracemalloc in the main
+    process only, which slows the run down noticeably; max RSS is the high-water mark of the whole process so far.
+    """
+
+    def __init__(self, enabled: bool = False, cprofile: bool = False):
+        """
+        :param enabled: record phases; if False, phase() does nothing
+        :param cprofile: also run the cProfile profiler over every phase
+        """
+        self.enabled = enabled or cprofile
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.profiler = cProfile.Profile() if cprofile else None
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Record one phase of the run.
+
+        :param name: phase name
+        """
+        if not self.enabled:
+            yield
+            return
+
+        tracemalloc.reset_peak()
+        cpu = os.times()
+        wall = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+        try:
+            yield
+        finally:
+            if self.profiler is not None:
+                self.profiler.disable()
+            wall = time.perf_counter() - wall
+            done = os.times()
+            self.phases[name] = {
+                'wall_s': round(wall, 4),
+                'cpu_s': round(sum(done[:4]) - sum(cpu[:4]), 4),
+                'peak_traced_mb': round(tracemalloc.get_traced_memory()[1] / 1048576.0, 2),
+                'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+            }
+            logger.info(f"## Phase {name}: {wall:.3f}s wall, {self.phases[name]['cpu_s']:.3f}s CPU, "
+                        f"{self.phases[name]['peak_traced_mb']:.1f} MB peak")
+
+    def write(self, engine: 'RandEnt', target_dir: str) -> None:
+        """
+        Write profile.json (and profile.pstats, with cProfile) for a finished run.
+
+        :param engine: engine of the run
+        :param target_dir: folder to write into
+        """
+        report = {
+            'options': engine.cmd.strip(),
+            'seed': engine.seed,
+            'jobs': engine.jobs,
+            'game_data_cached': engine.game_data_cached,
+            'bases_reused': engine.bases_reused,
+            'variants': len(engine.variant_table),
+            'phases': self.phases,
+            'counters': dict(engine.counters, extends_chain_dives=engine.inheritance_cache_dives,
+                             inheritance_cache_hits=engine.inheritance_cache_hits),
+            'bytes_written': dict(engine.writer.sizes) if engine.writer is not None else {},
+        }
+        if engine.delta_xml:
+            report['delta_xml'] = dict(engine.delta_totals)
+        os.makedirs(target_dir, exist_ok=True)
+        path = os.path.join(target_dir, 'profile.json')
+        with open(path, 'w') as fp:
+            json.dump(report, fp, indent=2)
+            fp.write("\n")
+        logger.info(f"Profile written to: {path}")
+
+        if self.profiler is not None:
+            path = os.path.join(target_dir, 'profile.pstats')
+            self.profiler.dump_stats(path)
+            logger.info(f"cProfile statistics written to: {path}")
 
 
 ################################################################################
@@ -52,11 +979,17 @@ class RandEnt(object):
     ENTITYCLASSES_DOM: ET.Element = None  # inventory of entity classes
     ENTITYGROUPS_DOM: ET.Element = None  # inventory of entity groups
 
-    ENTITY_INVENTORY = {}
+    ENTITY_INVENTORY = {}  # name => first entity_class node of that name, in document order
+    ENTITY_ORDER = []  # entity_class names in document order
+    RESOLVED_PROPERTIES = {}  # entity name => {property name: (node, supplying entity name)}, built on demand
+    ENTITY_CHILD_XML = {}  # entity class node (or child) => serialized XML of its children, built on demand
 
+    ENTITY_GRAPH: EntityGraph = None  # inheritance graph of the entity classes
     ENTITY_TYPE_LOOKUP = {}
     TYPE_ENTITY_LOOKUP = {}
 
+    CONFIG_PLANS = {}  # (entity config key, base entity name) => tuple of PlanStep, compiled on demand
+
     TOTAL_ZED_ENTITIES_FOUND = 0
     TOTAL_HOSTILE_ANIMAL_ENTITIES_FOUND = 0
     TOTAL_FRIENDLY_ANIMAL_ENTITIES_FOUND = 0
@@ -65,11 +998,20 @@ class RandEnt(object):
     TOTAL_HOSTILE_ANIMAL_ENTITIES_GENERATED = 0
     TOTAL_FRIENDLY_ANIMAL_ENTITIES_GENERATED = 0
 
-    ENTITY_GROUP_LOOKUP = {}
-    NEW_ENTITIES = {}  # name => xml_node
+    OVERLAY_DOMS = {}  # game file name => document with the installed modlets applied, when not cached
+    ENTITY_GROUP_INDEX = {}  # base entity name => [(group name, (xml before name, xml after name))]
+    ENTITY_GROUP_LOOKUP = {}  # group name => [(escaped variant name, (xml before name, xml after name))]
+    NEW_ENTITIES = {}  # name => {'zed_is_from': base entity name, 'zed_record': VariantRecord}
 
     WalkTypeCrawlLimiter = {}  # key = zed class. val = int of crawler randomizations done
 
+    # entity config key => (entity type, library attribute, TOTAL_*_FOUND/_GENERATED prefix); see modlet_stream()
+    CATEGORIES = {
+        'ConfigEntityZombie': ('EntityZombie', 'zed_library', 'TOTAL_ZED_ENTITIES'),
+        'ConfigEntityEnemyAnimal': ('EntityEnemyAnimal', 'hostile_animal_library', 'TOTAL_HOSTILE_ANIMAL_ENTITIES'),
+        'ConfigEntityFriendlyAnimal': ('EntityAnimalStag', 'timid_animal_library', 'TOTAL_FRIENDLY_ANIMAL_ENTITIES'),
+    }
+
     def __init__(self, args: argparse.Namespace):
         """
         Initialize the generator Class.
@@ -150,6 +1092,14 @@ class RandEnt(object):
 
         self.rand = random.Random()
 
+        # every variant draws from its own stream derived from the run seed; see variant_rng()
+        self.seed = args.seed if args.seed is not None else self.rand.getrandbits(64)
+        if args.seed is not None:
+            self.cmd += f"--seed {self.seed} "
+
+        self.args = args
+        self.jobs = max(int(args.jobs), 1)
+
         # numberings for variants
         self.entity_name_count = {}
 
@@ -157,22 +1107,87 @@ class RandEnt(object):
         self.hostile_animal_library = {}
         self.timid_animal_library = {}
 
+        self.write_buffer = args.write_buffer
+        self.writer: Optional[ModletWriter] = None
+
+        # preprocessed game data cache folder; None when disabled
+        self.cache_dir = None if args.no_cache else os.path.join(self.repository, args.cache_dir)
+        self.game_data_key = ""
+        self.game_data_cached = False  # True if game data came from the cache
+
+        # incremental regeneration: manifest entries of this build and of the previous one, by base entity
+        self.incremental = not args.rebuild
+        self.manifest: Dict[str, Dict] = {}
+        self.previous_build: Dict[str, Dict] = {}
+        self.previous_entities_xml = ""  # entityclasses.xml of the previous build, which its manifest points into
+        self.script_digest = ""
+        self.bases_reused = 0
+        self.entities_xml_length = 0  # characters written to entityclasses.xml so far
+
         self.entities_xml_file = ""
         self.entitygroups_xml_file = ""
 
-        self.biggest = {}
-        self.raging_stag_count = 0
-        self.altered_ai_count = 0
-        self.freak_count = 0
+        self.variant_table = VariantTable()  # statistics of the generated variants
+        self.stats_csv = args.stats_csv
+
+        # localized display names of the variants, from the game's Localization.txt
+        self.localization = int(self.CONFIGS.get('enable_localization', 0)) == 1
+
+        # extends-chain lookups answered from RESOLVED_PROPERTIES vs. chains actually walked
+        self.inheritance_cache_hits = 0
+        self.inheritance_cache_dives = 0
+        self.counters = dict.fromkeys(PROFILE_COUNTERS, 0)  # hot-path counters, see PROFILE_COUNTERS
 
         self.research = args.research
         if self.research:
             self.cmd += "--research "
 
+        # minimal variants extending their base entity; see DELTA_XML_INHERITANCE
+        self.delta_xml = args.delta_xml
+        self.verify_delta = args.verify_delta
+        if self.delta_xml:
+            self.cmd += "--delta-xml "
+        self.delta_totals = dict.fromkeys(DELTA_TOTALS, 0)
+
+        # near-duplicate variants merged into a survivor, with quantization steps per variant table column
+        self.collapse = args.collapse
+        self.collapse_tolerances = {}
+        if self.collapse:
+            self.cmd += "--collapse "
+            for name, step in self.CONFIGS.get('collapse_tolerances', {}).items():
+                if name not in VARIANT_TABLE_NUMBERS:
+                    raise RuntimeError(f"Exiting because collapse_tolerances names an unknown statistic: {name}")
+                self.collapse_tolerances[name] = float(step)
+        self.collapsed = 0
+
+        # load budget: variants per base entity, planned by plan_budget(); empty for the flat counts
+        self.max_entities = args.max_entities
+        self.max_bytes = args.max_bytes
+        if self.max_entities is not None:
+            self.cmd += f"--max-entities {self.max_entities} "
+        if self.max_bytes is not None:
+            self.cmd += f"--max-bytes {self.max_bytes} "
+        self.variant_budget: Dict[str, int] = {}
+        self.budget_plan = []  # (entity config key, base entity name, entity groups, variants, predicted bytes)
+
         self.prefix = ""
 
-        # hold info about the generation
-        self.details = {}
+        # every engine owns its tables, so that several can share a process (see --profiles)
+        self.NEW_ENTITY_FILTER_OUT_LIST = dict(NEW_ENTITY_FILTER_OUT_LIST)
+        self.FILTER_ALLOW_ONLY_LIST_FLAG = False
+        self.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST = {}
+        self.OVERLAY_DOMS = {}
+        self.RESOLVED_PROPERTIES = {}
+        self.ENTITY_CHILD_XML = {}
+        self.CONFIG_PLANS = {}
+        self.ENTITY_GROUP_LOOKUP = {}
+        self.NEW_ENTITIES = {}
+        self.WalkTypeCrawlLimiter = {}
+        self.material_samplers: Dict[str, MaterialSampler] = {}  # base entity name => its freaky materials
+        self.materials_unknown: Dict[str, bool] = {}  # base entities without freaky materials, warned about
+
+        # base entity name => (freaky material combinations used, available), see MaterialSampler
+        self.material_usage: Dict[str, Tuple[int, int]] = {}
 
     # --- Validation ------------------------------------------------------------
 
@@ -188,179 +1203,1078 @@ class RandEnt(object):
                 raise RuntimeError(f"Exiting because required argument `{label}` not found")
             check = check[item]
 
-    @staticmethod
-    def check_dir(dir_name: str, label: str = None) -> None:
+    @staticmethod
+    def check_dir(dir_name: str, label: str = None) -> None:
+        """
+        Ensure that required directory exists.
+        
+        :param dir_name: directory name
+        :param label: configuration parameter involved
+        """
+        label = "this" if label is None else label
+        if not os.path.exists(dir_name) or not os.path.isdir(dir_name):
+            raise RuntimeError(f"Exiting because {label} does not exist and/or is not a directory: {dir_name}")
+
+    @staticmethod
+    def check_file(file_name: str, label: str = None) -> None:
+        """
+        Ensure that required file exists.
+        
+        :param file_name: file name
+        :param label: configuration parameter involved
+        """
+        label = "this" if label is None else label
+        if not os.path.exists(file_name) or os.path.isdir(file_name):
+            raise RuntimeError(f"Exiting because {label} does not exist and/or is not a file: {file_name}")
+
+    # ---------------------------------------------------------------------- #
+
+    def initial_setup(self) -> None:
+        """
+        Perform preliminary setup and checking.        
+        """
+        # check game installation (origin may widely vary between windows and mac)
+        install_dir: str = self.CONFIGS.get('game_install_dir', None)
+        if install_dir is None:
+            raise RuntimeError(f"No definition for 'game_install_dir' in the supplied config file!")
+        install_dir = install_dir.replace("<username>", pwd.getpwuid(os.getuid())[0])
+
+        self.check_dir(install_dir, 'game_install_dir')
+        self.CONFIGS['game_config_dir'] = install_dir + "/Data/Config"
+        self.check_dir(self.CONFIGS['game_config_dir'], 'game_config_dir')
+        # self.CONFIGS['using_config_dir'] = self.CONFIGS['game_config_dir']
+
+        # Note: Here is where we pull the XML configs from!  A saved game dumps them with its mods applied
+        save_game = self.CONFIGS.get('use_save_game', "").replace("<username>", pwd.getpwuid(os.getuid())[0])
+        using_config_dir = self.CONFIGS['game_config_dir']
+        if save_game:
+            self.check_dir(save_game, 'use_save_game')
+            dump_dir = os.path.join(save_game, 'ConfigsDump')
+            using_config_dir = dump_dir if os.path.isdir(dump_dir) else save_game
+            logger.info(f"Using game files of the saved game: {using_config_dir}")
+        self.CONFIGS['entityclasses_file'] = using_config_dir + '/entityclasses.xml'
+        self.check_file(self.CONFIGS['entityclasses_file'], 'entityclasses_file')
+        self.CONFIGS['entitygroups_file'] = using_config_dir + '/entitygroups.xml'
+        self.check_file(self.CONFIGS['entitygroups_file'], 'entitygroups_file')
+
+        # Note: Localization file does not exist in a Saved Game! Use config dir ALWAYS!
+        self.CONFIGS['localization_file'] = self.CONFIGS['game_config_dir'] + '/Localization.txt'
+        self.check_file(self.CONFIGS['localization_file'], 'localization_file')
+
+        self.configure_modlet()
+
+        # Allow users to configure zeds to NEVER CLONE as modlets may do weird stuff if randomizing against a
+        # saved games files
+        self.check_config('ignore_entity_list')  # can be empty
+        for user_config_ignore_entity, reason in self.CONFIGS['ignore_entity_list'].items():
+            logger.info(f"Globally ignoring entity:{user_config_ignore_entity} because: {reason}")
+            self.NEW_ENTITY_FILTER_OUT_LIST[user_config_ignore_entity] = reason
+
+        # Allow users to configure zeds to ONLY CLONE, for very specific, custom randomization
+        self.check_config('only_allow_these_entities_list')  # can be empty
+        for user_config_only_allow_entity, reason in self.CONFIGS['only_allow_these_entities_list'].items():
+            logger.info(f"Globally only allowing cloning of entity:{user_config_only_allow_entity} because: {reason}")
+            self.FILTER_ALLOW_ONLY_LIST_FLAG = True  # Ease of knowing when to use these configs
+            self.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST[user_config_only_allow_entity] = reason
+
+        # Installed modlets patch the game files, unless a saved game already has them applied
+        self.OVERLAY_DOMS = {}
+        if not save_game:
+            self.load_mod_overlays()
+
+        # Get game defaults; entity groups are only needed for the group index, which may be cached
+        self.ENTITYCLASSES_DOM = self.parse_game_file('entityclasses.xml')
+        self.create_entity_inventory()
+
+        if not self.load_game_data():
+            self.ENTITYGROUPS_DOM = self.parse_game_file('entitygroups.xml')
+
+        self.load_manifest()
+
+    def modlet_name(self) -> str:
+        """
+        Name the modlet after the options that shape it.
+
+        :return: modlet folder name
+        """
+        tag = "_freaks" if self.meshes else ""
+        tag2a = "_giants" if self.giants else ""
+        tag2b = "_munchkins" if self.munchkins else ""
+        tag3 = "_HS" if self.headshot else ""
+        tag4 = "_AI" if self.altered_ai else ""
+        tag5 = "_RS" if self.raging_stag else ""
+        tag6 = "_research" if self.research else ""
+        gv = "" if self.game_version is None else f"-{self.game_version}"
+        return f"{self.CONFIGS['modlet_name_prefix']}{tag}{tag2a}{tag2b}{tag3}{tag4}{tag5}{tag6}{gv}"
+
+    def configure_modlet(self) -> None:
+        """
+        Settle the parts of the configuration that come from the command line rather than the game files.
+        """
+        # This is used to name the created modlet
+        self.CONFIGS['modlet_name'] = self.modlet_name()
+        self.CONFIGS['modlet_gen_dir'] = self.repository + '/' + self.CONFIGS['modlet_name']
+
+        # NOTE: Change from original, loops now controlled via command line
+        self.CONFIGS['ConfigEntityZombie']['num_generation_loops'] = self.zcount
+        self.CONFIGS['ConfigEntityFriendlyAnimal']['num_generation_loops'] = self.fcount
+        self.CONFIGS['ConfigEntityEnemyAnimal']['num_generation_loops'] = self.ecount
+
+        # Make sure we don't have so many crawlers
+        self.check_config('ConfigEntityZombie.enable_walktype_crawler_limit')
+
+        # modlet internal name override with --prefix
+        self.check_config('unique_entity_prefix')
+        self.prefix = self.CONFIGS['unique_entity_prefix']
+
+    # --- Mod Overlays ----------------------------------------------------------
+
+    def overlay_mods(self) -> List[str]:
+        """
+        Find the modlets to overlay on the game files, in the order the game loads them (by folder name).  Earlier
+        builds of this modlet are left out, so variants are never made of variants.
+
+        :return: modlet folders
+        """
+        mods_dir = self.CONFIGS.get('mods_dir', "").replace("<username>", pwd.getpwuid(os.getuid())[0])
+        if not mods_dir:
+            return []
+        self.check_dir(mods_dir, 'mods_dir')
+
+        mods = []
+        for name in sorted(os.listdir(mods_dir), key=str.lower):
+            path = os.path.join(mods_dir, name)
+            if not os.path.isdir(os.path.join(path, 'Config')):
+                continue
+            if name.startswith(self.CONFIGS['modlet_name_prefix']):
+                logger.info(f"Not overlaying generated modlet: {name}")
+                continue
+            mods.append(path)
+        return mods
+
+    @staticmethod
+    def split_xpath(xpath: str) -> Tuple[List[str], Optional[str]]:
+        """
+        Split a patch XPath into its location steps, outside of any predicate, and a trailing attribute step.
+
+        :param xpath: XPath of a patch
+        :return: Tuple of (steps, attribute name or None)
+        """
+        steps, depth, quote, start = [], 0, None, 0
+        for i, char in enumerate(xpath):
+            if quote is not None:
+                quote = None if char == quote else quote
+            elif char in "'\"":
+                quote = char
+            elif char == '[':
+                depth += 1
+            elif char == ']':
+                depth -= 1
+            elif char == '/' and depth == 0:
+                steps.append(xpath[start:i])
+                start = i + 1
+        steps.append(xpath[start:])
+        attribute = None
+        if steps[-1].startswith('@'):
+            attribute = steps.pop()[1:]
+        return steps, attribute
+
+    def select_xpath(self, root: ET.Element, xpath: str) -> Tuple[List[ET.Element], Optional[str]]:
+        """
+        Select the targets of a patch.  Absolute paths are resolved against the document root and handed to
+        ElementTree, which covers the predicates mods commonly use ([@a='v'], [tag], [n]); others are rejected
+        with SyntaxError.
+
+        :param root: document root
+        :param xpath: XPath of a patch
+        :return: Tuple of (matched elements, attribute name or None)
+        """
+        steps, attribute = self.split_xpath(xpath.strip())
+        if len(steps) > 2 and steps[0] == "" and steps[1] == "":  # //descendant
+            path = ".//" + "/".join(steps[2:])
+        elif len(steps) > 1 and steps[0] == "":  # /root/...
+            root_step = steps[1]
+            if root_step != root.tag and root_step != '*':
+                return [], attribute
+            if len(steps) == 2:
+                return [root], attribute
+            path = "./" + "/".join(steps[2:])
+        else:
+            path = "/".join(steps)
+        self.counters['findall'] += 1
+        return root.findall(path), attribute
+
+    @staticmethod
+    def map_parents(parents: Dict[ET.Element, ET.Element], parent: ET.Element, children: List[ET.Element]) -> None:
+        """
+        Record the parent of some nodes, and of every node below them, in a parent map.
+
+        :param parents: node => parent node, updated
+        :param parent: node the children belong to
+        :param children: child nodes
+        """
+        for child in children:
+            parents[child] = parent
+            for node in child.iter():
+                for grandchild in node:
+                    parents[grandchild] = node
+
+    def apply_patch(self, root: ET.Element, patch: ET.Element, parents: Dict[ET.Element, ET.Element]) -> bool:
+        """
+        Apply one XPath patch of a modlet to a game file: append, set, remove, insertAfter, insertBefore,
+        setattribute or removeattribute.
+
+        :param root: document root of the game file
+        :param patch: patch node
+        :param parents: node => parent node of the game file, built once per file and kept up to date here
+        :return: True if it matched anything
+        """
+        xpath = patch.attrib.get('xpath', None)
+        if xpath is None:
+            raise SyntaxError("no xpath")
+        targets, attribute = self.select_xpath(root, xpath)
+        text = (patch.text or "").strip()
+
+        for target in targets:
+            if patch.tag == 'append' and attribute is not None:
+                target.set(attribute, target.attrib.get(attribute, "") + text)
+            elif patch.tag == 'append':
+                children = [copy.deepcopy(child) for child in patch]
+                target.extend(children)
+                self.map_parents(parents, target, children)
+            elif patch.tag == 'set' and attribute is not None:
+                target.set(attribute, text)
+            elif patch.tag == 'set':
+                target.text = text
+            elif patch.tag in ('remove', 'removeattribute') and attribute is not None:
+                target.attrib.pop(attribute, None)
+            elif patch.tag == 'remove' and target in parents:
+                parents.pop(target).remove(target)
+            elif patch.tag == 'setattribute':
+                target.set(patch.attrib['name'], text)
+            elif patch.tag in ('insertAfter', 'insertBefore') and target in parents:
+                parent = parents[target]
+                index = list(parent).index(target) + (1 if patch.tag == 'insertAfter' else 0)
+                children = [copy.deepcopy(child) for child in patch]
+                parent[index:index] = children
+                self.map_parents(parents, parent, children)
+            else:
+                raise SyntaxError(f"cannot {patch.tag} {xpath}")
+        return len(targets) > 0
+
+    @staticmethod
+    def parse_mod_patches(mods: List[str], file_names: Tuple[str, ...]) -> List[Tuple[str, Dict[str, ET.Element]]]:
+        """
+        Parse the patch files of every modlet.  As in the game, a modlet with a file that cannot be read is
+        skipped (as a whole here, so that none of its patches apply without the others).
+
+        :param mods: modlet folders, in load order
+        :param file_names: game file names, e.g. entityclasses.xml
+        :return: list of (modlet folder, {game file name: patch document root}), in load order
+        """
+        patches = []
+        for mod in mods:
+            roots = {}
+            try:
+                for file_name in file_names:
+                    path = os.path.join(mod, 'Config', file_name)
+                    if os.path.exists(path):
+                        roots[file_name] = ET.parse(path).getroot()
+            except (ET.ParseError, OSError) as e:
+                logger.warning(f"Skipping modlet {os.path.basename(mod)}: cannot read {path}: {e}")
+                continue
+            patches.append((mod, roots))
+        return patches
+
+    def overlay_game_file(self, file_name: str, patches: List[Tuple[str, Dict[str, ET.Element]]]) -> ET.Element:
+        """
+        Apply the patches of every modlet, in load order, to one game file.
+
+        :param file_name: game file name, e.g. entityclasses.xml
+        :param patches: parsed patch files of the modlets, see parse_mod_patches()
+        :return: document root, patched
+        """
+        root = ET.parse(self.CONFIGS[file_name.replace('.xml', '_file')]).getroot()
+        parents = {child: parent for parent in root.iter() for child in parent}
+        for mod, roots in patches:
+            if file_name not in roots:
+                continue
+            applied, unmatched = 0, 0
+            for patch in roots[file_name]:
+                if not isinstance(patch.tag, str):  # comments
+                    continue
+                try:
+                    if self.apply_patch(root, patch, parents):
+                        applied += 1
+                    else:
+                        unmatched += 1
+                        logger.debug(f"{os.path.basename(mod)}: {patch.tag} {patch.attrib.get('xpath', '')} "
+                                     f"matched nothing")
+                except (SyntaxError, KeyError) as e:
+                    logger.warning(f"{os.path.basename(mod)}: skipping unsupported patch <{patch.tag}> in "
+                                   f"{file_name}: {e}")
+            logger.info(f"Overlaid {os.path.basename(mod)}/Config/{file_name}: {applied} patches applied, "
+                        f"{unmatched} matched nothing")
+        return root
+
+    def load_mod_overlays(self) -> None:
+        """
+        Overlay the installed modlets (config `mods_dir`) on entityclasses.xml and entitygroups.xml, so variants
+        are made of the entities as the game will see them.  The merged files are cached, keyed by the hashes of
+        the game files, every patch file and this script, and then stand in for the game files; with --no-cache
+        the merged documents are only kept in memory.
+        """
+        mods = self.overlay_mods()
+        if not mods:
+            return
+
+        file_names = ('entityclasses.xml', 'entitygroups.xml')
+        patch_files = [os.path.join(mod, 'Config', file_name) for mod in mods for file_name in file_names]
+        patch_files = [path for path in patch_files if os.path.exists(path)]
+        key = self.hash_files([os.path.abspath(__file__)] +
+                              [self.CONFIGS[name.replace('.xml', '_file')] for name in file_names] + patch_files)
+        key = hashlib.sha256(repr([key] + patch_files).encode('utf-8')).hexdigest()
+        cached = {} if self.cache_dir is None else \
+            {name: os.path.join(self.cache_dir, f"overlay-{key[:32]}-{name}") for name in file_names}
+        if cached and all(os.path.exists(path) for path in cached.values()):
+            logger.info(f"Using cached overlay of {len(mods)} modlets")
+        else:
+            logger.info(f"Overlaying {len(mods)} modlets on the game files")
+            patches = self.parse_mod_patches(mods, file_names)
+            for file_name in file_names:
+                root = self.overlay_game_file(file_name, patches)
+                if not cached:
+                    self.OVERLAY_DOMS[file_name] = root
+                    continue
+                os.makedirs(self.cache_dir, exist_ok=True)
+                fd, staging = tempfile.mkstemp(prefix=".overlay-", dir=self.cache_dir)
+                with os.fdopen(fd, 'wb') as fp:
+                    ET.ElementTree(root).write(fp, encoding='utf-8', xml_declaration=True)
+                os.replace(staging, cached[file_name])
+        for file_name, path in cached.items():
+            self.CONFIGS[file_name.replace('.xml', '_file')] = path
+
+    def parse_game_file(self, file_name: str) -> ET.Element:
+        """
+        Parse a game file, or take its overlaid document.  Only the entity classes that can be needed are kept of
+        entityclasses.xml.
+
+        :param file_name: game file name, e.g. entityclasses.xml
+        :return: document root
+        """
+        if file_name in self.OVERLAY_DOMS:
+            return self.OVERLAY_DOMS[file_name]
+        if file_name == 'entityclasses.xml':
+            return self.parse_entity_classes(self.CONFIGS['entityclasses_file'])
+        return ET.parse(self.CONFIGS[file_name.replace('.xml', '_file')]).getroot()
+
+    def parse_entity_classes(self, path: str) -> ET.Element:
+        """
+        Parse entityclasses.xml keeping only the entity classes that can be needed: the zombie and animal families
+        (less those ignored or not allowed by the config), the AI donors, and every class these extend.  Classes
+        of other types are left out while parsing (see EntityClassLoader), untyped ones once the whole file is
+        read.  Should a class that was left out turn out to be needed (a kept class extends it, with a type of its
+        own), the file is parsed whole instead.
+
+        :param path: entityclasses.xml file
+        :return: document root
+        """
+        categories = {entity_type: the_key for the_key, (entity_type, _, _) in self.CATEGORIES.items()}
+        loader = EntityClassLoader(categories)
+        parser = ET.XMLParser(target=loader)
+        with open(path, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(1 << 20), b""):
+                parser.feed(chunk)
+        root = parser.close()
+
+        def wanted(name: str) -> bool:
+            the_key = categories.get(loader.entity_type(name), None)
+            if the_key is None or name in self.NEW_ENTITY_FILTER_OUT_LIST or \
+                    name in self.CONFIGS[the_key]['ignore_entity_list']:
+                return False
+            return not self.FILTER_ALLOW_ONLY_LIST_FLAG or name in self.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST
+
+        needed = {}
+        for name in [name for name in loader.parents if wanted(name)] + [ai[0] for ai in self.AI_LIST]:
+            while name in loader.parents and name not in needed:
+                needed[name] = True
+                name = loader.parents[name]
+        lost = sorted(name for name in needed if name in loader.dropped)
+        if lost:
+            logger.warning(f"Entity classes {', '.join(lost)} were left out while loading, but are needed; "
+                           f"parsing {path} whole")
+            return ET.parse(path).getroot()
+
+        for element in list(root):
+            name = element.attrib.get('name', None)
+            if element.tag == 'entity_class' and name in loader.parents and name not in needed:
+                root.remove(element)
+                loader.dropped[name] = True
+        logger.info(f"Loaded {len(loader.parents) - len(loader.dropped)} of {len(loader.parents)} entity classes "
+                    f"from {path}")
+        return root
+
+    # --- Game Data Cache -------------------------------------------------------
+
+    def game_data_cache_path(self) -> str:
+        """
+        Get the cache file for the current game files and version of this script, which are hashed by content so
+        the cache invalidates itself when either changes.  The entity classes kept of entityclasses.xml depend on
+        the ignore and allow-only lists too, so their names go into the key as well: configs that prune differently
+        each get their own cache file.
+
+        :return: cache file path
+        """
+        if not self.game_data_key:
+            key = self.hash_files([os.path.abspath(__file__), self.CONFIGS['entityclasses_file'],
+                                   self.CONFIGS['entitygroups_file']])
+            self.game_data_key = hashlib.sha256(repr([key] + self.ENTITY_ORDER).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"gamedata-{self.game_data_key[:32]}.pickle")
+
+    @staticmethod
+    def hash_files(paths: List[str]) -> str:
+        """
+        Hash the content of some files.
+
+        :param paths: files to hash, in order
+        :return: hex digest
+        """
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, 'rb') as fp:
+                for chunk in iter(lambda: fp.read(1 << 20), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def load_game_data(self) -> bool:
+        """
+        Adopt preprocessed game data from the cache: the inheritance graph, the type lookup tables and the entity
+        group index, in place of parsing entitygroups.xml and building them.
+
+        :return: True if the cache had the game data
+        """
+        if self.cache_dir is None:
+            return False
+
+        path = self.game_data_cache_path()
+        if not os.path.exists(path):
+            logger.info("No cached game data for these game files; parsing them")
+            return False
+        try:
+            with open(path, 'rb') as fp:
+                data = pickle.load(fp)
+            if data['ENTITY_ORDER'] != self.ENTITY_ORDER:
+                raise ValueError("entity classes do not match")
+            for key in GAME_DATA_CACHE_ATTRIBUTES:
+                setattr(self, key, data[key])
+            self.ENTITY_GRAPH = EntityGraph.restore(data['ENTITY_GRAPH'])
+        except Exception as e:  # damaged or foreign file; it gets rewritten
+            logger.warning(f"Ignoring unreadable game data cache {path}: {e}")
+            return False
+
+        self.game_data_cached = True
+        logger.info(f"Using cached game data: {path}")
+        return True
+
+    def save_game_data(self) -> None:
+        """
+        Save the preprocessed game data to the cache, for the next run on the same game files.
+        """
+        if self.cache_dir is None or self.game_data_cached:
+            return
+
+        data = {key: getattr(self, key) for key in GAME_DATA_CACHE_ATTRIBUTES}
+        data['ENTITY_GRAPH'] = vars(self.ENTITY_GRAPH)
+        path = self.game_data_cache_path()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, staging = tempfile.mkstemp(prefix=".gamedata-", dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as fp:
+                pickle.dump(data, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(staging, path)
+        except OSError as e:  # the cache is only a speedup
+            logger.warning(f"Could not save game data cache {path}: {e}")
+            return
+        logger.info(f"Saved preprocessed game data to: {path}")
+
+    def create_entity_inventory(self) -> None:
+        """
+        Index every entity_class by name, once, so that variant cloning and extends-chain dives do not have
+        to scan the whole DOM.  Only the first entity_class of a given name is indexed.
+        """
+        self.ENTITY_INVENTORY = {}
+        self.ENTITY_ORDER = []
+        self.RESOLVED_PROPERTIES = {}
+        self.ENTITY_CHILD_XML = {}
+        for entity in self.findall(self.ENTITYCLASSES_DOM, './/entity_class'):
+            entity_name = entity.attrib.get('name', None)
+            if entity_name is None:
+                continue
+            if entity_name in self.ENTITY_INVENTORY:
+                logger.warning(f"Duplicate entity_class `{entity_name}` found; using the first definition")
+                continue
+            self.ENTITY_INVENTORY[entity_name] = entity
+            self.ENTITY_ORDER.append(entity_name)
+
+    def create_entity_type_lookup(self) -> None:
+        """
+        Build the entity inheritance graph and, from it, the ENTITY_TYPE_LOOKUP table.
+        """
+        logger.info("\n" + '#' * 79 + "\n" + "## Populating Entity -> Type Lookup table\n" + "#" * 79 + "\n")
+
+        self.ENTITY_GRAPH = EntityGraph(self.ENTITY_INVENTORY, self.ENTITY_ORDER)
+
+        self.ENTITY_TYPE_LOOKUP = {}
+        for entity_name in self.ENTITY_ORDER:
+            entity_type = self.ENTITY_GRAPH.entity_type.get(entity_name, None)
+            if entity_type is None:
+                logger.error(f"...lookup_type_failure for entity: {entity_name}")
+                continue
+            logger.debug(f"...{entity_name} = Class:{entity_type}")
+            self.ENTITY_TYPE_LOOKUP[entity_name] = entity_type
+
+    def create_type_entity_lookup(self) -> None:
+        """
+        build the reverse lookup TYPE_ENTITY_LOOKUP.
+        """
+        logger.info('#' * 79 + "\n" + "## Populating Type -> Entity Lookup table\n" + "#" * 79 + "\n")
+
+        self.TYPE_ENTITY_LOOKUP = self.ENTITY_GRAPH.type_families()
+
+    def create_lookup_tables(self) -> None:
         """
-        Ensure that required directory exists.
-        
-        :param dir_name: directory name
-        :param label: configuration parameter involved
+        Populate the entity type lookup tables and the entity group index, and drop any compiled config plans.
+        With game data from the cache these are already in place.
         """
-        label = "this" if label is None else label
-        if not os.path.exists(dir_name) or not os.path.isdir(dir_name):
-            raise RuntimeError(f"Exiting because {label} does not exist and/or is not a directory: {dir_name}")
+        if self.game_data_cached:
+            for entity_name in self.ENTITY_GRAPH.untyped():
+                logger.error(f"...lookup_type_failure for entity: {entity_name}")
+        else:
+            self.create_entity_type_lookup()
+            self.create_type_entity_lookup()
 
-    @staticmethod
-    def check_file(file_name: str, label: str = None) -> None:
+        for key, value in self.TYPE_ENTITY_LOOKUP.items():
+            logger.debug(f"{key} => {value}")
+
+        if not self.game_data_cached:
+            self.create_entity_group_index()
+            self.save_game_data()
+        self.CONFIG_PLANS = {}
+
+    def create_entity_group_index(self) -> None:
         """
-        Ensure that required file exists.
-        
-        :param file_name: file name
-        :param label: configuration parameter involved
+        Build the reverse lookup ENTITY_GROUP_INDEX, mapping each entity to the groups it appears in.  Each group
+        entry is kept as pre-serialized XML split around the entity name, so variants only need the name spliced in.
         """
-        label = "this" if label is None else label
-        if not os.path.exists(file_name) or os.path.isdir(file_name):
-            raise RuntimeError(f"Exiting because {label} does not exist and/or is not a file: {file_name}")
+        logger.info('#' * 79 + "\n" + "## Populating Entity -> Group Lookup table\n" + "#" * 79 + "\n")
 
-    # ---------------------------------------------------------------------- #
+        self.ENTITY_GROUP_INDEX = {}
+        for entity_group in self.findall(self.ENTITYGROUPS_DOM, './/entitygroup'):
+            entity_group_name = entity_group.attrib['name']
 
-    def initial_setup(self) -> None:
+            for entity in self.findall(entity_group, './/entity'):
+                entity_name = entity.attrib.get('name', None)
+                if entity_name is None:
+                    continue
+
+                template = copy.deepcopy(entity)  # deep clone, all nodes below
+                self.counters['deepcopy'] += 1
+                template.set('name', GROUP_ENTRY_NAME_PLACEHOLDER)
+                xmlstring = ET.tostring(template, encoding='unicode')
+                head, _, tail = xmlstring.partition(GROUP_ENTRY_NAME_PLACEHOLDER)
+
+                if entity_name not in self.ENTITY_GROUP_INDEX:
+                    self.ENTITY_GROUP_INDEX[entity_name] = []
+                self.ENTITY_GROUP_INDEX[entity_name].append((entity_group_name, (head, tail)))
+
+    # --- Build Manifest --------------------------------------------------------
+
+    def load_manifest(self) -> None:
         """
-        Perform preliminary setup and checking.        
+        Read the build manifest left in the modlet directory by the previous run, along with the variant XML it
+        points into, so that base entities whose inputs did not change can be spliced instead of regenerated.
         """
-        # check game installation (origin may widely vary between windows and mac)
-        install_dir: str = self.CONFIGS.get('game_install_dir', None)
-        if install_dir is None:
-            raise RuntimeError(f"No definition for 'game_install_dir' in the supplied config file!")
-        install_dir = install_dir.replace("<username>", pwd.getpwuid(os.getuid())[0])
+        self.previous_build = {}
+        if not self.incremental:
+            return
 
-        self.check_dir(install_dir, 'game_install_dir')
-        self.CONFIGS['game_config_dir'] = install_dir + "/Data/Config"
-        self.check_dir(self.CONFIGS['game_config_dir'], 'game_config_dir')
-        # self.CONFIGS['using_config_dir'] = self.CONFIGS['game_config_dir']
+        path = os.path.join(self.CONFIGS['modlet_gen_dir'], MANIFEST_FILE)
+        if not os.path.exists(path):
+            return
+        entities_path = os.path.join(self.CONFIGS['modlet_gen_dir'], 'Config', 'entityclasses.xml')
+        try:
+            with open(path, 'r') as fp:
+                manifest = json.load(fp)
+            if manifest.get('format', None) != MANIFEST_FORMAT:
+                raise ValueError(f"unknown format {manifest.get('format', None)}")
+            if self.hash_files([entities_path]) != manifest['entityclasses_sha256']:
+                raise ValueError("entityclasses.xml was changed since it was generated")
+            with open(entities_path, 'r') as fp:
+                self.previous_entities_xml = fp.read()
+            self.previous_build = manifest['bases']
+        except Exception as e:  # damaged, foreign or hand-edited; everything gets regenerated
+            logger.warning(f"Ignoring unusable build manifest {path}: {e}")
+            self.previous_build = {}
+            return
+        logger.info(f"Using build manifest of the previous run: {path}")
 
-        # Note: Here is where we pull the XML configs from!
-        self.CONFIGS['entityclasses_file'] = self.CONFIGS['game_config_dir'] + '/entityclasses.xml'
-        self.check_file(self.CONFIGS['entityclasses_file'], 'entityclasses_file')
-        self.CONFIGS['entitygroups_file'] = self.CONFIGS['game_config_dir'] + '/entitygroups.xml'
-        self.check_file(self.CONFIGS['entitygroups_file'], 'entitygroups_file')
+    def base_inputs_hash(self, the_key: str, entity_name: str) -> str:
+        """
+        Hash everything the variants of a base entity are generated from: the resolved XML of the entity (its
+        whole extends chain), its config plan and generation settings, the output-affecting options, the seed and
+        this script.  Variants draw from per-variant random streams, so equal hashes mean equal variants.
 
-        # Note: Localization file does not exist in a Saved Game! Use config dir ALWAYS!
-        self.CONFIGS['localization_file'] = self.CONFIGS['game_config_dir'] + '/Localization.txt'
-        self.check_file(self.CONFIGS['localization_file'], 'localization_file')
+        :param the_key: entity config key
+        :param entity_name: base entity name
+        :return: hex digest
+        """
+        if not self.script_digest:
+            self.script_digest = self.hash_files([os.path.abspath(__file__)])
+
+        digest = hashlib.sha256()
+        settings = [
+            MANIFEST_FORMAT, self.script_digest, self.cmd, self.seed, self.prefix, the_key,
+            self.variant_count(the_key, entity_name), self.CONFIGS[the_key]['disable_randomizer'],
+            self.CONFIGS['ConfigEntityZombie']['enable_walktype_crawler_limit'],
+            self.NEW_ENTITY_FILTER_OUT_LIST.get(entity_name, None), self.FILTER_ALLOW_ONLY_LIST_FLAG,
+            entity_name in self.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST, self.config_plan(the_key, entity_name),
+            sorted(self.collapse_tolerances.items()),
+        ]
+        digest.update(repr(settings).encode('utf-8'))
 
-        # This is used to name the created modlet
-        tag = "_freaks" if self.meshes else ""
-        tag2a = "_giants" if self.giants else ""
-        tag2b = "_munchkins" if self.munchkins else ""
-        tag3 = "_HS" if self.headshot else ""
-        tag4 = "_AI" if self.altered_ai else ""
-        tag5 = "_RS" if self.raging_stag else ""
-        tag6 = "_research" if self.research else ""
-        gv = "" if self.game_version is None else f"-{self.game_version}"
-        self.CONFIGS['modlet_name'] = (
-            f"{self.CONFIGS['modlet_name_prefix']}{tag}{tag2a}{tag2b}{tag3}{tag4}{tag5}{tag6}"
-            f"{gv}")
-        self.CONFIGS['modlet_gen_dir'] = self.repository + '/' + self.CONFIGS['modlet_name']
+        sources = [entity_name]
+        if self.raging_stag and the_key == 'ConfigEntityFriendlyAnimal':
+            sources += [ai[0] for ai in self.AI_LIST]  # raging stags take their aggro from the AI donors
+        for source in sources:
+            if source not in self.ENTITY_INVENTORY:
+                continue
+            for name in [source] + self.ENTITY_GRAPH.ancestors(source):
+                digest.update(ET.tostring(self.ENTITY_INVENTORY[name], encoding='utf-8'))
+        return digest.hexdigest()
 
-        # NOTE: Change from original, loops now controlled via command line
-        self.CONFIGS['ConfigEntityZombie']['num_generation_loops'] = self.zcount
-        self.CONFIGS['ConfigEntityFriendlyAnimal']['num_generation_loops'] = self.fcount
-        self.CONFIGS['ConfigEntityEnemyAnimal']['num_generation_loops'] = self.ecount
+    def record_base_build(self, entity_name: str, attempted: bool, generated: int, first_row: int) -> None:
+        """
+        Record a freshly generated base entity in the manifest, with the statistics of its variants.
 
-        # Make sure we don't have so many crawlers
-        self.check_config('ConfigEntityZombie.enable_walktype_crawler_limit')
+        :param entity_name: base entity name
+        :param attempted: True if variants were attempted
+        :param generated: number of variants generated
+        :param first_row: first row of its variants in the variant table
+        """
+        self.manifest[entity_name].update(attempted=attempted, generated=generated,
+                                          rows=(first_row, len(self.variant_table)))
+        sampler = self.material_samplers.pop(entity_name, None)
+        if sampler is not None:
+            self.material_usage[entity_name] = (sampler.drawn, sampler.space)
+            self.manifest[entity_name]['materials'] = self.material_usage[entity_name]
+
+    def splice_base_entity(self, entity_name: str) -> Tuple[bool, int]:
+        """
+        Take the variants of a base entity from the previous build, as written then, along with their statistics.
 
-        # modlet internal name override with --prefix
-        self.check_config('unique_entity_prefix')
-        self.prefix = self.CONFIGS['unique_entity_prefix']
+        :param entity_name: base entity name
+        :return: Tuple of (variants attempted, number of variants generated)
+        """
+        previous = self.previous_build[entity_name]
+        weights = previous.get('weights', {})
+        for name, (start, end) in previous['variants'].items():
+            self.NEW_ENTITIES[name] = {'zed_is_from': entity_name,
+                                       'zed_record': SerializedRecord(entity_name, name,
+                                                                      self.previous_entities_xml[start:end]),
+                                       'zed_weight': weights.get(name, 1)}
+        self.collapsed += sum(weight - 1 for weight in weights.values())
+
+        first_row = len(self.variant_table)
+        self.variant_table.extend(previous['rows'])
+
+        self.manifest[entity_name] = {key: previous[key] for key in ('key', 'inputs', 'attempted', 'generated')}
+        self.manifest[entity_name].update(rows=(first_row, len(self.variant_table)), variants={})
+        if 'materials' in previous:
+            self.material_usage[entity_name] = tuple(previous['materials'])
+            self.manifest[entity_name]['materials'] = previous['materials']
+        self.bases_reused += 1
+        return previous['attempted'], previous['generated']
+
+    # --- Delta XML -------------------------------------------------------------
 
-        # Allow users to configure zeds to NEVER CLONE as modlets may do weird stuff if randomizing against a
-        # saved games files
-        self.check_config('ignore_entity_list')  # can be empty
-        for user_config_ignore_entity, reason in self.CONFIGS['ignore_entity_list'].items():
-            logger.info(f"Globally ignoring entity:{user_config_ignore_entity} because: {reason}")
-            NEW_ENTITY_FILTER_OUT_LIST[user_config_ignore_entity] = reason
+    @staticmethod
+    def canonical_element(element: ET.Element) -> Tuple:
+        """
+        Reduce an element to what the game reads from it, ignoring the whitespace between elements.
 
-        # Allow users to configure zeds to ONLY CLONE, for very specific, custom randomization
-        self.check_config('only_allow_these_entities_list')  # can be empty
-        for user_config_only_allow_entity, reason in self.CONFIGS['only_allow_these_entities_list'].items():
-            logger.info(f"Globally only allowing cloning of entity:{user_config_only_allow_entity} because: {reason}")
-            self.FILTER_ALLOW_ONLY_LIST_FLAG = True  # Ease of knowing when to use these configs
-            self.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST[user_config_only_allow_entity] = reason
+        :param element: XML node
+        :return: nested tuple of (tag, attributes, text, children)
+        """
+        return (element.tag, tuple(element.attrib.items()), (element.text or "").strip(),
+                tuple(RandEnt.canonical_element(child) for child in element))
 
-        # Get game defaults
-        self.ENTITYCLASSES_DOM = ET.parse(self.CONFIGS['entityclasses_file']).getroot()
-        self.ENTITYGROUPS_DOM = ET.parse(self.CONFIGS['entitygroups_file']).getroot()
+    @staticmethod
+    def delta_key(element: ET.Element) -> Tuple[str, str]:
+        """
+        Get what a child of an entity class is inherited by, as described by DELTA_XML_INHERITANCE: a plain
+        property by its name, anything else (effect groups, drops, class properties ...) by its kind.
 
-    def create_entity_type_lookup(self) -> bool:
+        :param element: child node of an entity class
+        :return: Tuple of ('property', name) or ('block', tag and class)
         """
-        Loop through Entities, and create the ENTITY_TYPE_LOOKUP table
-        
-        :return: True if there were lookup failures
+        if element.tag == 'property' and 'class' not in element.attrib and len(element) == 0:
+            return 'property', element.attrib.get('name', "")
+        return 'block', f"{element.tag}:{element.attrib.get('class', '')}"
+
+    def resolve_delta_entity(self, entity: ET.Element, extends: Optional[str]) -> Tuple:
         """
-        logger.info("\n" + '#' * 79 + "\n" + "## Populating Entity -> Type Lookup table\n" + "#" * 79 + "\n")
-        lookup_type_failures = False
+        Resolve an entity class against the classes it extends, as described by DELTA_XML_INHERITANCE.
 
-        for entity in self.ENTITYCLASSES_DOM.findall('entity_class'):
-            entity_name = entity.attrib['name']
-            logger.debug(f"Found entity Name: {entity_name}")
+        :param entity: entity class node
+        :param extends: name of the class it extends, if any
+        :return: Tuple of (attributes other than extends, property name => node, block kind => nodes)
+        """
+        chain = [entity]
+        if extends is not None and extends in self.ENTITY_INVENTORY:
+            chain += [self.ENTITY_INVENTORY[name] for name in [extends] + self.ENTITY_GRAPH.ancestors(extends)]
+
+        properties, blocks = {}, {}
+        for node in chain:
+            own_blocks = {}
+            for child in node:
+                kind, key = self.delta_key(child)
+                if kind == 'property':
+                    if key not in properties:
+                        properties[key] = self.canonical_element(child)
+                else:
+                    own_blocks.setdefault(key, []).append(self.canonical_element(child))
+            for key, children in own_blocks.items():
+                blocks.setdefault(key, children)
+        attributes = {key: value for key, value in entity.attrib.items() if key != 'extends'}
+        return attributes, properties, blocks
 
-            self.ENTITY_INVENTORY[entity_name] = entity
+    def delta_element(self, entity_name: str, variant: ET.Element) -> Optional[ET.Element]:
+        """
+        Reduce a generated variant to a minimal entity class extending its base entity: only the properties, and
+        the effect groups, drops etc., that differ from the base are kept.
 
-            # First, see what type it is
-            found_type = False
-
-            # See if the entity is an extended type, and we know about the extended type
-            # Note: this is more common? so check it first
-            entity_extends_name = entity.attrib.get('extends', None)
-            if entity_extends_name is not None:
-                logger.debug(f"...{entity_name} EXTENDS: {entity_extends_name}")
-                if entity_extends_name in self.ENTITY_TYPE_LOOKUP:
-                    found_type = True
-                    extends_type_name = self.ENTITY_TYPE_LOOKUP[entity_extends_name]
-                    self.ENTITY_TYPE_LOOKUP[entity_name] = extends_type_name
-                else:
-                    logger.error(f"...Lookup for {entity_name} failed")
-
-            if not found_type:  # See if the entity is a specific class (could be)
-                for prop in entity.findall('property'):
-                    if prop.attrib.get('name', None) == "Class":
-                        value = prop.attrib.get('value', None)
-                        found_type = True
-                        logger.debug(f"...{entity_name} = Class:{value}")
-                        self.ENTITY_TYPE_LOOKUP[entity_name] = value
-
-            if not found_type:
-                lookup_type_failures = True
-                logger.error(f"...lookup_type_failure for entity: {entity_name}")
+        :param entity_name: base entity name
+        :param variant: fully generated variant
+        :return: delta node, or None if the variant drops something it would then inherit back, or has a property
+            name more than once (which entity class wins is not settled by DELTA_XML_INHERITANCE)
+        """
+        base = self.ENTITY_INVENTORY[entity_name]
+        base_properties, base_blocks = {}, {}
+        for child in base:
+            kind, key = self.delta_key(child)
+            if kind == 'property':
+                if key in base_properties:
+                    return None
+                base_properties[key] = child
+            else:
+                base_blocks.setdefault(key, []).append(self.canonical_element(child))
+
+        variant_properties, variant_blocks = {}, {}
+        for child in variant:
+            kind, key = self.delta_key(child)
+            if kind == 'property':
+                if key in variant_properties:
+                    return None
+                variant_properties[key] = child
+            else:
+                variant_blocks.setdefault(key, []).append(self.canonical_element(child))
+        if any(key not in variant_properties for key in base_properties) or \
+                any(key not in variant_blocks for key in base_blocks):
+            return None
+
+        delta = ET.Element(variant.tag, dict(variant.attrib))
+        delta.set('extends', entity_name)
+        delta.text = variant.text
+        delta.tail = variant.tail
+        for child in variant:
+            kind, key = self.delta_key(child)
+            if kind == 'property':
+                if key in base_properties and \
+                        self.canonical_element(child) == self.canonical_element(base_properties[key]):
+                    continue
+            elif variant_blocks[key] == base_blocks.get(key, None):
+                continue
+            delta.append(child)
+        if len(delta):
+            delta[-1].tail = variant[-1].tail
+        else:
+            delta.text = None
+        return delta
 
-        return lookup_type_failures
+    def delta_record(self, entity_name: str, variant: ET.Element) -> SerializedRecord:
+        """
+        Serialize a generated variant in delta form (--delta-xml), counting the reduction against the full form.
+        A variant that cannot be expressed as a delta is written in full.
 
-    def create_type_entity_lookup(self) -> None:
+        :param entity_name: base entity name
+        :param variant: fully generated variant
+        :return: variant record
         """
-        build the reverse lookup TYPE_ENTITY_LOOKUP.
+        full_xml = ET.tostring(variant, encoding='unicode')
+        delta = self.delta_element(entity_name, variant)
+        totals = self.delta_totals
+        totals['variants'] += 1
+        totals['full_elements'] += sum(1 for _ in variant.iter())
+        totals['full_bytes'] += len(full_xml.encode('utf-8'))
+        if delta is None:
+            totals['written_full'] += 1
+            delta, xml = variant, full_xml
+        else:
+            if self.verify_delta and self.resolve_delta_entity(variant, variant.attrib.get('extends', None)) != \
+                    self.resolve_delta_entity(delta, entity_name):
+                raise RuntimeError(f"Exiting because the delta XML of {variant.attrib['name']} does not resolve to "
+                                   f"the same entity as its full XML")
+            xml = ET.tostring(delta, encoding='unicode')
+        totals['delta_elements'] += sum(1 for _ in delta.iter())
+        totals['delta_bytes'] += len(xml.encode('utf-8'))
+        return SerializedRecord(entity_name, variant.attrib['name'], xml)
+
+    def delta_summary(self) -> str:
         """
-        logger.info('#' * 79 + "\n" + "## Populating Type -> Entity Lookup table\n" + "#" * 79 + "\n")
+        Describe the reduction achieved by --delta-xml over the variants generated in this run.
 
-        # build the reverse lookup %TYPE_ENTITY_LOOKUP
-        for entity_type_lookup_key, value in self.ENTITY_TYPE_LOOKUP.items():
-            logger.debug(f"{entity_type_lookup_key} -> {value}")
+        :return: summary line
+        """
+        totals = self.delta_totals
+        elements = 100.0 * (1.0 - totals['delta_elements'] / max(totals['full_elements'], 1))
+        size = 100.0 * (1.0 - totals['delta_bytes'] / max(totals['full_bytes'], 1))
+        return (f"{totals['delta_elements']} of {totals['full_elements']} elements ({elements:.1f}% fewer), "
+                f"{totals['delta_bytes']} of {totals['full_bytes']} bytes ({size:.1f}% fewer); "
+                f"{totals['written_full']} of {totals['variants']} variants written in full")
 
-            if value not in self.TYPE_ENTITY_LOOKUP:
-                self.TYPE_ENTITY_LOOKUP[value] = []
+    # --- Near-Duplicate Collapsing ---------------------------------------------
 
-            self.TYPE_ENTITY_LOOKUP[value].append(entity_type_lookup_key)
+    def collapse_signature(self, row: Dict) -> Tuple:
+        """
+        Quantize the statistics of a variant with the collapse tolerances: variants of a base entity with equal
+        signatures are near-duplicates.  A numeric column with no (or a zero) tolerance must match exactly, as
+        must the AI, bite, materials and flags.
 
-    def create_lookup_tables(self) -> None:
+        :param row: variant table row, from tabulate_variant()
+        :return: signature
         """
-        Loop all entity types until we have populated ENTITY_TYPE_LOOKUP with all types
+        signature = [row['base'], row['ai'], row.get('bite', ""), row['materials']]
+        signature += [row[flag] for flag in VARIANT_TABLE_FLAGS]
+        for name in VARIANT_TABLE_NUMBERS:
+            value = row.get(name, None)
+            step = self.collapse_tolerances.get(name, 0.0)
+            if value is not None and step > 0.0:
+                value = math.floor(value / step + 0.5)
+            signature.append(value)
+        return tuple(signature)
+
+    def collapse_variants(self, rows: List[Dict]) -> List[Dict]:
         """
-        counter = 1
-        while counter > 0:
-            if not self.create_entity_type_lookup():
-                break
+        Merge the near-duplicate variants of a base entity (--collapse) into the first of each kind, which takes
+        over their weight in the entity groups.  The merged variants are dropped from NEW_ENTITIES.
 
-            if counter > POPULATE_ENTITY_TYPE_LOOKUP_MAX_LOOPS:
-                raise RuntimeError(
-                        'populate_entity_type_lookup loop_may_count reached. entityclasses nested to deep! Exiting.')
+        :param rows: variant table rows of the variants of one base entity, in generation order
+        :return: rows of the surviving variants
+        """
+        survivors = {}  # signature => surviving variant name
+        kept = []
+        for row in rows:
+            signature = self.collapse_signature(row)
+            survivor = survivors.get(signature, None)
+            if survivor is None:
+                survivors[signature] = row['name']
+                kept.append(row)
+                continue
+            entry = self.NEW_ENTITIES[survivor]
+            entry['zed_weight'] = entry.get('zed_weight', 1) + 1
+            del self.NEW_ENTITIES[row['name']]
+            self.collapsed += 1
+            logger.debug(f"Collapsing near-duplicate {row['name']} into {survivor}")
+        return kept
 
-            counter += 1
+    @staticmethod
+    def weighted_group_entry(template: Tuple[str, str], weight: int) -> Tuple[str, str]:
+        """
+        Scale the probability of an entity group entry template, for a variant that absorbed others.
 
-        self.create_type_entity_lookup()
+        :param template: entry XML split around the entity name, from ENTITY_GROUP_INDEX
+        :param weight: number of variants the entry stands for
+        :return: template with prob multiplied by weight
+        """
+        head, tail = template
+        xml = head + GROUP_ENTRY_NAME_PLACEHOLDER + tail
+        stripped = xml.rstrip()
+        entry = ET.fromstring(stripped)
+        try:
+            prob = float(entry.attrib.get('prob', "1"))
+        except ValueError:
+            return template
+        entry.set('prob', f"{prob * weight:g}")
+        head, _, tail = (ET.tostring(entry, encoding='unicode') + xml[len(stripped):]).partition(
+            GROUP_ENTRY_NAME_PLACEHOLDER)
+        return head, tail
+
+    # --- Load Budget -----------------------------------------------------------
+
+    def variant_count(self, the_key: str, entity_name: str) -> int:
+        """
+        Get how many variants to attempt for a base entity: its share of the load budget when one is set (see
+        plan_budget()), else the flat count of its category (-z, -e, -f).
 
-        for key, value in self.TYPE_ENTITY_LOOKUP.items():
-            logger.debug(f"{key} => {value}")
+        :param the_key: entity config key
+        :param entity_name: base entity name
+        :return: number of variants
+        """
+        if entity_name in self.variant_budget:
+            return self.variant_budget[entity_name]
+        return int(self.CONFIGS[the_key]['num_generation_loops'])  # may be str in json
+
+    def sample_variant_bytes(self, the_key: str, entity_name: str, count: int) -> int:
+        """
+        Serialize a few sample variants of a base entity, exactly as they would be written, with the chance-based
+        options (-m, -a, -r) at 100% chance when enabled so that whatever those add is counted.  The samples draw
+        from streams of their own, and the generation state is left as it was.
+
+        :param the_key: entity config key
+        :param entity_name: base entity name
+        :param count: highest variant number that may be planned, for the length of the names
+        :return: bytes of the largest sample
+        """
+        base = self.ENTITY_INVENTORY[entity_name]
+        saved = (self.rand, self.NEW_ENTITIES, self.WalkTypeCrawlLimiter, self.material_samplers, self.counters,
+                 self.delta_totals, self.mesh_percent, self.altered_ai_percent, self.raging_stag_percent)
+        self.WalkTypeCrawlLimiter = dict(self.WalkTypeCrawlLimiter)
+        self.material_samplers = {}
+        self.counters = dict(self.counters)
+        self.delta_totals = dict(self.delta_totals)
+        self.mesh_percent = self.altered_ai_percent = self.raging_stag_percent = 1.0
+        size = 0
+        try:
+            for i in range(BUDGET_SAMPLES):
+                self.rand = random.Random(f"{self.seed}:budget:{the_key}:{entity_name}:{i}")
+                name = f"{self.prefix}_{entity_name}_{max(count, 1):03d}"
+                self.NEW_ENTITIES = {name: {'zed_is_from': entity_name}}
+                variant = copy.deepcopy(base)
+                variant.set('original_name', entity_name)
+                variant.set('name', name)
+                if not variant.attrib.get('extends', None):
+                    variant.set('extends', entity_name)
+                variant = self.randomize_entity(the_key, variant, entity_name,
+                                                is_animal=the_key != 'ConfigEntityZombie',
+                                                is_enemy=the_key != 'ConfigEntityFriendlyAnimal')
+                if self.delta_xml:
+                    xml = self.delta_record(entity_name, variant).xml
+                else:
+                    xml = VariantRecord(entity_name, base, variant, self.ENTITY_CHILD_XML).to_xml(
+                        base, self.ENTITY_CHILD_XML)
+                size = max(size, len(xml.encode('utf-8')) + 2)
+        finally:
+            (self.rand, self.NEW_ENTITIES, self.WalkTypeCrawlLimiter, self.material_samplers, self.counters,
+             self.delta_totals, self.mesh_percent, self.altered_ai_percent, self.raging_stag_percent) = saved
+        return size
+
+    def estimate_variant_bytes(self, the_key: str, entity_name: str, count: int, localized: Dict[str, int]) -> int:
+        """
+        Predict the output size of one variant of a base entity: its entity class (see sample_variant_bytes()), its
+        entries in the entity groups and its display name in Localization.txt.
+
+        :param the_key: entity config key
+        :param entity_name: base entity name
+        :param count: highest variant number that may be planned
+        :param localized: base entity name => bytes of its localized names, in all languages
+        :return: bytes
+        """
+        name_length = len(f"{self.prefix}_{entity_name}_{max(count, 1):03d}")
+        size = self.sample_variant_bytes(the_key, entity_name, count)
+        for _, (head, tail) in self.ENTITY_GROUP_INDEX.get(entity_name, []):
+            size += len(head) + name_length + len(tail) + 2
+        if entity_name in localized:
+            size += name_length + len(",entityclasses,Entity,,,") + localized[entity_name] + \
+                len(BUDGET_DESCRIPTORS.encode('utf-8')) + 1
+        return size
+
+    def plan_budget(self) -> None:
+        """
+        Split the load budget (--max-entities, --max-bytes) across all base entities, in proportion to how often
+        each appears in the entity groups.  Every base entity gets between its minimum and maximum: by default
+        none, and the flat count of its category; either can be set per entity in the budget_limits of the
+        config file.  Without a budget, the flat counts are planned, for --estimate.
+        """
+        logger.info("\n" + '#' * 79 + "\n" + "## Planning Load Budget\n" + "#" * 79 + "\n")
+
+        items = []  # (entity config key, base entity name, weight, minimum, maximum, bytes per variant)
+        limits = self.CONFIGS.get('budget_limits', {})
+        todo = [(the_key, entity_name) for the_key, (entity_type, _, _) in self.CATEGORIES.items()
+                for entity_name in self.category_todo(the_key, self.TYPE_ENTITY_LOOKUP[entity_type])]
+        for entity_name in sorted(set(limits) - set(entity_name for _, entity_name in todo)):
+            logger.warning(f"budget_limits names `{entity_name}`, which is not a base entity to make variants of")
+
+        localized = {}  # base entity name => bytes of its localized names
+        if self.localization:
+            _, names = self.localized_names(dict.fromkeys((entity_name for _, entity_name in todo), True))
+            for entity_name, texts in names.items():
+                localized[entity_name] = sum(len(text.encode('utf-8')) + 3 for text in texts.values())
+
+        for the_key, entity_name in todo:
+            flat = 0 if self.CONFIGS[the_key]['disable_randomizer'] == 1 else \
+                int(self.CONFIGS[the_key]['num_generation_loops'])
+            limit = limits.get(entity_name, {})
+            low, high = int(limit.get('min', 0)), int(limit.get('max', flat))
+            if low > high:
+                raise RuntimeError(f"Exiting because budget_limits of {entity_name} has min above max")
+            items.append((the_key, entity_name, len(self.ENTITY_GROUP_INDEX.get(entity_name, [])), low, high,
+                          self.estimate_variant_bytes(the_key, entity_name, high, localized)))
+
+        def counts_at(scale: float) -> List[int]:
+            return [min(high, max(low, int(scale * weight))) for _, _, weight, low, high, _ in items]
+
+        def fits(counts: List[int]) -> bool:
+            if self.max_entities is not None and sum(counts) > self.max_entities:
+                return False
+            return self.max_bytes is None or sum(n * item[5] for n, item in zip(counts, items)) <= self.max_bytes
+
+        if self.max_entities is None and self.max_bytes is None:
+            counts = [high for _, _, _, _, high, _ in items]
+        else:
+            counts = counts_at(0.0)
+            if not fits(counts):
+                raise RuntimeError("Exiting because the minimum variant counts alone exceed the load budget")
+            top = max([high / weight for _, _, weight, _, high, _ in items if weight > 0], default=0.0)
+            low_scale, high_scale = 0.0, top
+            if fits(counts_at(top)):
+                low_scale = top
+            else:
+                for _ in range(60):
+                    middle = (low_scale + high_scale) / 2
+                    low_scale, high_scale = (middle, high_scale) if fits(counts_at(middle)) else (low_scale, middle)
+            counts = counts_at(low_scale)
+
+            # hand what is left to the largest remainders
+            order = sorted(range(len(items)), key=lambda i: (-(low_scale * items[i][2] - counts[i]), items[i][1]))
+            for i in order:
+                if items[i][2] > 0 and counts[i] < items[i][4]:
+                    counts[i] += 1
+                    if not fits(counts):
+                        counts[i] -= 1
+
+        self.variant_budget = {}
+        self.budget_plan = []
+        for (the_key, entity_name, weight, _, _, size), count in zip(items, counts):
+            self.variant_budget[entity_name] = count
+            self.budget_plan.append((the_key, entity_name, weight, count, count * size))
+            logger.debug(f"Budget: {entity_name} in {weight} groups - {count} variants, ~{count * size} bytes")
+        logger.info(f"## ... {sum(counts)} variants planned over {len(items)} base entities, "
+                    f"~{sum(plan[4] for plan in self.budget_plan)} bytes predicted")
+
+    def log_estimate(self) -> None:
+        """
+        Log the planned variant counts and predicted output size (--estimate).
+        """
+        logger.info("Planned variants (entity groups / variants / predicted bytes):")
+        for the_key, (_, _, total) in self.CATEGORIES.items():
+            plans = [plan for plan in self.budget_plan if plan[0] == the_key]
+            for _, entity_name, weight, count, size in plans:
+                logger.info(f"   {entity_name:30s} - {weight:3d} / {count:5d} / {size:10d}")
+            logger.info(f"{the_key}: {sum(plan[3] for plan in plans)} variants, "
+                        f"~{sum(plan[4] for plan in plans)} bytes")
+        logger.info(f"Total: {sum(plan[3] for plan in self.budget_plan)} variants, "
+                    f"~{sum(plan[4] for plan in self.budget_plan)} bytes")
 
     # ----- Generation ------------------------------------------------------------
 
@@ -383,40 +2297,38 @@ class RandEnt(object):
         :param name: The source entity
         :return: tuple of (new name, modified XML), or (None, None) if invalid
         """
-        new_zed = None
-        new_name = None
-
-        # find first match
-        for entity in self.ENTITYCLASSES_DOM.findall(f".//entity_class[@name='{name}']"):
-            entity_name = entity.attrib['name']
-            # logger.debug(f"Found: {entity_name}")
-
-            # Filter some out we don't want!
-            if entity_name in NEW_ENTITY_FILTER_OUT_LIST:
-                logger.debug(f"Zed filter FILTER OUT list matched. Filtering OUT: {entity_name} because: "
-                             f"{NEW_ENTITY_FILTER_OUT_LIST[entity_name]}")
+        # Filter some out we don't want!
+        if name in self.NEW_ENTITY_FILTER_OUT_LIST:
+            logger.debug(f"Zed filter FILTER OUT list matched. Filtering OUT: {name} because: "
+                         f"{self.NEW_ENTITY_FILTER_OUT_LIST[name]}")
+            return None, None
+
+        # Filter ONLY those we do want!
+        if self.FILTER_ALLOW_ONLY_LIST_FLAG:
+            if name in self.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST:
+                logger.debug(
+                        f"Zed filter ALLOW ONLY list matched. Filtering IN: {name} because: "
+                        f"{self.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST[name]}")
+            else:  # didnt match, dont clone.
+                logger.debug(f"Zed filter ALLOW ONLY list used and not matched. Filtering OUT: {name}")
                 return None, None
 
-            # Filter ONLY those we do want!
-            if self.FILTER_ALLOW_ONLY_LIST_FLAG:
-                if entity_name in self.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST:
-                    logger.debug(
-                            f"Zed filter ALLOW ONLY list matched. Filtering IN: {entity_name} because: "
-                            f"{self.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST[entity_name]}")
-                else:  # didnt match, dont clone.
-                    logger.debug(f"Zed filter ALLOW ONLY list used and not matched. Filtering OUT: {entity_name}")
-                    return None, None
-
-            new_zed = copy.deepcopy(entity)  # deep clone, all nodes below
-            new_name = self.generate_new_entity_name(name)
-            new_zed.set('original_name', entity_name)
-            new_zed.set('name', new_name)  # Not changing build.xml
-            logger.debug(f"%% Generating {name} variant ({new_name}) ----------------------------------------")
-
-            # Extend from parent
-            entity_extends_name = new_zed.attrib.get('extends', None)
-            if not entity_extends_name:  # Not already extending. Have to add!
-                new_zed.set('extends', entity_name)
+        # find first match
+        entity = self.ENTITY_INVENTORY.get(name, None)
+        if entity is None:
+            return None, None
+
+        new_zed = copy.deepcopy(entity)  # deep clone, all nodes below
+        self.counters['deepcopy'] += 1
+        new_name = self.generate_new_entity_name(name)
+        new_zed.set('original_name', name)
+        new_zed.set('name', new_name)  # Not changing build.xml
+        logger.debug(f"%% Generating {name} variant ({new_name}) ----------------------------------------")
+
+        # Extend from parent
+        entity_extends_name = new_zed.attrib.get('extends', None)
+        if not entity_extends_name:  # Not already extending. Have to add!
+            new_zed.set('extends', name)
 
         return new_name, new_zed
 
@@ -505,6 +2417,101 @@ class RandEnt(object):
 
         return args
 
+    def config_plan(self, cfg_entity_key: str, entity_name: str) -> Tuple[PlanStep, ...]:
+        """
+        Get the compiled randomizer plan for variants of a base entity, compiling it on first use.
+
+        :param cfg_entity_key: entity key
+        :param entity_name: entity source name
+        :return: plan steps, in config file order
+        """
+        plan = self.CONFIG_PLANS.get((cfg_entity_key, entity_name), None)
+        if plan is None:
+            plan = self.compile_config_plan(cfg_entity_key, entity_name)
+            self.CONFIG_PLANS[(cfg_entity_key, entity_name)] = plan
+        return plan
+
+    def compile_config_plan(self, cfg_entity_key: str, entity_name: str) -> Tuple[PlanStep, ...]:
+        """
+        Resolve the config file once for a base entity: which properties get randomized, by which randomizer, and
+        with which numbers.  Everything that does not depend on the variant being generated is settled here.
+
+        :param cfg_entity_key: entity key
+        :param entity_name: entity source name
+        :return: plan steps, in config file order
+        """
+        is_animal = cfg_entity_key != 'ConfigEntityZombie'
+        base = self.ENTITY_INVENTORY.get(entity_name, None)
+        # variants extend whatever their base extends, or the base itself
+        variant_extends = (base.attrib.get('extends', None) if base is not None else None) or entity_name
+
+        steps = []
+        for cfg_property_key in self.CONFIGS[cfg_entity_key].keys():
+            if cfg_property_key in CONFIG_META_KEYS:
+                continue
+
+            if not self.is_randomizer_enabled_for_property(cfg_entity_key, cfg_property_key, entity_name):
+                continue
+
+            # Check if should ONLY apply/randomize configs for this entity
+            # Specifically for configs that are entity specific: demolishers, vultures, etc.
+            if self.is_entity_blocked_for_property(cfg_entity_key, cfg_property_key, entity_name):
+                continue
+
+            if cfg_property_key in PLAN_SPECIAL_CASES:
+                steps.append(PlanStep(cfg_property_key, PLAN_SPECIAL_CASES[cfg_property_key]))
+                continue
+
+            args = self.get_entity_config_file_configs(cfg_entity_key, cfg_property_key, entity_name)
+
+            # Get the randomizer function name to use from defaults
+            rand_function_key = self.CONFIGS['ConfigDefaults'][cfg_property_key]['rand_function']
+
+            if rand_function_key in ['custom_WalkType', 'custom_TintMaterial', 'custom_MassAndWeightAndSizeScale']:
+                steps.append(PlanStep(cfg_property_key, rand_function_key))
+            elif rand_function_key == 'custom_HealthAndExperienceGain':
+                steps.append(PlanStep(cfg_property_key, rand_function_key, (float(args['pct_random_int']),)))
+            elif rand_function_key == 'setcreate_one_range':
+                if "only_allow_these_entities_list" in args and \
+                        variant_extends not in args["only_allow_these_entities_list"]:
+                    continue
+                low, high = args['low'], args['high']
+                self.check_range(cfg_property_key, low, high)
+                decimals = max(self.determine_num_decimals(low), self.determine_num_decimals(high))
+                steps.append(PlanStep(cfg_property_key, rand_function_key, (float(low), float(high)), (decimals,)))
+            elif rand_function_key == 'setcreate_two_range':
+                low1, low2, high1, high2 = args['low1'], args['low2'], args['high1'], args['high2']
+                self.check_range(cfg_property_key, low1, low2)
+                self.check_range(cfg_property_key, high1, high2)
+                if not is_animal:  # deal with zombie special cases
+                    rescale = 1 if self.research else 100  # extra slow to allow for examination
+                else:
+                    rescale = args.get('scale', 100)  # use to scale up or down resulting values
+                steps.append(PlanStep(cfg_property_key, rand_function_key,
+                                      (float(low1), float(low2), float(high1), float(high2), float(rescale) / 100.0),
+                                      (max(self.determine_num_decimals(low1), self.determine_num_decimals(low2)),
+                                       max(self.determine_num_decimals(high1), self.determine_num_decimals(high2)))))
+            elif rand_function_key == 'setcreate_rand_around_percent':
+                default = args['default']
+                steps.append(PlanStep(cfg_property_key, rand_function_key,
+                                      (float(args['pct_random_int']), float(default)),
+                                      (self.determine_num_decimals(default),)))
+
+        logger.debug(f"Compiled {cfg_entity_key} plan for {entity_name}: {', '.join(step.name for step in steps)}")
+        return tuple(steps)
+
+    @staticmethod
+    def check_range(property_name: str, low: str, high: str) -> None:
+        """
+        Make sure a configured "low-high" range is not reversed.
+
+        :param property_name: property the range is for
+        :param low: low value as string
+        :param high: high value as string
+        """
+        if float(high) < float(low):
+            raise RuntimeError(f"Config for {property_name}: high: {high} < low: {low}")
+
     def randomize_walk_type(self, entity: ET.Element) -> ET.Element:
         """ 
         <property name="WalkType" value="3"/>
@@ -544,7 +2551,7 @@ class RandEnt(object):
                 self.WalkTypeCrawlLimiter[root_entity_class] = already_generated_walkers
 
         original = None
-        for walk_type in entity.findall(f".//property[@name='WalkType']"):
+        for walk_type in self.findall(entity, f".//property[@name='WalkType']"):
             original = walk_type.attrib['value']  # returned as string
             if original == '8':  # leave spiders alone
                 return entity
@@ -593,12 +2600,12 @@ class RandEnt(object):
         """
         # Try TintMaterial1, TintMaterial2, TintMaterial3
         for n in range(3):
-            for node in zed.findall(f".//property[@name='TintMaterial{n + 1}']"):
+            for node in self.findall(zed, f".//property[@name='TintMaterial{n + 1}']"):
                 new_val = self.random_rgb()
                 node.set('value', new_val)  # random this
 
         # Try TintColor
-        for node in zed.findall(f".//property[@name='TintColor']"):
+        for node in self.findall(zed, f".//property[@name='TintColor']"):
             new_val = self.random_rgb()
             node.set('value', new_val)  # random this
 
@@ -640,22 +2647,51 @@ class RandEnt(object):
         num_decimals = max(low_dec_cnt, high_dec_cnt)
         rescale_float = 1.0 if rescale is None else float(rescale) / 100.0
 
+        return self.random_number_between(float(low), float(high), num_decimals, rescale_float)
+
+    def random_number_between(self, low: float, high: float, num_decimals: int, rescale: float = 1.0) -> str:
+        """
+        Numeric core of random_number_from_range(), for ranges already parsed from the config.
+
+        :param low: low value
+        :param high: high value
+        :param num_decimals: decimal places of the result
+        :param rescale: value scaling, where 1.0 = unscaled
+        :return: random range, as string
+        """
         # Subtract low from high to get single float number e.g. 1.950 = 2.000 - 0.050
-        use_low = float(low) * rescale_float
-        use_high = float(high) * rescale_float
-        diff = float(use_high) - float(use_low)
+        use_low = low * rescale
+        use_high = high * rescale
+        diff = use_high - use_low
 
         rand = self.rand.random() * diff
 
         # Add rand to low for new value
-        new_rand = use_low + rand
+        return self.format_number(use_low + rand, num_decimals)
+
+    @staticmethod
+    def format_number(value: float, num_decimals: int) -> str:
+        """
+        Format a generated value for the XML, to x decimal places e.g. .346; 0 = no decimals (truncated).
 
-        # Force to x decimal places e.g. .346. 0 = no decimals
+        :param value: generated value
+        :param num_decimals: decimal places
+        :return: formatted string
+        """
         if num_decimals == 0:
-            new_rand = f"{int(new_rand):d}"
-        else:
-            new_rand = f"{new_rand:.{num_decimals}f}"
-        return new_rand
+            return f"{int(value):d}"
+        return f"{value:.{num_decimals}f}"
+
+    def variance_multiplier(self, variance: Tuple[float, float]) -> float:
+        """
+        Draw a random multiplier within a variance.
+
+        :param variance: Tuple of (modifier reduced, modifier increased); i.e. (0.1, 0.25) is x0.9 to x1.25
+        :return: multiplier
+        """
+        if variance[0] >= 1.0:
+            raise RuntimeError("Variance reduction cannot be more than or equal to 1.0")
+        return self.rand.random() * (variance[0] + variance[1]) + (1.0 - variance[0])
 
     # noinspection PyUnusedFunction
     def conform_decimals(self, pattern: str, value: str) -> str:
@@ -667,16 +2703,7 @@ class RandEnt(object):
         :return: result
         """
         # Get how many decimals are passed
-        num_decimals = self.determine_num_decimals(pattern)
-
-        new_rand = float(value)
-
-        # Force to x decimal places e.g. .346. 0 = no decimals
-        if num_decimals == 0:
-            new_rand = f"{int(new_rand):d}"
-        else:
-            new_rand = f"{new_rand:.{num_decimals}f}"
-        return new_rand
+        return self.format_number(float(value), self.determine_num_decimals(pattern))
 
     def vary_percent_around_number(self, num: str, pct: str, num_decimals: int, mult: float = 1.0) -> str:
         """
@@ -692,21 +2719,25 @@ class RandEnt(object):
         :param mult: additional scaling multipler after variance (default 1.0)
         :return: formatted result string
         """
-        rand_pct_float = 1.0 + (((self.rand.random() * float(pct) * 2.0) - float(pct)) / 100.0)
+        return self.vary_percent_around_value(float(num), float(pct), num_decimals, mult=mult)
 
-        new_num_float = float(num) * mult * rand_pct_float
+    def vary_percent_around_value(self, num: float, pct: float, num_decimals: int, mult: float = 1.0) -> str:
+        """
+        Numeric core of vary_percent_around_number(), for values already parsed.
 
-        # ok, we finally have the rand +/- percent.  How to round?
-        # Force to x decimal places e.g. .346. 0 = no decimals
-        if num_decimals == 0:
-            new_num = f"{int(new_num_float):d}"
-        else:
-            new_num = f"{new_num_float:.{num_decimals}f}"
+        :param num: source number
+        :param pct: variance percent maximum
+        :param num_decimals: max decimal places
+        :param mult: additional scaling multipler after variance (default 1.0)
+        :return: formatted result string
+        """
+        rand_pct_float = 1.0 + (((self.rand.random() * pct * 2.0) - pct) / 100.0)
 
-        return new_num
+        # ok, we finally have the rand +/- percent
+        return self.format_number(num * mult * rand_pct_float, num_decimals)
 
     def vary_property_around_base_value(self, entity: ET.Element, property_name: str,
-                                        cfg: Dict) -> ET.Element:
+                                        step: PlanStep) -> ET.Element:
         """
         This looks for a property.  If found, then randomizes the value around that by +/- pct_random_int
         BUT if it cannot find a property, uses val_if_empty for the source
@@ -716,16 +2747,16 @@ class RandEnt(object):
         
         :param entity: source entity
         :param property_name: property being varied
-        :param cfg: variance data
+        :param step: compiled plan step, numbers (pct_random_int, default)
         :return: modified element
         """
-        pct_random = cfg['pct_random_int']  # amount of variance, where "100" = 100%
-        default = cfg['default']  # default value, if property is not found
+        pct_random, default = step.numbers  # amount of variance, where 100 = 100%; default value if not found
 
         original = None
-        for node in entity.findall(f".//property[@name='{property_name}']"):
+        for node in self.findall(entity, f".//property[@name='{property_name}']"):
             original = node.attrib['value']
-            new_val = self.vary_percent_around_number(original, pct_random, self.determine_num_decimals(original))
+            new_val = self.vary_percent_around_value(float(original), pct_random,
+                                                     self.determine_num_decimals(original))
             if new_val != original:  # only change if different
                 logger.debug(f"   Changed {property_name} from {original} to {new_val}")
                 node.set('value', new_val)
@@ -734,7 +2765,7 @@ class RandEnt(object):
         if original is None:
             prop = ET.Element("property")
             prop.set('name', property_name)
-            new_val = self.vary_percent_around_number(default, pct_random, self.determine_num_decimals(default))
+            new_val = self.vary_percent_around_value(default, pct_random, step.decimals[0])
             prop.set('value', new_val)  # random this
             prop.tail = "\n    "
             entity.insert(1, prop)
@@ -742,25 +2773,92 @@ class RandEnt(object):
 
         return entity
 
+    def findall(self, element: ET.Element, path: str) -> List[ET.Element]:
+        """
+        Counted element.findall(), for the --profile hot-path counters.
+
+        :param element: element to search
+        :param path: XPath expression
+        :return: matching elements
+        """
+        self.counters['findall'] += 1
+        return element.findall(path)
+
+    def resolved_properties(self, entity_name: str) -> Dict[str, Tuple[ET.Element, str]]:
+        """
+        Get the flattened property map of an entity class: every property it defines or inherits through its
+        extends chain, mapped to the node that supplies it and the name of the entity class defining that node.
+        Built once per entity class and reused by every variant.
+
+        :param entity_name: entity class name
+        :return: dict of property name => (property node, supplying entity name)
+        """
+        resolved = self.RESOLVED_PROPERTIES.get(entity_name, None)
+        if resolved is not None:
+            self.inheritance_cache_hits += 1
+            return resolved
+        self.inheritance_cache_dives += 1
+
+        # walk up the extends chain until we hit the top, or an entity class already resolved
+        chain = []
+        name = entity_name
+        while name is not None and name not in self.RESOLVED_PROPERTIES:
+            if name in chain:
+                raise RuntimeError(f"Entity class `{name}` extends itself: {' -> '.join(chain + [name])}")
+            entity = self.ENTITY_INVENTORY.get(name, None)
+            if entity is None:
+                if chain:
+                    logger.warning(f"Entity class `{chain[-1]}` extends unknown entity class `{name}`")
+                break
+            chain.append(name)
+            name = entity.attrib.get('extends', None)
+
+        # ... then resolve back down, each entity class overriding what it inherits
+        resolved = self.RESOLVED_PROPERTIES.get(name, {}) if name is not None else {}
+        for name in reversed(chain):
+            own = {}
+            for node in self.ENTITY_INVENTORY[name].iter('property'):
+                property_name = node.attrib.get('name', None)
+                if property_name is not None and property_name not in own:  # first match, as with findall()
+                    own[property_name] = (node, name)
+            resolved = {**resolved, **own}
+            self.RESOLVED_PROPERTIES[name] = resolved
+
+        return resolved
+
     def find_all_nodes(self, entity: ET.Element, property_name: str,
                        no_dive: bool = False, quiet: bool = False, diving: bool = False) -> Optional[ET.Element]:
-        nodes = entity.findall(f".//property[@name='{property_name}']")
-        if len(nodes) == 0:
-            if no_dive:
-                return None
+        """
+        Find the node defining a property for an entity, diving down the extends chain if the entity does not
+        define it itself.
+
+        :param entity: entity, either a variant or an entity class of the game data
+        :param property_name: property being looked for
+        :param no_dive: If True, only look at the entity itself
+        :param quiet: If True, don't log where the property was found
+        :param diving: unused; kept for compatibility
+        :return: property node, or None if not found
+        """
+        entity_name = entity.attrib.get('name', None)
+        if not no_dive and self.ENTITY_INVENTORY.get(entity_name, None) is entity:  # unaltered game data
+            found = self.resolved_properties(entity_name).get(property_name, None)
+            return None if found is None else found[0]
 
-            extends = entity.attrib.get('extends', None)
-            if extends is None:
-                logger.debug(f" ... {property_name} base not found, need default")
-                return None
-            else:
-                deeper = self.ENTITY_INVENTORY[extends]
-                return self.find_all_nodes(deeper, property_name, quiet=quiet, diving=True)
-        else:
-            entity_name = entity.attrib['name']
-            if not quiet and diving:
-                logger.debug(f" ... {property_name} base found in {entity_name}")
+        nodes = self.findall(entity, f".//property[@name='{property_name}']")
+        if len(nodes) > 0:
             return nodes[0]
+        if no_dive:
+            return None
+
+        extends = entity.attrib.get('extends', None)
+        found = None if extends is None else self.resolved_properties(extends).get(property_name, None)
+        if found is None:
+            logger.debug(f" ... {property_name} base not found, need default")
+            return None
+
+        if not quiet:
+            logger.debug(f" ... {property_name} base found in {found[1]}")
+        return found[0]
 
     def alter_property(self, entity: ET.Element, property_name: str, scale: float = None,
                        variance: Tuple[float, float] = None,
@@ -781,19 +2879,14 @@ class RandEnt(object):
         """
         entity_name = entity.attrib['name']
         source = self.find_all_nodes(entity, property_name, no_dive=True, quiet=True)
-        baseline = self.find_all_nodes(entity, property_name)
+        baseline = source if source is not None else self.find_all_nodes(entity, property_name)
         if baseline is None:
             if default is None:
                 raise RuntimeError(f"Need default for {property_name} for {entity_name}!")
-            else:
-                value = float(default)
+            original = default
         else:
-            value = baseline.attrib['value']
-
-        original = value
-        if value is None:
-            value = default
-        value = float(value)
+            original = baseline.attrib['value']
+        value = float(original)
 
         # scale
         if scale is not None:
@@ -801,11 +2894,7 @@ class RandEnt(object):
 
         # vary
         if variance is not None:
-            if variance[0] >= 1.0:
-                raise RuntimeError("Variance reduction cannot be more than or equal to 1.0")
-            v = variance[0] + variance[1]
-            b = 1.0 - variance[0]
-            value = value * (self.rand.random() * v + b)
+            value = value * self.variance_multiplier(variance)
 
         if limits is not None:
             value = min(max(value, float(limits[0])), float(limits[1]))
@@ -845,7 +2934,7 @@ class RandEnt(object):
         """
         entity_name = entity.attrib['name']
         source = self.find_all_nodes(entity, property_name, no_dive=True, quiet=True)
-        baseline = self.find_all_nodes(entity, property_name)
+        baseline = source if source is not None else self.find_all_nodes(entity, property_name)
         if baseline is None:
             if default is None:
                 raise RuntimeError(f"Need default for {property_name} for {entity_name}!")
@@ -868,10 +2957,8 @@ class RandEnt(object):
 
         # vary
         if variance is not None:
-            if variance[0] >= 1.0:
-                raise RuntimeError("Variance reduction cannot be more than or equal to 1.0")
-            value1 = value1 * (self.rand.random() * (variance[0] + variance[1]) + (1.0 - variance[0]))
-            value2 = value2 * (self.rand.random() * (variance[0] + variance[1]) + (1.0 - variance[0]))
+            value1 = value1 * self.variance_multiplier(variance)
+            value2 = value2 * self.variance_multiplier(variance)
 
         # limits
         if limits is not None:
@@ -942,7 +3029,7 @@ class RandEnt(object):
                 if not is_enemy:  # allow for larger timids
                     sizes = sizes + ["175", "200", "225", "250"]
 
-        rand_change_pct = random.choice(sizes)
+        rand_change_pct = self.rand.choice(sizes)
         entity.attrib['trub_scale'] = rand_change_pct
         return entity
 
@@ -1027,7 +3114,7 @@ class RandEnt(object):
 
         return entity
 
-    def modify_health_max_base(self, entity: ET.Element, pct_rand: str,
+    def modify_health_max_base(self, entity: ET.Element, pct_rand: float,
                                scaling: float = 1.0) -> Tuple[ET.Element, float]:
         """
         Alter the max health based on overall scaling
@@ -1043,7 +3130,7 @@ class RandEnt(object):
         ts_float = float(trub_scale) / 100.0 * scaling
         use_scaling = ts_float
 
-        for health in entity.findall(".//effect_group[@name='Base Effects']/passive_effect[@name='HealthMax']"):
+        for health in self.findall(entity, ".//effect_group[@name='Base Effects']/passive_effect[@name='HealthMax']"):
             if health.attrib.get('operation', None) != "base_set":
                 continue
 
@@ -1054,18 +3141,12 @@ class RandEnt(object):
                 use_scaling = use_scaling * 2.0
 
             original = health.attrib['value']  # original size
-            new_val = self.vary_percent_around_number(original, pct_rand,
-                                                      self.determine_num_decimals(original),
-                                                      mult=use_scaling)
+            new_val = self.vary_percent_around_value(float(original), pct_rand,
+                                                     self.determine_num_decimals(original),
+                                                     mult=use_scaling)
             if new_val != original:
                 health.set('value', new_val)
                 logger.debug(f"   Changed HealthMax from {original} to {new_val}")
-
-            t = entity.attrib.get('original_name', None)
-            if t is not None:
-                biggest = max(int(original), int(new_val))
-                if t not in self.biggest or self.biggest.get(t) < biggest:
-                    self.biggest[t] = biggest
             break
 
         return entity, use_scaling
@@ -1088,10 +3169,10 @@ class RandEnt(object):
         use_scaling = float(trub_scale) / 100.0
         ts_float = math.pow(use_scaling, 0.75)
 
-        entity_mod = (self.rand.random() * 0.2 + 0.9) * ts_float
-        block_mod = (self.rand.random() * 0.2 + 0.9) * ts_float
+        entity_mod = self.variance_multiplier((0.1, 0.1)) * ts_float
+        block_mod = self.variance_multiplier((0.1, 0.1)) * ts_float
 
-        for node in entity.findall(f".//effect_group[@name='Base Effects']"):
+        for node in self.findall(entity, f".//effect_group[@name='Base Effects']"):
             new_entity = int((entity_mod - 1.0) * 100.0)
             new_block = int((block_mod - 1.0) * 100.0)
 
@@ -1110,21 +3191,19 @@ class RandEnt(object):
 
         return entity
 
-    def vary_health_and_exp(self, entity: ET.Element, cfg: Dict, meat_scaling: float = 1.0,
+    def vary_health_and_exp(self, entity: ET.Element, pct_rand: float, meat_scaling: float = 1.0,
                             exp_scaling: float = 1.0) -> ET.Element:
         """
         The healthier the more damage/bullets the more exp.  However, in headshot mode reduce exp due.
         to
         
         :param entity: source entity
-        :param cfg: variance data
+        :param pct_rand: variance around health max, where 100 = 100%
         :param meat_scaling: additional scaling for health
         :param exp_scaling: optional scaling for exp; uses meat_scaling if not defined
         :return: modified entity
         """
-        pct_rand_int: str = cfg['pct_random_int']
-
-        entity, ratio = self.modify_health_max_base(entity, pct_rand_int, scaling=meat_scaling)
+        entity, ratio = self.modify_health_max_base(entity, pct_rand, scaling=meat_scaling)
         ratio = ratio * (exp_scaling / meat_scaling)
 
         # raging animels get a 25% exp bump
@@ -1138,8 +3217,7 @@ class RandEnt(object):
                                      limits=(1.0, 100000.0), is_float=False)
         return entity
 
-    @staticmethod
-    def set_property(entity: ET.Element, property_name: str, val: str) -> ET.Element:
+    def set_property(self, entity: ET.Element, property_name: str, val: str) -> ET.Element:
         """
         This looks for a property.  If found, then sets it to the val
         BUT if it cannot find a property, creates it and sets to val
@@ -1150,7 +3228,7 @@ class RandEnt(object):
         :return: modified entity
         """
         found = False
-        for node in entity.findall(f".//property[@name='{property_name}']"):
+        for node in self.findall(entity, f".//property[@name='{property_name}']"):
             found = True
             original = node.attrib['value']
             if val != original:  # only change if different
@@ -1169,30 +3247,27 @@ class RandEnt(object):
         return entity
 
     def randomize_property_from_range(self, entity: ET.Element, property_name: str,
-                                      cfg: Dict) -> ET.Element:
+                                      step: PlanStep) -> ET.Element:
         """
         Take a property and randomize the value within a "low-high" range.
             <property name="DismemberMultiplierArms" value=".7"/> <!-- Feral --> 1 = standard
+
+        Entities outside an "only_allow_these_entities_list" never get a step for the property.
         
         :param entity: source entity
         :param property_name: property to be affected
-        :param cfg: variance data
+        :param step: compiled plan step, numbers (low, high)
         :return: modified entity
         """
-        if "only_allow_these_entities_list" in cfg and \
-                entity.attrib['extends'] not in cfg["only_allow_these_entities_list"]:
-            return entity
+        low, high = step.numbers
 
-        low = cfg['low']
-        high = cfg['high']
-
-        new_val = self.random_number_from_range(low, high)
+        new_val = self.random_number_between(low, high, step.decimals[0])
         entity = self.set_property(entity, property_name, new_val)
 
         return entity
 
     def randomize_ranged_property_from_dual_ranges(self, entity: ET.Element, property_name: str,
-                                                   cfg: Dict) -> ET.Element:
+                                                   step: PlanStep) -> ET.Element:
         """
         Take a property with a low-high range and randomize those values within their own "low-high" range.
             <property name="JumpMaxDistance" value="2.8, 3.9"/>
@@ -1201,25 +3276,20 @@ class RandEnt(object):
 
         :param entity: source entity
         :param property_name: property to be affected
-        :param cfg: variance data
+        :param step: compiled plan step, numbers (low1, low2, high1, high2, rescale)
         :return: modified entity
          """
-        low1 = cfg['low1']
-        low2 = cfg['low2']
-        high1 = cfg['high1']
-        high2 = cfg['high2']
-
-        rescale = cfg.get('scale', None)  # use to scale up or down resulting values
+        low1, low2, high1, high2, rescale = step.numbers  # rescale scales up or down resulting values
+        low_decimals, high_decimals = step.decimals
 
-        new_low_val = self.random_number_from_range(low1, low2, rescale)
-        new_high_val = self.random_number_from_range(high1, high2, rescale)
+        new_low_val = self.random_number_between(low1, low2, low_decimals, rescale)
+        new_high_val = self.random_number_between(high1, high2, high_decimals, rescale)
         new_val = new_low_val + ',' + new_high_val  # Its a range itself
         entity = self.set_property(entity, property_name, new_val)
 
         return entity
 
-    @staticmethod
-    def add_property_if_missing(entity: ET.Element, property_name: str,
+    def add_property_if_missing(self, entity: ET.Element, property_name: str,
                                 value: str, replacable: bool = False) -> ET.Element:
         """
         This looks for a property.  If it cannot find a property, it inserts a new property,
@@ -1232,7 +3302,7 @@ class RandEnt(object):
         :return: modified entity
         """
         found = False
-        for node in entity.findall(f".//property[@name='{property_name}']"):
+        for node in self.findall(entity, f".//property[@name='{property_name}']"):
             if replacable:
                 found = True
                 node.set('value', value)
@@ -1538,6 +3608,7 @@ class RandEnt(object):
         ("zombieFatCop", AI_COP),
     ]
     AI_LIST = AI_LIST1 + AI_LIST2
+    AI_TEMPLATES = tuple(AITemplate.compile(donor, ai) for donor, ai in AI_LIST)  # AI_LIST, precompiled
 
     # Zombie vultures require special AI, most timid are unaffected
     EXCEPT_FOR = {
@@ -1548,11 +3619,6 @@ class RandEnt(object):
         "animalDoe": True,
     }
 
-    def _add_details_count(self, key: str) -> None:
-        if key not in self.details:
-            self.details[key] = 0
-        self.details[key] += 1
-
     def alter_hostile_animal_ai(self, entity: ET.Element) -> ET.Element:
         """
         For enemy animals, have a chance of swapping out their normal AI with a different enemy animal AI.
@@ -1564,40 +3630,32 @@ class RandEnt(object):
         if self.rand.random() > self.altered_ai_percent or original in self.EXCEPT_FOR:
             return entity  # no change
 
-        # remove any AITask or AITarget entries (or sense/seek entries)
-        for node in entity.findall(f".//property"):
-            nn = node.get('name')
-            if nn.startswith("AITask-") or nn.startswith("AITarget-") or nn in ["AIFeralSense", "AINoiseSeekDist",
-                                                                                "AIPathCostScale"]:
-                entity.remove(node)
-
         # choose a new AI, other than existing
         use = None
-        pick = []
         while use is None:
-            pick = self.rand.choice(self.AI_LIST)
-            if pick[0] != original:
+            pick = self.rand.choice(self.AI_TEMPLATES)
+            if pick.donor != original:
                 use = pick
-        logger.debug(f"AI: changed to {pick[0]}")
-
-        key = f"{original} ({pick[0]} AI)"
-        self._add_details_count(key)
+        logger.debug(f"AI: changed to {use.donor}")
 
-        # add in new AI in proper order
-        # ("name", "value") or ("name", "value", "data") for each entry
-        for item in use[1]:
-            prop = ET.Element("property")
-            prop.set('name', item[0])
-            prop.set('value', item[1])
-            if len(item) > 2:
-                prop.set('data', item[2])
-            prop.tail = "\n    "
-            entity.insert(-1, prop)
-        entity.attrib['trub_ai'] = use[0]
-        self.altered_ai_count += 1
+        self.replace_ai(entity, use.fragments)
+        entity.attrib['trub_ai'] = use.donor
 
         return entity
 
+    @staticmethod
+    def replace_ai(entity: ET.Element, fragments: Tuple[Tuple[Tuple[str, str], ...], ...]) -> None:
+        """
+        Swap out the AI properties of an entity (AITask and AITarget entries, sense/seek entries) for clones of the
+        given fragments, rebuilding its children in one pass.  The new AI goes just before the last child.
+
+        :param entity: supplied entity
+        :param fragments: property fragments of the new AI
+        """
+        kept = [node for node in entity if node.tag != 'property' or not (
+            node.get('name', "").startswith(AI_PROPERTY_PREFIXES) or node.get('name', None) in AI_PROPERTY_NAMES)]
+        entity[:] = kept[:-1] + AITemplate.clone(fragments) + kept[-1:]
+
     MELEE1 = [
         "meleeHandAnimalWolf",
         "meleeHandAnimalBear",
@@ -1621,52 +3679,28 @@ class RandEnt(object):
         if self.rand.random() > self.raging_stag_percent or original in self.EXCEPT_FOR:
             return entity  # no change
 
-        # remove any AITask or AITarget entries
-        for node in entity.findall(f".//property"):
-            nn = node.get('name')
-            if nn.startswith("AITask-") or nn.startswith("AITarget-") or nn in ["AIFeralSense", "AINoiseSeekDist",
-                                                                                "AIPathCostScale"]:
-                entity.remove(node)
-
         # choose a new AI
-        use = self.rand.choice(self.AI_LIST)
-        logger.debug(f"AI: changed to {use[0]}")
-        key = f"{original} ({use[0]} AI)"
-        self._add_details_count(key)
+        use = self.rand.choice(self.AI_TEMPLATES)
+        logger.debug(f"AI: changed to {use.donor}")
 
         # add HandItem so it has something to work with
         bite = self.rand.choice(self.MELEE1 + self.MELEE2)
-        use[1].append(("HandItem", bite))
-
         logger.debug(f"Bite: changed to {bite}")
-        key = f"Raging {original} Bite {bite}"
-        self._add_details_count(key)
 
-        # add in new AI in proper order
-        # ("name", "value") or ("name", "value", "data") for each entry
-        for item in use[1]:
-            prop = ET.Element("property")
-            prop.set('name', item[0])
-            prop.set('value', item[1])
-            if len(item) > 2:
-                prop.set('data', item[2])
-            prop.tail = "\n    "
-            entity.insert(-1, prop)
-        entity.attrib['trub_ai'] = use[0]
+        self.replace_ai(entity, use.fragments + (AITemplate.fragment(("HandItem", bite)),))
+        entity.attrib['trub_ai'] = use.donor
 
         entity.attrib['trub_raging'] = "yes"
         self.set_property(entity, "IsEnemyEntity", "true")
         self.set_property(entity, "AIGroupCircle", "1")
 
         # get aggro
-        use_entity = self.ENTITY_INVENTORY[use[0]]
+        use_entity = self.ENTITY_INVENTORY[use.donor]
         orig_speed = self.find_all_nodes(use_entity, "MoveSpeed").attrib['value']
         my_speed = self.find_all_nodes(entity, "MoveSpeed").attrib['value']
         scale = float(my_speed) / float(orig_speed)
         aggro = self.find_all_nodes(use_entity, "MoveSpeedAggro").attrib['value']
         self.alter_property_duplex(entity, "MoveSpeedAggro", scale=scale, variance=(0.1, 0.25), default=aggro)
-
-        self.raging_stag_count += 1
         return entity
 
     #######################################
@@ -1835,9 +3869,6 @@ class RandEnt(object):
         "zombieYoRadiated": (M_SOLID, M_GLOW, None),  # body, hair
     }
 
-    # structure to cut down on duplicate variants
-    seen_variations = {}
-
     def modify_materials(self, entity: ET.Element) -> ET.Element:
         """
         Based on information from Robeloto's mod, for some entities replace the meshes to make them freaky.
@@ -1849,55 +3880,35 @@ class RandEnt(object):
         """
         entity_name = entity.attrib.get('original_name', None)
 
-        # Check to see if material allowed
-        if entity_name not in self.MAT_ALLOWED:
-            raise RuntimeError(f"`{entity_name}` not seen for freaky materials!")
-        else:
-            grp0 = self.MAT_ALLOWED[entity_name][0]
-            grp1 = self.MAT_ALLOWED[entity_name][1]
-            grp2 = self.MAT_ALLOWED[entity_name][2]
+        # entities added by modlets take the materials of the nearest entity they extend
+        material_source = entity_name
+        if material_source not in self.MAT_ALLOWED and material_source in self.ENTITY_INVENTORY:
+            for ancestor in self.ENTITY_GRAPH.ancestors(material_source):
+                if ancestor in self.MAT_ALLOWED:
+                    material_source = ancestor
+                    break
+
+        # Check to see if material allowed; entities of unknown make-up (e.g. modded ones extending only a template)
+        # are left as they are
+        if material_source not in self.MAT_ALLOWED:
+            if entity_name not in self.materials_unknown:
+                logger.warning(f"`{entity_name}` not seen for freaky materials, nor anything it extends; "
+                               f"its variants keep their own materials")
+                self.materials_unknown[entity_name] = True
+            return entity
 
         chance = self.mesh_percent
         if self.research:
             chance = 1.0
 
-        three_strikes = 0  # used to prevent endless looping on material choice
-
-        key = ""
-        choice0 = None
-        choice1 = None
-        choice2 = None
-        while three_strikes < 3:
-
-            # chance of material0
-            if grp0 is not None and self.rand.random() < chance:
-                choice0 = self.rand.choice(grp0)
-            else:
-                choice0 = None
-
-            # chance of material1
-            if grp1 is not None and self.rand.random() < chance:
-                choice1 = self.rand.choice(grp1)
-            else:
-                choice1 = None
-
-            # chance of material2
-            if grp2 is not None and self.rand.random() < chance:
-                choice2 = self.rand.choice(grp2)
-            else:
-                choice2 = None
-
-            key = f"{entity_name}-{choice0}-{choice1}-{choice2}"
-            if choice0 is None and choice1 is None and choice2 is None:
-                break  # no changes is special cased
-            if key in self.seen_variations:
-                three_strikes += 1
-            else:
-                self.seen_variations[key] = True
-                break
-
-        if three_strikes >= 3:
-            logger.debug(f"%% -- Material 'three strikes' hit with {key} -- live with it...")
+        # combinations are drawn without replacement per base entity, to cut down on duplicate variants
+        sampler = self.material_samplers.get(entity_name, None)
+        if sampler is None:
+            sampler = self.material_samplers[entity_name] = MaterialSampler(self.MAT_ALLOWED[material_source])
+        (choice0, choice1, choice2), fresh = sampler.draw(self.rand, chance)
+        if not fresh:
+            logger.debug(f"%% -- Material combinations of {entity_name} used up, repeating one -- live with it...")
+            self.counters['material_repeats'] += 1
 
         if choice0 is not None:
             entity = self.add_property_if_missing(entity, "ReplaceMaterial0", choice0,
@@ -1913,7 +3924,6 @@ class RandEnt(object):
         if choice0 is not None:
             logger.debug(" ... is a FREAK!")
             entity.attrib['trub_freak'] = "yes"
-            self.freak_count += 1
 
         return entity
 
@@ -1934,9 +3944,9 @@ class RandEnt(object):
             logger.debug(" ... harvestables cut in half")
             scaling = scaling / 2.0
 
-        for node in zed.findall(f".//drop[@event='Harvest']"):
+        for node in self.findall(zed, f".//drop[@event='Harvest']"):
             val = node.attrib['count']
-            new_scale = (self.rand.random() * 0.2 + 0.9) * scaling
+            new_scale = self.variance_multiplier((0.1, 0.1)) * scaling
             new_val = max(int(val) * new_scale, 0)
             node.set('count', str(int(new_val + 0.5)))
 
@@ -1949,13 +3959,13 @@ class RandEnt(object):
         
         :param entity_config_key: entity key
         :param new_entity: source entity element
-        :param entity_name: new entity name
+        :param entity_name: base entity name
         :param is_animal: True if animal (timid or hostile)
         :param is_enemy: True if enemy_animal or zombie
         :return: modified element
         """
-        # Loop through configs for this entity
-        config_keys = self.CONFIGS[entity_config_key].keys()
+        # Settings for this entity, resolved from the config file once per base entity
+        plan = self.config_plan(entity_config_key, entity_name)
 
         # generate entity scale variation
         new_entity = self.generate_scaling(new_entity, is_animal, is_enemy)
@@ -1964,33 +3974,10 @@ class RandEnt(object):
         if self.altered_ai and is_enemy and is_animal:
             new_entity = self.alter_hostile_animal_ai(new_entity)
 
-        for cfg_property_key in config_keys:
-            if cfg_property_key in ['disable_randomizer', 'num_generation_loops', 'ignore_entity_list',
-                                    'enable_walktype_crawler_limit']:
-                continue
-
-            if not self.is_randomizer_enabled_for_property(entity_config_key, cfg_property_key, entity_name):
-                continue
-
-            # Check if should ONLY apply/randomize configs for this entity
-            # Specifically for configs that are entity specific: demolishers, vultures, etc.
-            if self.is_entity_blocked_for_property(entity_config_key, cfg_property_key, entity_name):
-                continue
-
-            if cfg_property_key in ["MoveSpeed", "MoveSpeedPanic", "SwimSpeed"]:
-                use_scale = None
-                # for muchkins, speed them up a bit to counteract their small size
-                if not is_animal and self.munchkins:
-                    use_scale = math.sqrt(100.0 / float(self.get_trub_scale(new_entity)))
-                if self.research:  # extra slow to allow for examination
-                    use_scale = 0.01
-
-                new_entity = self.alter_property(new_entity, cfg_property_key, scale=use_scale, variance=(0.2, 0.5),
-                                                 default=None, limits=None)
-
-                continue
+        for step in plan:
+            cfg_property_key = step.name
 
-            if cfg_property_key in ["MoveSpeedAggro"]:
+            if step.kind in [PLAN_SPEED, PLAN_SPEED_DUPLEX]:
                 use_scale = None
                 # for muchkins, speed them up a bit to counteract their small size
                 if not is_animal and self.munchkins:
@@ -1998,52 +3985,36 @@ class RandEnt(object):
                 if self.research:  # extra slow to allow for examination
                     use_scale = 0.01
 
-                new_entity = self.alter_property_duplex(new_entity, cfg_property_key, scale=use_scale,
-                                                        variance=(0.2, 0.50),
-                                                        default=None, limits=None)
-                continue
-
-            if cfg_property_key in ["JumpMaxDistance"]:
+                if step.kind == PLAN_SPEED:
+                    new_entity = self.alter_property(new_entity, cfg_property_key, scale=use_scale,
+                                                     variance=(0.2, 0.5), default=None, limits=None)
+                else:
+                    new_entity = self.alter_property_duplex(new_entity, cfg_property_key, scale=use_scale,
+                                                            variance=(0.2, 0.50),
+                                                            default=None, limits=None)
+            elif step.kind == PLAN_JUMP:
                 new_entity = self.alter_property_duplex(new_entity, cfg_property_key, scale=None, variance=(0.2, 0.5),
                                                         default="2.0, 3.0", limits=None)
-                continue
-
-            args = self.get_entity_config_file_configs(entity_config_key, cfg_property_key, entity_name)
-
-            # Get the randomizer function name to use from defaults
-            rand_function_key = self.CONFIGS['ConfigDefaults'][cfg_property_key]['rand_function']
-
-            if rand_function_key == 'custom_WalkType':
+            elif step.kind == 'custom_WalkType':
                 new_entity = self.randomize_walk_type(new_entity)
-            elif rand_function_key == 'custom_TintMaterial':
+            elif step.kind == 'custom_TintMaterial':
                 new_entity = self.randomize_tint(new_entity)
-            elif rand_function_key == 'custom_MassAndWeightAndSizeScale':
+            elif step.kind == 'custom_MassAndWeightAndSizeScale':
                 new_entity = self.vary_size_and_mass(new_entity)
-            elif rand_function_key == 'custom_HealthAndExperienceGain':
+            elif step.kind == 'custom_HealthAndExperienceGain':
+                pct_rand = step.numbers[0]
                 if self.research:
-                    new_entity = self.vary_health_and_exp(new_entity, args, 0.01, pow(self.hsmeat, 0.5))
+                    new_entity = self.vary_health_and_exp(new_entity, pct_rand, 0.01, pow(self.hsmeat, 0.5))
                 if self.headshot and not is_animal:  # headshot shamblers only
-                    new_entity = self.vary_health_and_exp(new_entity, args, self.hsmeat, pow(self.hsmeat, 0.5))
+                    new_entity = self.vary_health_and_exp(new_entity, pct_rand, self.hsmeat, pow(self.hsmeat, 0.5))
                 else:
-                    new_entity = self.vary_health_and_exp(new_entity, args, 1.0, 1.0)
-            elif rand_function_key == 'setcreate_one_range':
-                new_entity = self.randomize_property_from_range(new_entity,
-                                                                cfg_property_key, args)
-            elif rand_function_key == 'setcreate_two_range':
-                use_args = copy.deepcopy(args)
-                if not is_animal:  # deal with zombie special cases
-                    use_scale = 100
-                    if self.headshot and cfg_property_key == "MoveSpeedAggro":
-                        use_scale = self.hsspeed
-                    if self.munchkins and cfg_property_key == "MoveSpeedAggro":
-                        use_scale = int(10000.0 / float(self.get_trub_scale(new_entity)) + 0.5)
-                    if self.research:  # extra slow to allow for examination
-                        use_scale = 1
-                    use_args['scale'] = str(use_scale)
-                new_entity = self.randomize_ranged_property_from_dual_ranges(new_entity, cfg_property_key,
-                                                                             use_args)
-            elif rand_function_key == 'setcreate_rand_around_percent':
-                new_entity = self.vary_property_around_base_value(new_entity, cfg_property_key, args)
+                    new_entity = self.vary_health_and_exp(new_entity, pct_rand, 1.0, 1.0)
+            elif step.kind == 'setcreate_one_range':
+                new_entity = self.randomize_property_from_range(new_entity, cfg_property_key, step)
+            elif step.kind == 'setcreate_two_range':
+                new_entity = self.randomize_ranged_property_from_dual_ranges(new_entity, cfg_property_key, step)
+            elif step.kind == 'setcreate_rand_around_percent':
+                new_entity = self.vary_property_around_base_value(new_entity, cfg_property_key, step)
 
         # check for raging stags
         if is_animal and not is_enemy and self.raging_stag:
@@ -2058,49 +4029,294 @@ class RandEnt(object):
 
         return new_entity
 
-    def generate_zombie(self) -> None:
+    def snapshot(self, attributes: Tuple[str, ...] = SNAPSHOT_ATTRIBUTES) -> Dict:
         """
-        Zombie Generate.
+        Capture the parsed game data and setup results needed to generate variants in another engine.
+
+        :param attributes: names of the attributes to capture
+        :return: dict of attribute name => value
         """
-        logger.info("\n" + '#' * 79 + "\n" + "## Generating Zombie Entities\n" + "#" * 79 + "\n")
+        return {key: getattr(self, key) for key in attributes}
 
-        self.zed_library = {}
+    def restore_snapshot(self, data: Dict) -> None:
+        """
+        Adopt game data captured by snapshot(), in place of initial_setup() and create_lookup_tables().  The
+        snapshot itself is left untouched: the config is copied, as are the tables that grow on demand, so that
+        engines of the same process can share one snapshot.  Element trees are shared as they are, and must
+        not be modified.
 
-        # Get all the entity_class-es we want to handle, by type
-        entity_class_zombies = self.TYPE_ENTITY_LOOKUP['EntityZombie']
-        self.TOTAL_ZED_ENTITIES_FOUND = len(entity_class_zombies)
-        the_key = 'ConfigEntityZombie'
+        :param data: snapshot of another engine
+        """
+        for key, value in data.items():
+            setattr(self, key, dict(value) if isinstance(value, dict) else value)
+        self.CONFIGS = copy.deepcopy(data['CONFIGS'])
+
+    def reset_variant_state(self) -> None:
+        """
+        Start with empty generation results and bookkeeping tables, owned by this engine alone.
+        """
+        self.NEW_ENTITIES = {}
+        self.WalkTypeCrawlLimiter = {}
+        self.material_samplers = {}
+        self.entity_name_count = {}
+        self.variant_table = VariantTable()
+        self.inheritance_cache_hits = 0
+        self.inheritance_cache_dives = 0
+        self.counters = dict.fromkeys(PROFILE_COUNTERS, 0)
+        self.delta_totals = dict.fromkeys(DELTA_TOTALS, 0)
+        self.collapsed = 0
+
+    def variant_state(self) -> Dict:
+        """
+        Capture the generation results and bookkeeping tables, to be merged into another engine.
+
+        :return: dict of results
+        """
+        return {
+            'NEW_ENTITIES': self.NEW_ENTITIES,
+            'WalkTypeCrawlLimiter': self.WalkTypeCrawlLimiter,
+            'material_samplers': self.material_samplers,
+            'entity_name_count': self.entity_name_count,
+            'variant_table': self.variant_table,
+            'inheritance_cache_hits': self.inheritance_cache_hits,
+            'inheritance_cache_dives': self.inheritance_cache_dives,
+            'counters': self.counters,
+            'delta_totals': self.delta_totals,
+            'collapsed': self.collapsed,
+        }
+
+    def merge_variant_state(self, state: Dict) -> None:
+        """
+        Merge generation results from another engine.  All tables are keyed by base entity, so entries from
+        different base entities never collide; the variant table and counters are appended and summed.
+
+        :param state: results from variant_state()
+        """
+        self.NEW_ENTITIES.update(state['NEW_ENTITIES'])
+        self.WalkTypeCrawlLimiter.update(state['WalkTypeCrawlLimiter'])
+        self.material_samplers.update(state['material_samplers'])
+        self.entity_name_count.update(state['entity_name_count'])
+        self.variant_table.merge(state['variant_table'])
+        self.inheritance_cache_hits += state['inheritance_cache_hits']
+        self.inheritance_cache_dives += state['inheritance_cache_dives']
+        for key, count in state['counters'].items():
+            self.counters[key] += count
+        for key, count in state['delta_totals'].items():
+            self.delta_totals[key] += count
+        self.collapsed += state['collapsed']
+
+    def variant_rng(self, the_key: str, entity_name: str, number: int) -> random.Random:
+        """
+        Random stream for one variant, derived from the run seed as described by SEED_DERIVATION.  Any variant
+        can thus be regenerated without disturbing (or replaying) any other.
+
+        :param the_key: entity config key
+        :param entity_name: base entity name
+        :param number: variant number within the base entity, starting at 1
+        :return: seeded random generator
+        """
+        return random.Random(f"{self.seed}:{the_key}:{entity_name}:{number}")
+
+    def tabulate_variant(self, entity_name: str, entity: ET.Element) -> Dict:
+        """
+        Collect the statistics of a generated variant, for the variant table.  The variant is scanned once; values
+        it does not define itself are looked up in what it inherits.
+
+        :param entity_name: base entity name
+        :param entity: generated variant
+        :return: row for VariantTable.append()
+        """
+        row = {
+            'name': entity.attrib['name'],
+            'base': entity_name,
+            'ai': entity.attrib.get('trub_ai', ""),
+            'freak': self.is_freak(entity),
+            'raging': self.is_raging(entity),
+            'trub_scale': float(self.get_trub_scale(entity)),
+        }
+
+        wanted = ('SizeScale', 'Mass', 'ExperienceGain', 'MoveSpeed', 'MoveSpeedPanic', 'MoveSpeedAggro', 'WalkType',
+                  'HandItem', 'ReplaceMaterial0', 'ReplaceMaterial1', 'ReplaceMaterial2')
+        values = {}
+        for node in entity.iter('property'):
+            property_name = node.attrib.get('name', None)
+            if property_name in wanted and property_name not in values:  # first match, as with findall()
+                values[property_name] = node.attrib.get('value', "")
+        extends = entity.attrib.get('extends', None)
+        inherited = self.resolved_properties(extends) if extends is not None else {}
+        for property_name in wanted:
+            if property_name not in values and property_name in inherited:
+                values[property_name] = inherited[property_name][0].attrib.get('value', "")
+
+        for node in entity.iter('passive_effect'):
+            effect, operation = node.attrib.get('name', None), node.attrib.get('operation', None)
+            if effect == 'HealthMax' and operation == 'base_set' and 'HealthMax' not in values:
+                values['HealthMax'] = node.attrib.get('value', "")
+            elif effect in ('EntityDamage', 'BlockDamage') and operation == 'perc_add':
+                values[effect] = node.attrib.get('value', "")  # the size based one is added last
+
+        aggro = values.pop('MoveSpeedAggro', "").split(",")
+        if len(aggro) == 2:
+            values['MoveSpeedAggro'], values['MoveSpeedAggroMax'] = aggro
+        for name in VARIANT_TABLE_NUMBERS:
+            try:
+                row.setdefault(name, float(values[name]))
+            except (KeyError, ValueError):
+                pass
+
+        if row['raging']:
+            row['bite'] = values.get('HandItem', "")
+        row['materials'] = "/".join(values[f"ReplaceMaterial{i}"] for i in range(3)
+                                    if f"ReplaceMaterial{i}" in values)
+        return row
+
+    def generate_base_entity(self, the_key: str, entity_name: str) -> Tuple[bool, int]:
+        """
+        Generate all variants of a single base entity.  Each variant draws from its own random stream, so the
+        results do not depend on which other entities are generated, or where.
+
+        :param the_key: entity config key
+        :param entity_name: base entity name
+        :return: Tuple of (variants attempted, number of variants generated)
+        """
+        is_animal = the_key != 'ConfigEntityZombie'
+        is_enemy = the_key != 'ConfigEntityFriendlyAnimal'
+
+        attempted = False
+        generated = 0
+        rows = []  # variant table rows, held back until near-duplicates are collapsed
+        for i in range(self.variant_count(the_key, entity_name)):
+            if self.CONFIGS[the_key]['disable_randomizer'] == 1:
+                logger.info(f"!! Ignoring entity: {the_key}  Reason: Entire entity group disabled in config file")
+                break
 
-        # NOTE: looping goes 1 for each type, looped should probably be reversed
-        for entity_name in sorted(entity_class_zombies):
-            # Check to see if we should not randomise this entity
-            if entity_name in self.CONFIGS[the_key]['ignore_entity_list']:
+            # Clone entity
+            attempted = True
+            self.rand = self.variant_rng(the_key, entity_name, i + 1)
+            new_entity_name, new_entity = self.generate_new_entity_from_existing_name(entity_name)
+            if new_entity_name is None:
                 continue
+            generated += 1
 
-            for i in range(int(self.CONFIGS[the_key]['num_generation_loops'])):  # may be str in json
-                if self.CONFIGS[the_key]['disable_randomizer'] == 1:
-                    logger.info(f"!! Ignoring entity: {the_key}  Reason: Entire entity group disabled in config file")
-                    break
+            # SPECIAL: Need this here BEFORE rand, for walktype checker. sigh
+            if new_entity_name not in self.NEW_ENTITIES:
+                self.NEW_ENTITIES[new_entity_name] = {}
+            self.NEW_ENTITIES[new_entity_name]['zed_is_from'] = entity_name
 
-                # Clone entity
-                self.zed_library[entity_name] = True
-                new_entity_name, new_entity = self.generate_new_entity_from_existing_name(entity_name)
+            new_entity = self.randomize_entity(the_key, new_entity, entity_name, is_animal=is_animal,
+                                               is_enemy=is_enemy)
+            logger.info("")
+            rows.append(self.tabulate_variant(entity_name, new_entity))
+
+            # Save it!  Only the differences from the base entity are kept until output
+            if self.delta_xml:
+                self.NEW_ENTITIES[new_entity_name]['zed_record'] = self.delta_record(entity_name, new_entity)
+            else:
+                self.NEW_ENTITIES[new_entity_name]['zed_record'] = VariantRecord(
+                        entity_name, self.ENTITY_INVENTORY[entity_name], new_entity, self.ENTITY_CHILD_XML)
+
+        if self.collapse:
+            rows = self.collapse_variants(rows)
+            generated = len(rows)
+        for row in rows:
+            self.variant_table.append(row)
+        return attempted, generated
+
+    def category_todo(self, the_key: str, entity_names: List[str]) -> List[str]:
+        """
+        Get the base entities of a category to generate variants for, in sorted order, and settle the config file
+        for each of them up front, so that workers start with compiled plans.
 
-                if new_entity_name is None:
+        :param the_key: entity config key
+        :param entity_names: base entity names
+        :return: base entity names
+        """
+        # Check to see if we should not randomise this entity
+        todo = [name for name in sorted(entity_names) if name not in self.CONFIGS[the_key]['ignore_entity_list']]
+
+        for entity_name in todo:
+            self.config_plan(the_key, entity_name)
+        return todo
+
+    def generate_bases(self, tasks: List[Tuple[str, str]]) -> Iterator[Tuple[str, str, bool, int]]:
+        """
+        Generate variants for base entities, one at a time and in the given order; after each is yielded, its
+        variants are in NEW_ENTITIES.  Base entities whose inputs match the build manifest of the previous run are
+        spliced from it instead.  With --jobs, the rest are fanned out to a process pool, at most a few ahead of
+        the one being yielded, and the results merged back in order.
+
+        :param tasks: list of (entity config key, base entity name)
+        :return: iterator of (entity config key, base entity name, variants attempted, number of variants generated)
+        """
+        fresh = {}
+        for the_key, entity_name in tasks:
+            inputs = self.base_inputs_hash(the_key, entity_name)
+            previous = self.previous_build.get(entity_name, None)
+            if previous is None or previous['key'] != the_key or previous['inputs'] != inputs:
+                # variants: variant name => [start, end] of its XML in entityclasses.xml, filled in on output
+                self.manifest[entity_name] = {'key': the_key, 'inputs': inputs, 'variants': {}}
+                fresh[entity_name] = True
+        if len(fresh) < len(tasks):
+            logger.info(f"## ... {len(tasks) - len(fresh)} of {len(tasks)} base entities unchanged since the "
+                        f"previous build")
+
+        if self.jobs <= 1 or len(fresh) <= 1:
+            for the_key, entity_name in tasks:
+                if entity_name not in fresh:
+                    yield (the_key, entity_name) + self.splice_base_entity(entity_name)
                     continue
-                self.TOTAL_ZED_ENTITIES_GENERATED += 1
+                first_row = len(self.variant_table)
+                attempted, generated = self.generate_base_entity(the_key, entity_name)
+                self.record_base_build(entity_name, attempted, generated, first_row)
+                yield the_key, entity_name, attempted, generated
+            return
+
+        logger.info(f"## ... fanning {len(fresh)} base entities out to {self.jobs} worker processes")
+        window = collections.deque()  # (entity config key, base entity name, future or None if spliced)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs, initializer=_variant_worker_init,
+                                                    initargs=(self.args, self.snapshot())) as pool:
+            for i, (the_key, entity_name) in enumerate(tasks):
+                future = pool.submit(_variant_worker_run, (the_key, entity_name)) if entity_name in fresh else None
+                window.append((the_key, entity_name, future))
+                while len(window) > 2 * self.jobs or (i == len(tasks) - 1 and len(window) > 0):
+                    the_key, entity_name, future = window.popleft()
+                    if future is None:
+                        yield (the_key, entity_name) + self.splice_base_entity(entity_name)
+                        continue
+                    _, attempted, generated, state = future.result()
+                    first_row = len(self.variant_table)
+                    self.merge_variant_state(state)
+                    self.record_base_build(entity_name, attempted, generated, first_row)
+                    yield the_key, entity_name, attempted, generated
+
+    def generate_category(self, the_key: str, entity_names: List[str]) -> List[Tuple[str, bool, int]]:
+        """
+        Generate variants for every base entity of a category, in sorted order.
+
+        :param the_key: entity config key
+        :param entity_names: base entity names
+        :return: list of (base entity name, variants attempted, number of variants generated)
+        """
+        tasks = [(the_key, entity_name) for entity_name in self.category_todo(the_key, entity_names)]
+        return [(entity_name, attempted, generated)
+                for _, entity_name, attempted, generated in self.generate_bases(tasks)]
+
+    def generate_zombie(self) -> None:
+        """
+        Zombie Generate.
+        """
+        logger.info("\n" + '#' * 79 + "\n" + "## Generating Zombie Entities\n" + "#" * 79 + "\n")
 
-                # SPECIAL: Need this here BEFORE rand, for walktype checker. sigh
-                if new_entity_name not in self.NEW_ENTITIES:
-                    self.NEW_ENTITIES[new_entity_name] = {}
-                self.NEW_ENTITIES[new_entity_name]['zed_is_from'] = entity_name
+        self.zed_library = {}
 
-                new_entity = self.randomize_entity(the_key, new_entity, entity_name, is_enemy=True)
-                logger.info("")
+        # Get all the entity_class-es we want to handle, by type
+        entity_class_zombies = self.TYPE_ENTITY_LOOKUP['EntityZombie']
+        self.TOTAL_ZED_ENTITIES_FOUND = len(entity_class_zombies)
 
-                # Save it!
-                self.NEW_ENTITIES[new_entity_name]['zed_is_from'] = entity_name
-                self.NEW_ENTITIES[new_entity_name]['zed_node'] = new_entity
+        for entity_name, attempted, generated in self.generate_category('ConfigEntityZombie', entity_class_zombies):
+            if attempted:
+                self.zed_library[entity_name] = True
+            self.TOTAL_ZED_ENTITIES_GENERATED += generated
 
     def generate_enemy_animal(self) -> None:
         """
@@ -2113,32 +4329,12 @@ class RandEnt(object):
         # Get all the entity_classes we want to handle, by type
         entity_class_hostile_animals = self.TYPE_ENTITY_LOOKUP['EntityEnemyAnimal']
         self.TOTAL_HOSTILE_ANIMAL_ENTITIES_FOUND = len(entity_class_hostile_animals)
-        the_key = 'ConfigEntityEnemyAnimal'
-
-        for entity_name in sorted(entity_class_hostile_animals):
-            if entity_name in self.CONFIGS[the_key]['ignore_entity_list']:
-                continue
 
-            for i in range(int(self.CONFIGS[the_key]['num_generation_loops'])):
-                if self.CONFIGS[the_key]['disable_randomizer'] == 1:
-                    logger.info(f"!! Ignoring entity: {the_key}  Reason: Entire entity group disabled in config file")
-                    break
-
-                # Clone entity
+        for entity_name, attempted, generated in self.generate_category('ConfigEntityEnemyAnimal',
+                                                                        entity_class_hostile_animals):
+            if attempted:
                 self.hostile_animal_library[entity_name] = True
-                new_entity_name, new_entity = self.generate_new_entity_from_existing_name(entity_name)
-                if new_entity_name is None:
-                    continue
-                self.TOTAL_HOSTILE_ANIMAL_ENTITIES_GENERATED += 1
-
-                new_entity = self.randomize_entity(the_key, new_entity, entity_name, is_animal=True, is_enemy=True)
-                logger.info("")
-
-                # Save it!
-                if new_entity_name not in self.NEW_ENTITIES:
-                    self.NEW_ENTITIES[new_entity_name] = {}
-                self.NEW_ENTITIES[new_entity_name]['zed_is_from'] = entity_name
-                self.NEW_ENTITIES[new_entity_name]['zed_node'] = new_entity
+            self.TOTAL_HOSTILE_ANIMAL_ENTITIES_GENERATED += generated
 
     def generate_friendly_animal(self) -> None:
         """
@@ -2149,58 +4345,141 @@ class RandEnt(object):
         self.timid_animal_library = {}
 
         # Get all the entity_class-es we want to handle, by type
-
         entity_class_friendly_animals = self.TYPE_ENTITY_LOOKUP['EntityAnimalStag']
         self.TOTAL_FRIENDLY_ANIMAL_ENTITIES_FOUND = len(entity_class_friendly_animals)
-        the_key = 'ConfigEntityFriendlyAnimal'
 
-        # NOTE: looping goes 1 for each type, looped should probably be reversed
-        for entity_name in sorted(entity_class_friendly_animals):
-            # Check to see if we should not randomise this entity
-            if entity_name in self.CONFIGS[the_key]['ignore_entity_list']:
-                continue
+        for entity_name, attempted, generated in self.generate_category('ConfigEntityFriendlyAnimal',
+                                                                        entity_class_friendly_animals):
+            if attempted:
+                self.timid_animal_library[entity_name] = True
+            self.TOTAL_FRIENDLY_ANIMAL_ENTITIES_GENERATED += generated
 
-            for i in range(int(self.CONFIGS[the_key]['num_generation_loops'])):
-                if self.CONFIGS[the_key]['disable_randomizer'] == 1:
-                    logger.info(f"!! Ignoring entity: {the_key}  Reason: Entire entity group disabled in config file")
-                    break
+    # ----- Modlet Output ------------------------------------------------------------
 
-                # Clone entity
-                self.timid_animal_library[entity_name] = True
-                new_entity_name, new_entity = self.generate_new_entity_from_existing_name(entity_name)
-                if new_entity_name is None:
-                    continue
-                self.TOTAL_FRIENDLY_ANIMAL_ENTITIES_GENERATED += 1
+    # --- Localization ----------------------------------------------------------
+
+    @staticmethod
+    def scan_localization(path: str, keys: Dict[str, bool]) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        Pull the rows of some keys out of a Localization.txt, without parsing the rest: each line is matched on
+        its key before any CSV parsing or decoding, following quoted fields across lines.
+
+        :param path: Localization.txt file
+        :param keys: keys wanted
+        :return: Tuple of (header columns, key => row)
+        """
+        wanted = set(key.encode('utf-8') for key in keys)
+        rows = {}
+        with open(path, 'rb') as fp:
+            header = next(csv.reader([fp.readline().decode('utf-8-sig')]))
+            record = None  # lines of a wanted row whose quoted field spans lines
+            quoted = False  # inside a quoted field spanning lines
+            for line in fp:
+                odd = line.count(b'"') % 2 == 1
+                comma = line.find(b',')
+                if record is not None:
+                    record.append(line)
+                elif not quoted and comma > 0 and line[:comma] in wanted:
+                    record = [line]
+                quoted = quoted != odd
+                if record is not None and not quoted:
+                    row = next(csv.reader([part.decode('utf-8') for part in record]))
+                    rows[row[0]] = row
+                    record = None
+        return header, rows
+
+    def localization_files(self) -> List[str]:
+        """
+        Get the Localization.txt files to take names from, in load order: the game's, then the modlets'.
 
-                new_entity = self.randomize_entity(the_key, new_entity, entity_name, is_animal=True)
-                logger.info("")
+        :return: file paths
+        """
+        paths = [self.CONFIGS['localization_file']]
+        for mod in self.overlay_mods():
+            path = os.path.join(mod, 'Config', 'Localization.txt')
+            if os.path.exists(path):
+                paths.append(path)
+        return paths
+
+    def localized_names(self, bases: Dict[str, bool]) -> Tuple[List[str], Dict[str, Dict[str, str]]]:
+        """
+        Get the names of base entities in every language of the localization files.
 
-                # Save it!
-                if new_entity_name not in self.NEW_ENTITIES:
-                    self.NEW_ENTITIES[new_entity_name] = {}
-                self.NEW_ENTITIES[new_entity_name]['zed_is_from'] = entity_name
-                self.NEW_ENTITIES[new_entity_name]['zed_node'] = new_entity
+        :param bases: base entity names
+        :return: Tuple of (language columns, {base entity name: {language: text}})
+        """
+        languages = []
+        names = {}
+        for path in self.localization_files():
+            header, rows = self.scan_localization(path, bases)
+            languages += [column for column in header[5:]
+                          if column in LOCALIZATION_LANGUAGES and column not in languages]
+            for key, row in rows.items():
+                names.setdefault(key, {}).update((column, text) for column, text in zip(header, row)
+                                                 if column in LOCALIZATION_LANGUAGES)
+        return languages, names
 
-    # ----- Modlet Output ------------------------------------------------------------
+    @staticmethod
+    def variant_descriptors(scale: float, freak: bool, raging: bool) -> str:
+        """
+        Describe what sets a variant apart from its base entity, for its display name.
+
+        :param scale: trub_scale of the variant
+        :param freak: True if it has freaky materials
+        :param raging: True if it is a raging stag
+        :return: descriptors, e.g. "Giant, Raging"; empty if there is nothing to tell
+        """
+        words = [word for limit, word in LOCALIZATION_SIZES if scale < limit][:1]
+        words += ["Freak"] if freak else []
+        words += ["Raging"] if raging else []
+        return ", ".join(word for word in words if word)
+
+    def modlet_gen_localization(self) -> None:
+        """
+        Write Localization.txt with a display name for every variant, in every language the game (or a modlet)
+        names its base entity in: the base entity's name, followed in English by the variant's descriptors.
+        """
+        localization_file = os.path.join('Config', 'Localization.txt')
+        logger.debug(f"Generating: {self.writer.path(localization_file)}")
+        fp = self.writer.open(localization_file)
+        if not self.localization:
+            fp.write('Key,File,Type,UsedInMainMenu,NoTranslate,english\n')
+            return
+
+        table = self.variant_table
+        bases = dict.fromkeys(table.columns['base'], True)
+        languages, names = self.localized_names(bases)
+        logger.info(f"Localized names found for {len(names)} of {len(bases)} base entities")
+
+        writer = csv.writer(fp, lineterminator="\n")
+        writer.writerow(['Key', 'File', 'Type', 'UsedInMainMenu', 'NoTranslate'] + languages)
+        for i in range(len(table)):
+            base = table.columns['base'][i]
+            if base not in names:
+                continue
+            descriptors = self.variant_descriptors(table.columns['trub_scale'][i], table.columns['freak'][i] == 1,
+                                                   table.columns['raging'][i] == 1)
+            texts = [names[base].get(language, "") for language in languages]
+            if descriptors:
+                texts = [f"{text} ({descriptors})" if text and language == LOCALIZATION_DESCRIBED else text
+                         for language, text in zip(languages, texts)]
+            writer.writerow([table.columns['name'][i], 'entityclasses', 'Entity', "", ""] + texts)
+
+    # ---------------------------------------------------------------------- #
 
     def modlet_gen_start(self) -> None:
         """
         Start the mod creation process.
         """
-        # Required Folders
-        modlet_config_dir = self.CONFIGS['modlet_gen_dir'] + "/Config"
-
-        if not os.path.exists(modlet_config_dir):
-            logger.debug(f"Generating: {modlet_config_dir}")
-            os.makedirs(modlet_config_dir)
+        self.writer = ModletWriter(self.CONFIGS['modlet_gen_dir'], self.write_buffer)
+        logger.debug(f"Staging modlet in: {self.writer.staging_dir}")
 
         # Misc required files
-        modinfo_file = self.CONFIGS['modlet_gen_dir'] + '/ModInfo.xml'
-        logger.debug(f"Generating: {modinfo_file}")
+        modinfo_file = 'ModInfo.xml'
+        logger.debug(f"Generating: {self.writer.path(modinfo_file)}")
 
-        with open(modinfo_file, 'w') as fp:
-            fp.write(
-                    f"""<?xml version="1.0" encoding="UTF-8" ?>
+        self.writer.write(modinfo_file,
+                          f"""<?xml version="1.0" encoding="UTF-8" ?>
 <xml>
   <ModInfo>
     <Name value="{self.CONFIGS['modlet_name']}" />
@@ -2211,34 +4490,27 @@ class RandEnt(object):
   </ModInfo>
 </xml>""")
 
-        # Localization file
-        localization_file = modlet_config_dir + '/Localization.txt'
-        logger.debug(f"Generating: {localization_file}")
-        with open(localization_file, 'w') as fp:
-            fp.write('Key,File,Type,UsedInMainMenu,NoTranslate,english\n')
-
         # Entities file
-        self.entities_xml_file = modlet_config_dir + '/entityclasses.xml'
-        logger.debug(f"Starting Entities file: {self.entities_xml_file}")
-        with open(self.entities_xml_file, 'w') as fp:
-            fp.write(f"<{self.prefix}>" + "\n")
-            fp.write('<append xpath="/entity_classes">' + "\n")
+        self.entities_xml_file = os.path.join('Config', 'entityclasses.xml')
+        logger.debug(f"Starting Entities file: {self.writer.path(self.entities_xml_file)}")
+        fp = self.writer.open(self.entities_xml_file)
+        header = f"<{self.prefix}>" + "\n" + '<append xpath="/entity_classes">' + "\n"
+        fp.write(header)
+        self.entities_xml_length = len(header)
 
         # EntityGroups file
-        self.entitygroups_xml_file = modlet_config_dir + '/entitygroups.xml'
-        logger.debug(f"Starting EntityGroups file: {self.entitygroups_xml_file}")
-        with open(self.entitygroups_xml_file, 'w') as fp:
-            fp.write(f"<{self.prefix}>" + "\n")
+        self.entitygroups_xml_file = os.path.join('Config', 'entitygroups.xml')
+        logger.debug(f"Starting EntityGroups file: {self.writer.path(self.entitygroups_xml_file)}")
+        self.writer.write(self.entitygroups_xml_file, f"<{self.prefix}>" + "\n")
 
         # headshots mode
         if self.headshot:
-            items_xml_file = modlet_config_dir + '/items.xml'
-            logger.debug(f"Generating: {items_xml_file}")
+            items_xml_file = os.path.join('Config', 'items.xml')
+            logger.debug(f"Generating: {self.writer.path(items_xml_file)}")
 
             # as per XML.txt, this adds the stated power as a percent to all headshots.  for the default hspower of
             # 150, that means any headshot hits are increased in power by 150% (i.e. 2.5x damage)
-            with open(items_xml_file, 'w') as fp:
-                fp.write(f"""<configs>
+            self.writer.write(items_xml_file, f"""<configs>
   <!-- All Headshots count for items that specify entity damage -->
   <append xpath="/items/item/effect_group/passive_effect[@name='EntityDamage'][1]/../.">
     <passive_effect name="DamageModifier" operation="perc_add" value="{self.hspower}" tags="head"/>
@@ -2246,53 +4518,54 @@ class RandEnt(object):
 </configs>
 """)
 
-    def modlet_gen_add_zed_to_entities_override(self, zed_node: ET.Element) -> None:
+    def modlet_gen_add_zed_to_entities_override(self, zed_record: VariantRecord) -> None:
         """
         Add an entity to the entity classes file.
         
-        :param zed_node: Entity information in XML format.
+        :param zed_record: Entity information, as differences from its base entity.
         """
-        with open(self.entities_xml_file, 'a') as fp:
-            fp.write(ET.tostring(zed_node, encoding='unicode'))
-            fp.write("\n\n")
+        xml = zed_record.to_xml(self.ENTITY_INVENTORY[zed_record.base_name], self.ENTITY_CHILD_XML)
+        fp = self.writer.open(self.entities_xml_file)
+        fp.write(xml)
+        fp.write("\n\n")
+
+        start = self.entities_xml_length
+        self.entities_xml_length += len(xml) + 2
+        self.manifest[zed_record.base_name]['variants'][zed_record.name] = [start, start + len(xml)]
 
-    def modlet_gen_add_zed_to_entity_groups_lookup(self, zed_name: str, is_from_zed: str) -> None:
+    def modlet_gen_add_zed_to_entity_groups_lookup(self, zed_name: str, is_from_zed: str, weight: int = 1) -> None:
         """
-        Parse entity groups to locate where new entities go.
+        Use the entity group index to locate where new entities go.
         
         :param zed_name: variant zed name.
         :param is_from_zed: source entity to look for
+        :param weight: number of variants it stands for (--collapse); scales its probability in the groups
         """
-        # Find the groups its in
-        for entity_group in self.ENTITYGROUPS_DOM.findall('.//entitygroup'):
-            entity_group_name = entity_group.attrib['name']
-
-            # now search the group for the zed
-            for entity in entity_group.findall(f".//entity[@name='{is_from_zed}']"):
-                # ok, we found a node. ummm...clone it, update the name, make the override
-                new_zed_entity = copy.deepcopy(entity)  # deep clone, all nodes below
-                new_zed_entity.set('name', zed_name)  # Not changing build.xml
-
-                xmlstring = ET.tostring(new_zed_entity, encoding='unicode')
-
-                if entity_group_name in self.ENTITY_GROUP_LOOKUP:
-                    self.ENTITY_GROUP_LOOKUP[entity_group_name].append(xmlstring)
-                else:
-                    self.ENTITY_GROUP_LOOKUP[entity_group_name] = [xmlstring]
+        # escape the name once, exactly as ElementTree would write it as an attribute value
+        escaped = ET.tostring(ET.Element('e', n=zed_name), encoding='unicode')[6:-4]
+        if weight != 1:
+            self.manifest[is_from_zed].setdefault('weights', {})[zed_name] = weight
+
+        # Find the groups its in; entries stay split until written, sharing the group index templates
+        for entity_group_name, template in self.ENTITY_GROUP_INDEX.get(is_from_zed, []):
+            if weight != 1:
+                template = self.weighted_group_entry(template, weight)
+            if entity_group_name in self.ENTITY_GROUP_LOOKUP:
+                self.ENTITY_GROUP_LOOKUP[entity_group_name].append((escaped, template))
+            else:
+                self.ENTITY_GROUP_LOOKUP[entity_group_name] = [(escaped, template)]
 
     def modlet_gen_add_zeds_to_entity_groups_file(self) -> None:
         """
         Save new entites to existing groups.
         """
+        fp = self.writer.open(self.entitygroups_xml_file)
         entity_groups = sorted(list(self.ENTITY_GROUP_LOOKUP.keys()))
         for entity_group in entity_groups:
-            with open(self.entitygroups_xml_file, 'a') as fp:
-                fp.write(f"""<append xpath="/entitygroups/entitygroup[@name='{entity_group}']">""" + "\n")
-                xml_strings_arayref = self.ENTITY_GROUP_LOOKUP[entity_group]
-
-                for xmlstring in xml_strings_arayref:
-                    fp.write("\t" + f"{xmlstring}" + "\n")  # Nice spacing
-                fp.write('</append>' + "\n")
+            fp.write(f"""<append xpath="/entitygroups/entitygroup[@name='{entity_group}']">""" + "\n")
+            for escaped, (head, tail) in self.ENTITY_GROUP_LOOKUP[entity_group]:
+                fp.write("\t" + head + escaped + tail + "\n")  # Nice spacing
+            fp.write('</append>' + "\n")
 
     def modlet_gen_finish(self) -> None:
         """
@@ -2300,108 +4573,321 @@ class RandEnt(object):
         """
         # Entities file
         logger.debug('Completing: Entities file.')
-        with open(self.entities_xml_file, 'a') as fp:
-            fp.write('</append>' + "\n")
-            fp.write(f"</{self.prefix}>" + "\n")
+        fp = self.writer.open(self.entities_xml_file)
+        fp.write('</append>' + "\n")
+        fp.write(f"</{self.prefix}>" + "\n")
 
         # EntityGroups file
         logger.debug('Completing: EntityGroups file.')
-        with open(self.entitygroups_xml_file, 'a') as fp:
-            fp.write(f"</{self.prefix}>" + "\n")
-
-        modlet_dir = self.CONFIGS['modlet_gen_dir']
-
-        with open(os.path.join(modlet_dir, "enities.info"), 'w') as fp:
-            fp.write("===== Zombies =====\n")
-            for item in sorted(list(self.zed_library.keys())):
-                fp.write(f"{item}\n")
-
-            fp.write("\n===== Hostile Animals =====\n")
-            for item in sorted(list(self.hostile_animal_library.keys())):
-                fp.write(f"{item}\n")
-
-            fp.write("\n===== Timid Animals =====\n")
-            for item in sorted(list(self.timid_animal_library.keys())):
-                fp.write(f"{item}\n")
-
-        with open(os.path.join(modlet_dir, "settings.info"), 'w') as fp:
-            fp.write(f"Options Used: {self.cmd}\n\n")
-
-            fp.write(f"x{self.zcount:3d} zombie variants ({self.TOTAL_ZED_ENTITIES_GENERATED})\n")
-            fp.write(f"x{self.fcount:3d} timid animal variants ({self.TOTAL_FRIENDLY_ANIMAL_ENTITIES_GENERATED})\n")
-            fp.write(f"x{self.ecount:3d} hostile animal variants ({self.TOTAL_HOSTILE_ANIMAL_ENTITIES_GENERATED})\n")
-            if self.no_scale:
-                fp.write(f" - no size variations\n")
-            if self.meshes:
-                chance = int(self.mesh_percent * 100)
-                fp.write(f" - with {chance}% possible freaky mesh\n")
-                if self.freak_count > 0:
-                    fp.write(f"   ... {self.freak_count} freak entities\n")
-            if self.altered_ai:
-                chance = int(self.altered_ai_percent * 100)
-                fp.write(f" - with {chance}% possible altered hostile AI\n")
-                if self.altered_ai_count > 0:
-                    fp.write(f"   ... {self.altered_ai_count} hostile animal behaviors changed\n")
-            if self.raging_stag:
-                chance = int(self.raging_stag_percent * 100)
-                fp.write(f" - with {chance}% possible stag has hostile AI\n")
-                if self.raging_stag_count > 0:
-                    fp.write(f"   ... {self.raging_stag_count} raging stags\n")
-
-            if self.giants:
-                fp.write(f" - with Land of the Giants mode\n")
-            if self.munchkins:
-                fp.write(f" - with Munchkins mode\n")
-            if self.headshot:
-                fp.write(f" - with Headshot mode\n")
-                fp.write(f"    - headshot power {self.hspower}%\n")
-                fp.write(f"    - zombie meat {self.hsmeat}x\n")
-                fp.write(f"    - zombie speed {self.hsspeed}%\n")
-            if self.research:
-                fp.write(f" - with research mode\n")
-            fp.write("\n--------------------------------------------------\n")
-            fp.write("BIGGEST:\n")
-            for n, v in sorted(self.biggest.items()):
-                fp.write(f"   {n:30s} - {v:5d} hp\n")
-            fp.write("\n--------------------------------------------------\n")
-            fp.write("OTHER DETAILS:\n")
-            maxkey = 0
-            for k, v in sorted(self.details.items()):
-                maxkey = max(maxkey, len(k))
-            for k, v in sorted(self.details.items()):
-                fp.write(f"   {k:{maxkey}s} - {v}\n")
+        self.writer.write(self.entitygroups_xml_file, f"</{self.prefix}>" + "\n")
+
+        self.modlet_gen_localization()
+        self.modlet_gen_info_files()
+        self.modlet_gen_manifest()
+
+        logger.debug(f"Moving modlet files into: {self.writer.target_dir}")
+        self.writer.commit()
+
+    def modlet_gen_info_files(self) -> None:
+        """
+        Write the reference files describing what was generated.
+        """
+        fp = self.writer.open("enities.info")
+        fp.write("===== Zombies =====\n")
+        for item in sorted(list(self.zed_library.keys())):
+            fp.write(f"{item}\n")
+
+        fp.write("\n===== Hostile Animals =====\n")
+        for item in sorted(list(self.hostile_animal_library.keys())):
+            fp.write(f"{item}\n")
+
+        fp.write("\n===== Timid Animals =====\n")
+        for item in sorted(list(self.timid_animal_library.keys())):
+            fp.write(f"{item}\n")
+
+        fp = self.writer.open("settings.info")
+        fp.write(f"Options Used: {self.cmd}\n")
+        fp.write(f"Seed: {self.seed}  (per variant: {SEED_DERIVATION})\n\n")
+
+        fp.write(f"x{self.zcount:3d} zombie variants ({self.TOTAL_ZED_ENTITIES_GENERATED})\n")
+        fp.write(f"x{self.fcount:3d} timid animal variants ({self.TOTAL_FRIENDLY_ANIMAL_ENTITIES_GENERATED})\n")
+        fp.write(f"x{self.ecount:3d} hostile animal variants ({self.TOTAL_HOSTILE_ANIMAL_ENTITIES_GENERATED})\n")
+        if self.no_scale:
+            fp.write(f" - no size variations\n")
+        table = self.variant_table
+        freak_count = table.count('freak')
+        raging_stag_count = table.count('raging')
+        altered_ai_count = sum(1 for ai in table.columns['ai'] if ai != "") - raging_stag_count
+        if self.meshes:
+            chance = int(self.mesh_percent * 100)
+            fp.write(f" - with {chance}% possible freaky mesh\n")
+            if freak_count > 0:
+                fp.write(f"   ... {freak_count} freak entities\n")
+            if self.material_usage:
+                used = sum(drawn for drawn, _ in self.material_usage.values())
+                space = sum(size for _, size in self.material_usage.values())
+                fp.write(f"   ... {used} of {space} material combinations used ({100.0 * used / max(space, 1):.2f}%) "
+                         f"over {len(self.material_usage)} base entities\n")
+        if self.altered_ai:
+            chance = int(self.altered_ai_percent * 100)
+            fp.write(f" - with {chance}% possible altered hostile AI\n")
+            if altered_ai_count > 0:
+                fp.write(f"   ... {altered_ai_count} hostile animal behaviors changed\n")
+        if self.raging_stag:
+            chance = int(self.raging_stag_percent * 100)
+            fp.write(f" - with {chance}% possible stag has hostile AI\n")
+            if raging_stag_count > 0:
+                fp.write(f"   ... {raging_stag_count} raging stags\n")
+
+        if self.giants:
+            fp.write(f" - with Land of the Giants mode\n")
+        if self.munchkins:
+            fp.write(f" - with Munchkins mode\n")
+        if self.headshot:
+            fp.write(f" - with Headshot mode\n")
+            fp.write(f"    - headshot power {self.hspower}%\n")
+            fp.write(f"    - zombie meat {self.hsmeat}x\n")
+            fp.write(f"    - zombie speed {self.hsspeed}%\n")
+        if self.research:
+            fp.write(f" - with research mode\n")
+        if self.variant_budget:
+            predicted = sum(plan[4] for plan in self.budget_plan)
+            fp.write(f" - with load budget of {self.max_entities or 'any'} entities, "
+                     f"{self.max_bytes or 'any'} bytes\n")
+            fp.write(f"   ... {sum(self.variant_budget.values())} variants planned, ~{predicted} bytes predicted\n")
+        if self.collapse:
+            fp.write(f" - with near-duplicate variants collapsed\n")
+            if self.collapsed > 0:
+                fp.write(f"   ... {self.collapsed} variants collapsed into their survivors\n")
+        if self.delta_xml:
+            fp.write(f" - with delta XML output\n")
+            if self.delta_totals['variants'] > 0:
+                fp.write(f"   ... {self.delta_summary()}\n")
+        groups = sorted(table.groups().items())
+        fp.write("\n--------------------------------------------------\n")
+        fp.write("BIGGEST:\n")
+        for n, rows in groups:
+            summary = table.distribution('HealthMax', rows)
+            if summary is not None:
+                fp.write(f"   {n:30s} - {int(summary[3]):5d} hp\n")
+
+        details = {}
+        for base, ai, bite in zip(table.columns['base'], table.columns['ai'], table.columns['bite']):
+            if ai != "":
+                details[f"{base} ({ai} AI)"] = details.get(f"{base} ({ai} AI)", 0) + 1
+            if bite != "":
+                details[f"Raging {base} Bite {bite}"] = details.get(f"Raging {base} Bite {bite}", 0) + 1
+        fp.write("\n--------------------------------------------------\n")
+        fp.write("OTHER DETAILS:\n")
+        maxkey = 0
+        for k, v in sorted(details.items()):
+            maxkey = max(maxkey, len(k))
+        for k, v in sorted(details.items()):
+            fp.write(f"   {k:{maxkey}s} - {v}\n")
+
+        fp.write("\n--------------------------------------------------\n")
+        fp.write("DISTRIBUTIONS (min / p50 / p95 / max):\n")
+        for name in VARIANT_TABLE_NUMBERS:
+            lines = []
+            for n, rows in groups:
+                summary = table.distribution(name, rows)
+                if summary is not None:
+                    lines.append(f"   {n:30s} - " + " / ".join(f"{v:9g}" for v in summary) + "\n")
+            if lines:
+                fp.write(f"{name}:\n")
+                fp.writelines(lines)
+
+        if self.stats_csv:
+            logger.debug(f"Generating: {self.writer.path(VARIANT_TABLE_CSV)}")
+            table.write_csv(self.writer.open(VARIANT_TABLE_CSV))
+
+    def modlet_gen_manifest(self) -> None:
+        """
+        Write the build manifest, for the next run to regenerate only the base entities whose inputs changed.
+        It is written one base entity per line, each with the variant table rows of its variants.
+        """
+        header = {
+            'format': MANIFEST_FORMAT,
+            'options': self.cmd.strip(),
+            'seed': self.seed,
+            'entityclasses_sha256': self.writer.digest(self.entities_xml_file),
+        }
+        logger.debug(f"Generating: {self.writer.path(MANIFEST_FILE)}")
+        fp = self.writer.open(MANIFEST_FILE)
+        fp.write("{\n")
+        for key, value in sorted(header.items()):
+            fp.write(f" {json.dumps(key)}: {json.dumps(value)},\n")
+        fp.write(' "bases": {')
+        separator = "\n"
+        for entity_name, entry in sorted(self.manifest.items()):
+            entry = dict(entry, rows=self.variant_table.rows(*entry['rows']))
+            fp.write(f"{separator}  {json.dumps(entity_name)}: {json.dumps(entry, sort_keys=True)}")
+            separator = ",\n"
+        fp.write("\n }\n}\n")
 
     def modlet_generate(self) -> None:
         """
         Generate the modlet folder and files.
         """
         logger.info('## Generating Modlet ...')
-        self.modlet_gen_start()
-
         zeds = sorted(list(self.NEW_ENTITIES.keys()))
         if len(zeds) == 0:
             logger.info('## ... no entities generated; exiting.')
             return
 
-        logger.info('#### Adding Entities to Modlet ...')
-        for zed_name in zeds:
-            zed_node = self.NEW_ENTITIES[zed_name]['zed_node']
-            is_from_zed = self.NEW_ENTITIES[zed_name]['zed_is_from']
+        self.modlet_gen_start()
+        try:
+            logger.info('#### Adding Entities to Modlet ...')
+            for zed_name in zeds:
+                zed_record = self.NEW_ENTITIES[zed_name]['zed_record']
+                is_from_zed = self.NEW_ENTITIES[zed_name]['zed_is_from']
+
+                self.modlet_gen_add_zed_to_entities_override(zed_record)
+                self.modlet_gen_add_zed_to_entity_groups_lookup(zed_name, is_from_zed,
+                                                                self.NEW_ENTITIES[zed_name].get('zed_weight', 1))
+
+            logger.info('#### Adding Entities to Groups ...')
+            self.modlet_gen_add_zeds_to_entity_groups_file()
 
-            self.modlet_gen_add_zed_to_entities_override(zed_node)
-            self.modlet_gen_add_zed_to_entity_groups_lookup(zed_name, is_from_zed)
+            self.modlet_gen_finish()
+        except BaseException:
+            logger.error(f"Modlet generation failed; discarding staged files in {self.writer.staging_dir}")
+            self.writer.abort()
+            raise
 
-        logger.info('#### Adding Entities to Groups ...')
-        self.modlet_gen_add_zeds_to_entity_groups_file()
+        self.log_totals()
+
+    def modlet_stream(self) -> None:
+        """
+        Generate the variants and the modlet in one pass (--stream), in place of the generate_* methods and
+        modlet_generate().  Base entities are generated in the order their variants sort in; each variant is written
+        as soon as no later base entity can produce a name sorting before it, then dropped.  Memory thus does not
+        grow with the number of variants, and the modlet is identical to the one modlet_generate() writes.
+        """
+        logger.info('## Generating Modlet, streaming ...')
+        tasks = []
+        for the_key, (entity_type, library, total) in self.CATEGORIES.items():
+            entity_names = self.TYPE_ENTITY_LOOKUP[entity_type]
+            setattr(self, library, {})
+            setattr(self, f"{total}_FOUND", len(entity_names))
+            tasks += [(the_key, entity_name) for entity_name in self.category_todo(the_key, entity_names)]
 
-        self.modlet_gen_finish()
+        # every variant name of a base entity starts with this, so sorts after it
+        tasks.sort(key=lambda task: f"{self.prefix}_{task[1]}_")
 
+        self.modlet_gen_start()
+        try:
+            logger.info('#### Adding Entities to Modlet ...')
+            pending = []  # heap of (variant name, NEW_ENTITIES entry) waiting for their turn
+            written = 0
+            for i, (the_key, entity_name, attempted, generated) in enumerate(self.generate_bases(tasks)):
+                _, library, total = self.CATEGORIES[the_key]
+                if attempted:
+                    getattr(self, library)[entity_name] = True
+                setattr(self, f"{total}_GENERATED", getattr(self, f"{total}_GENERATED") + generated)
+
+                for zed_name, entry in self.NEW_ENTITIES.items():
+                    heapq.heappush(pending, (zed_name, entry))
+                self.NEW_ENTITIES = {}
+
+                floor = f"{self.prefix}_{tasks[i + 1][1]}_" if i + 1 < len(tasks) else None
+                while len(pending) > 0 and (floor is None or pending[0][0] < floor):
+                    zed_name, entry = heapq.heappop(pending)
+                    self.modlet_gen_add_zed_to_entities_override(entry['zed_record'])
+                    self.modlet_gen_add_zed_to_entity_groups_lookup(zed_name, entry['zed_is_from'],
+                                                                    entry.get('zed_weight', 1))
+                    written += 1
+
+            if written == 0:
+                logger.info('## ... no entities generated; exiting.')
+                self.writer.abort()
+                return
+
+            logger.info('#### Adding Entities to Groups ...')
+            self.modlet_gen_add_zeds_to_entity_groups_file()
+
+            self.modlet_gen_finish()
+        except BaseException:
+            logger.error(f"Modlet generation failed; discarding staged files in {self.writer.staging_dir}")
+            self.writer.abort()
+            raise
+
+        self.log_totals()
+
+    def log_totals(self) -> None:
+        """
+        Log how many variants were generated from how many base entities.
+        """
         logger.info(f"Generated Zeds: {self.TOTAL_ZED_ENTITIES_GENERATED} entities from: "
                     f"{self.TOTAL_ZED_ENTITIES_FOUND} base entities")
         logger.info(f"Generated Hostile Animals: {self.TOTAL_HOSTILE_ANIMAL_ENTITIES_GENERATED} entities from: "
                     f"{self.TOTAL_HOSTILE_ANIMAL_ENTITIES_FOUND} base entities")
         logger.info(f"Generated Friendly Animals: {self.TOTAL_FRIENDLY_ANIMAL_ENTITIES_GENERATED} entities from: "
                     f"{self.TOTAL_FRIENDLY_ANIMAL_ENTITIES_FOUND} base entities")
+        if self.delta_xml and self.delta_totals['variants'] > 0:
+            logger.info(f"Delta XML: {self.delta_summary()}")
+        if self.max_bytes is not None:
+            loaded = sum(size for rel_path, size in self.writer.sizes.items() if rel_path.startswith('Config'))
+            logger.info(f"Load budget: {loaded} of {self.max_bytes} bytes written to Config")
+            if loaded > self.max_bytes:
+                logger.warning(f"The modlet is {loaded - self.max_bytes} bytes over the load budget; the predictions "
+                               f"fell short")
+
+
+################################################################################
+# Begin Worker Processes
+################################################################################
+
+_WORKER_ENGINE: Optional[RandEnt] = None  # per-process engine used by --jobs workers
+
+
+def _variant_worker_init(args: argparse.Namespace, data: Dict) -> None:
+    """
+    Set up a worker process with its own engine over a snapshot of the parsed game data.
+
+    :param args: command line options of the main process
+    :param data: snapshot of the main engine
+    """
+    global _WORKER_ENGINE
+    _WORKER_ENGINE = RandEnt(args)
+    _WORKER_ENGINE.restore_snapshot(data)
+
+
+def _variant_worker_run(task: Tuple[str, str]) -> Tuple[str, bool, int, Dict]:
+    """
+    Generate all variants of one base entity in a worker process.
+
+    :param task: Tuple of (entity config key, base entity name)
+    :return: Tuple of (base entity name, variants attempted, number generated, generation results)
+    """
+    the_key, entity_name = task
+    _WORKER_ENGINE.reset_variant_state()
+    attempted, generated = _WORKER_ENGINE.generate_base_entity(the_key, entity_name)
+    return entity_name, attempted, generated, _WORKER_ENGINE.variant_state()
+
+
+_WORKER_GAME_DATA: Optional[Dict] = None  # game data shared by the profiles built in a --profiles worker
+
+
+def _profile_worker_init(data: Dict) -> None:
+    """
+    Set up a worker process building --profiles modlets.
+
+    :param data: game data snapshot of the main engine
+    """
+    global _WORKER_GAME_DATA
+    _WORKER_GAME_DATA = data
+
+
+def _profile_worker_run(task: Tuple[str, argparse.Namespace]) -> Dict:
+    """
+    Build the modlet of one profile in a worker process.
+
+    :param task: Tuple of (profile name, its options)
+    :return: summary of the build, see run_profile()
+    """
+    name, args = task
+    return run_profile(name, args, _WORKER_GAME_DATA)
 
 
 ################################################################################
@@ -2409,9 +4895,12 @@ class RandEnt(object):
 ################################################################################
 
 
-def build_cli_parser() -> argparse.Namespace:
+def build_cli_parser(argv: Optional[List[str]] = None, namespace: argparse.Namespace = None) -> argparse.Namespace:
     """
     Build the set of accepted options.
+
+    :param argv: options to parse instead of the command line
+    :param namespace: options to start from instead of the defaults (left unchanged)
     """
 
     parser = argparse.ArgumentParser(description="Create a variant set of 7D2D entities")
@@ -2425,6 +4914,41 @@ def build_cli_parser() -> argparse.Namespace:
                         help="Generate only, no output\n")
     parser.add_argument("--version", action="store", dest="version", default=None,
                         help="(optional) game version this is derived from")
+    parser.add_argument("--seed", action="store", type=int, dest="seed", default=None,
+                        help="seed for reproducible generation (default: random, recorded in settings.info)")
+    parser.add_argument("--jobs", action="store", type=int, dest="jobs", default=1,
+                        help="number of worker processes used to generate variants (default 1)")
+    parser.add_argument("--cache-dir", action="store", dest="cache_dir", default=DEFAULT_CACHE_DIR,
+                        help=f"directory for the parsed game data cache (default {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", dest="no_cache", default=False,
+                        help="always parse the game files; neither read nor write the game data cache")
+    parser.add_argument("--rebuild", action="store_true", dest="rebuild", default=False,
+                        help="regenerate every base entity, ignoring the build manifest of the previous run")
+    parser.add_argument("--csv", action="store_true", dest="stats_csv", default=False,
+                        help=f"also write the statistics of every variant to {VARIANT_TABLE_CSV}")
+    parser.add_argument("--profile", action="store_true", dest="profile", default=False,
+                        help="record time, memory and hot-path counters per phase in profile.json")
+    parser.add_argument("--cprofile", action="store_true", dest="cprofile", default=False,
+                        help="as --profile, plus a cProfile dump in profile.pstats")
+    parser.add_argument("--stream", action="store_true", dest="stream", default=False,
+                        help="write each variant as soon as it is generated, keeping memory flat")
+    parser.add_argument("--max-entities", action="store", type=int, dest="max_entities", default=None,
+                        help="load budget: most variants to generate, split across base entities by spawn weight")
+    parser.add_argument("--max-bytes", action="store", type=int, dest="max_bytes", default=None,
+                        help="load budget: most bytes of output, split across base entities by spawn weight")
+    parser.add_argument("--estimate", action="store_true", dest="estimate", default=False,
+                        help="print the planned variant counts and predicted output size, then exit")
+    parser.add_argument("--collapse", action="store_true", dest="collapse", default=False,
+                        help="merge near-identical variants of a base entity, within the collapse_tolerances")
+    parser.add_argument("--delta-xml", action="store_true", dest="delta_xml", default=False,
+                        help="write each variant as only what differs from the base entity it extends")
+    parser.add_argument("--verify-delta", action="store_true", dest="verify_delta", default=False,
+                        help="with --delta-xml, check that every delta resolves to the same entity as the full XML")
+    parser.add_argument("--profiles", action="store", dest="profiles", default=None,
+                        help="JSON file of named option sets; build one modlet for each, parsing the game files once")
+    parser.add_argument("--write-buffer", action="store", type=int, dest="write_buffer",
+                        default=DEFAULT_WRITE_BUFFER_KB,
+                        help=f"output buffer size per modlet file, in KB (default {DEFAULT_WRITE_BUFFER_KB})")
 
     parser.add_argument("-z", action="store", type=int, dest="zcount", default=10,
                         help="count for zombie variants (default x10")
@@ -2467,7 +4991,7 @@ def build_cli_parser() -> argparse.Namespace:
     parser.add_argument("--research", action="store_true", dest="research", default=False,
                         help="If specified, 500% size, 1% move, move mode 2")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv, namespace=copy.copy(namespace))
 
     if args.debug:
         fmt = '%(levelname)5s [%(filename)s:%(lineno)-4d] %(message)s'
@@ -2477,35 +5001,182 @@ def build_cli_parser() -> argparse.Namespace:
     return args
 
 
-def main():
-    """
-    Main Routine.
+def option_conflict(args: argparse.Namespace) -> Optional[str]:
     """
-    args = build_cli_parser()
+    Check for options that cannot go together.
 
+    :param args: options
+    :return: error message, or None if fine
+    """
     if args.giants and args.munchkins:
-        logger.error("Cannot specify -m and -k at the same time!")
-        sys.exit(1)
+        return "Cannot specify -m and -k at the same time!"
 
     if args.noscale and (args.giants or args.munchkins):
-        logger.error("Cannot specify -m or -k when --ns is specified!")
-        sys.exit(1)
+        return "Cannot specify -m or -k when --ns is specified!"
 
     if args.config is None:
-        logger.error("You must specify a configuration file!")
-        sys.exit(1)
+        return "You must specify a configuration file!"
+    return None
 
-    engine = RandEnt(args)
 
+def build_modlet(engine: RandEnt, args: argparse.Namespace, profile: RunProfile) -> None:
+    """
+    Generate the variants and write the modlet, once the engine has its game data.
+
+    :param engine: engine done with its setup
+    :param args: options of the engine
+    :param profile: phase recorder of the run
+    """
+    if args.max_entities is not None or args.max_bytes is not None or args.estimate:
+        with profile.phase('plan_budget'):
+            engine.plan_budget()
+    if args.estimate:
+        engine.log_estimate()
+    elif args.stream and not args.dryrun:
+        with profile.phase('modlet_stream'):
+            engine.modlet_stream()
+    else:
+        with profile.phase('generate_zombie'):
+            engine.generate_zombie()
+        with profile.phase('generate_enemy_animal'):
+            engine.generate_enemy_animal()
+        with profile.phase('generate_friendly_animal'):
+            engine.generate_friendly_animal()
+
+        if not args.dryrun:
+            with profile.phase('modlet_generate'):
+                engine.modlet_generate()
+    if not args.estimate:
+        logger.info(f"Inheritance cache: {engine.inheritance_cache_hits} hits, "
+                    f"{engine.inheritance_cache_dives} extends-chain dives")
+
+    if profile.enabled:
+        # into the modlet only if this run built it; never into one left by an earlier build
+        built = engine.writer is not None and len(engine.writer.sizes) > 0
+        profile.write(engine, engine.CONFIGS['modlet_gen_dir'] if built else engine.repository)
+
+
+def load_profiles(args: argparse.Namespace) -> List[Tuple[str, argparse.Namespace]]:
+    """
+    Read the --profiles file: a JSON object of profile name => list of command line options, each applied on top
+    of the options given with --profiles.
+
+    :param args: options of the batch
+    :return: list of (profile name, its options), in file order
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), args.profiles)
+    RandEnt.check_file(path, '--profiles')
+    with open(path, 'r') as fp:
+        entries = json.load(fp)
+    if not isinstance(entries, dict) or not entries:
+        raise RuntimeError(f"Exiting because {path} does not name any profiles")
+
+    profiles = []
+    for name, options in entries.items():
+        if not isinstance(options, list) or not all(isinstance(option, str) for option in options):
+            raise RuntimeError(f"Exiting because profile `{name}` is not a list of command line options")
+        profile_args = build_cli_parser(options, args)
+        for option in PROFILE_SHARED_OPTIONS:
+            if getattr(profile_args, option) != getattr(args, option):
+                raise RuntimeError(f"Exiting because profile `{name}` sets --{option.replace('_', '-')}, which "
+                                   f"applies to the whole batch")
+        conflict = option_conflict(profile_args)
+        if conflict is not None:
+            raise RuntimeError(f"Exiting because of profile `{name}`: {conflict}")
+        profiles.append((name, profile_args))
+    return profiles
+
+
+def run_profile(name: str, args: argparse.Namespace, data: Dict) -> Dict:
+    """
+    Build the modlet of one profile, with an engine of its own over the shared game data.
+
+    :param name: profile name
+    :param args: options of the profile
+    :param data: game data snapshot, see GAME_DATA_ATTRIBUTES
+    :return: summary of the build
+    """
+    logger.info("\n" + '#' * 79 + "\n" + f"## Building profile {name}\n" + "#" * 79 + "\n")
+    wall = time.perf_counter()
+    profile = RunProfile(args.profile, args.cprofile)
+    with profile.phase('setup'):
+        engine = RandEnt(args)
+        engine.restore_snapshot(data)
+        engine.configure_modlet()
+        engine.load_manifest()
+    build_modlet(engine, args, profile)
+    return {
+        'profile': name,
+        'modlet': engine.CONFIGS['modlet_name'],
+        'seed': engine.seed,
+        'variants': len(engine.variant_table),
+        'wall_s': round(time.perf_counter() - wall, 3),
+    }
+
+
+def run_profiles(args: argparse.Namespace) -> None:
+    """
+    Build one modlet per profile of the --profiles file.  The game files are parsed once; each profile then gets
+    an engine of its own over that game data, in this process or, with --jobs, in a pool of worker processes
+    (one profile per worker, each generating its variants serially).
+
+    :param args: options of the batch
+    """
+    profiles = load_profiles(args)
+    modlets = {}
+    for name, profile_args in profiles:
+        modlet = RandEnt(profile_args).modlet_name()
+        if modlet in modlets:
+            raise RuntimeError(f"Exiting because profiles `{modlets[modlet]}` and `{name}` would both build {modlet}")
+        modlets[modlet] = name
+
+    engine = RandEnt(args)
     engine.initial_setup()
     engine.create_lookup_tables()
+    data = engine.snapshot(GAME_DATA_ATTRIBUTES)
+    del engine
+
+    jobs = min(max(int(args.jobs), 1), len(profiles))
+    if jobs <= 1:
+        summaries = [run_profile(name, profile_args, data) for name, profile_args in profiles]
+    else:
+        logger.info(f"## ... building {len(profiles)} profiles in {jobs} worker processes")
+        tasks = []
+        for name, profile_args in profiles:
+            profile_args.jobs = 1
+            tasks.append((name, profile_args))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_profile_worker_init,
+                                                    initargs=(data,)) as pool:
+            summaries = list(pool.map(_profile_worker_run, tasks))
+
+    for summary in summaries:
+        logger.info(f"Profile {summary['profile']}: {summary['variants']} variants in {summary['modlet']} "
+                    f"(seed {summary['seed']}, {summary['wall_s']:.3f}s)")
+
+
+def main():
+    """
+    Main Routine.
+    """
+    args = build_cli_parser()
+
+    conflict = option_conflict(args)
+    if conflict is not None:
+        logger.error(conflict)
+        sys.exit(1)
+
+    if args.profiles is not None:
+        run_profiles(args)
+        return
 
-    engine.generate_zombie()
-    engine.generate_enemy_animal()
-    engine.generate_friendly_animal()
+    profile = RunProfile(args.profile, args.cprofile)
 
-    if not args.dryrun:
-        engine.modlet_generate()
+    with profile.phase('setup'):
+        engine = RandEnt(args)
+        engine.initial_setup()
+    with profile.phase('lookup_tables'):
+        engine.create_lookup_tables()
+    build_modlet(engine, args, profile)
 
 
 if __name__ == "__main__":
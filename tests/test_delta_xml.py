@@ -0,0 +1,70 @@
+#  coding: utf-8
+#  Unit checks of the variants written as deltas of their base entity (see RandEnt.delta_record)
+################################################################################
+
+import copy
+import os
+import sys
+import unittest
+# noinspection PyPep8Naming,StandardLibraryXml
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from randomizer import DELTA_TOTALS, EntityGraph, RandEnt  # noqa: E402
+
+GAME_FILE = """<entity_classes>
+  <entity_class name="zombieTemplateMale">
+    <property name="Class" value="EntityZombie"/>
+    <property name="SightRange" value="30"/>
+  </entity_class>
+  <entity_class name="zombieArlene" extends="zombieTemplateMale">
+    <property name="Mass" value="170"/>
+    <property name="WalkType" value="7"/>
+    <property name="SightRange" value="40"/>
+    <effect_group name="Base Effects">
+      <passive_effect name="HealthMax" operation="base_set" value="100"/>
+    </effect_group>
+  </entity_class>
+</entity_classes>"""
+
+
+class TestDeltaXml(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = RandEnt.__new__(RandEnt)  # deltas need only the entity classes, not the game install
+        root = ET.fromstring(GAME_FILE)
+        self.engine.ENTITY_INVENTORY = {entity.get('name'): entity for entity in root}
+        self.engine.ENTITY_GRAPH = EntityGraph(self.engine.ENTITY_INVENTORY, list(self.engine.ENTITY_INVENTORY))
+        self.engine.delta_totals = dict.fromkeys(DELTA_TOTALS, 0)
+        self.engine.verify_delta = True
+
+    def variant(self) -> ET.Element:
+        variant = copy.deepcopy(self.engine.ENTITY_INVENTORY['zombieArlene'])
+        variant.set('name', "Trub64_zombieArlene_001")
+        return variant
+
+    def test_changed_property(self):
+        variant = self.variant()
+        variant.find("property[@name='Mass']").set('value', "200")
+        self.engine.delta_record('zombieArlene', variant)
+        delta = self.engine.delta_element('zombieArlene', variant)
+        self.assertEqual(delta.get('extends'), 'zombieArlene')
+        self.assertEqual([child.get('name') for child in delta], ["Mass"])
+        self.assertEqual(self.engine.delta_totals['written_full'], 0)
+
+    def test_duplicated_property(self):
+        variant = self.variant()
+        ET.SubElement(variant, 'property', {'name': "SightRange", 'value': "60"})
+        self.assertIsNone(self.engine.delta_element('zombieArlene', variant))
+        self.engine.delta_record('zombieArlene', variant)  # verified, so would raise on a wrong delta
+        self.assertEqual(self.engine.delta_totals['written_full'], 1)
+
+    def test_dropped_block(self):
+        variant = self.variant()
+        variant.remove(variant.find('effect_group'))
+        self.assertIsNone(self.engine.delta_element('zombieArlene', variant))
+
+
+if __name__ == '__main__':
+    unittest.main()
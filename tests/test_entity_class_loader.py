@@ -0,0 +1,134 @@
+#  coding: utf-8
+#  Unit checks of the pruned entityclasses.xml load (see EntityClassLoader and RandEnt.parse_entity_classes)
+################################################################################
+
+import os
+import sys
+import tempfile
+import unittest
+# noinspection PyPep8Naming,StandardLibraryXml
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from randomizer import NEW_ENTITY_FILTER_OUT_LIST, EntityClassLoader, EntityGraph, RandEnt  # noqa: E402
+
+GAME_FILE = """<entity_classes>
+  <entity_class name="playerMale">
+    <property name="Class" value="EntityPlayer"/>
+  </entity_class>
+  <entity_class name="playerClone" extends="playerMale">
+    <property name="Mass" value="80"/>
+  </entity_class>
+  <entity_class name="zombieB" extends="zombieA">
+    <property name="Mass" value="170"/>
+  </entity_class>
+  <entity_class name="zombieC" extends="zombieB">
+    <property name="Class" value="EntityNPC"/>
+  </entity_class>
+  <entity_class name="zombieA">
+    <property name="Class" value="EntityZombie"/>
+  </entity_class>
+  <entity_class name="zombieIgnored" extends="zombieA"/>
+  <entity_class name="animalBase">
+    <property name="Mass" value="300"/>
+  </entity_class>
+  <entity_class name="animalBear" extends="animalBase">
+    <property name="Class" value="EntityEnemyAnimal"/>
+  </entity_class>
+  <entity_class name="animalStag">
+    <property name="Class" value="EntityAnimalStag"/>
+  </entity_class>
+  <entity_class name="zombieOrphan" extends="zombieMissing">
+    <property name="Class" value="EntityZombie"/>
+  </entity_class>
+  <entity_class name="itemBackpack"/>
+</entity_classes>"""
+
+
+class TestEntityClassLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = RandEnt.__new__(RandEnt)  # loading needs only the entity filters, not the game install
+        self.engine.CONFIGS = {the_key: {'ignore_entity_list': {}} for the_key in RandEnt.CATEGORIES}
+        self.engine.CONFIGS['ConfigEntityZombie']['ignore_entity_list'] = {'zombieIgnored': "test"}
+        self.engine.NEW_ENTITY_FILTER_OUT_LIST = dict(NEW_ENTITY_FILTER_OUT_LIST)
+        self.engine.FILTER_ALLOW_ONLY_LIST_FLAG = False
+        self.engine.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST = {}
+        fd, self.path = tempfile.mkstemp(suffix='.xml')
+        with os.fdopen(fd, 'w') as fp:
+            fp.write(GAME_FILE)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def expected(self) -> ET.Element:
+        """
+        Prune a full parse the way parse_entity_classes should, with the types resolved by EntityGraph.
+        """
+        root = ET.fromstring(GAME_FILE)
+        inventory = {entity.get('name'): entity for entity in root}
+        graph = EntityGraph(inventory, list(inventory))
+        categories = {entity_type: the_key for the_key, (entity_type, _, _) in RandEnt.CATEGORIES.items()}
+        needed = set()
+        for name in graph.order:
+            the_key = categories.get(graph.entity_type.get(name, None), None)
+            if the_key is None or name in self.engine.NEW_ENTITY_FILTER_OUT_LIST or \
+                    name in self.engine.CONFIGS[the_key]['ignore_entity_list']:
+                continue
+            if self.engine.FILTER_ALLOW_ONLY_LIST_FLAG and name not in self.engine.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST:
+                continue
+            needed.update([name] + graph.ancestors(name))
+        for name, *_ in RandEnt.AI_LIST:  # AI donors are kept whatever the filters
+            if name in inventory:
+                needed.update([name] + graph.ancestors(name))
+        for entity in list(root):
+            if entity.get('name') not in needed:
+                root.remove(entity)
+        return root
+
+    def assertSameClasses(self, loaded: ET.Element, expected: ET.Element):
+        self.assertEqual([entity.get('name') for entity in loaded], [entity.get('name') for entity in expected])
+        for entity, other in zip(loaded, expected):
+            self.assertEqual(ET.tostring(entity), ET.tostring(other))
+
+    def test_forward_extends(self):
+        loader = EntityClassLoader({'EntityZombie': 'ConfigEntityZombie'})
+        parser = ET.XMLParser(target=loader)
+        parser.feed(GAME_FILE)
+        root = parser.close()
+        self.assertNotIn('zombieC', loader.dropped)
+        self.assertEqual(loader.entity_type('zombieC'), 'EntityZombie')
+        self.assertEqual(loader.entity_type('zombieOrphan'), 'EntityZombie')
+        self.assertIsNotNone(root.find("entity_class[@name='zombieC']"))
+
+    def test_unwanted_types_dropped_while_loading(self):
+        loader = EntityClassLoader({'EntityZombie': 'ConfigEntityZombie'})
+        parser = ET.XMLParser(target=loader)
+        parser.feed(GAME_FILE)
+        root = parser.close()
+        self.assertIn('playerMale', loader.dropped)
+        self.assertIn('playerClone', loader.dropped)
+        self.assertIsNone(root.find("entity_class[@name='playerClone']"))
+
+    def test_matches_entity_graph(self):
+        loaded = self.engine.parse_entity_classes(self.path)
+        expected = self.expected()
+        self.assertSameClasses(loaded, expected)
+        names = [entity.get('name') for entity in loaded]
+        self.assertIn('zombieC', names)
+        self.assertIn('animalBase', names)  # untyped, but a wanted class extends it
+        self.assertNotIn('zombieIgnored', names)
+        self.assertNotIn('itemBackpack', names)
+
+    def test_allow_only_list(self):
+        self.engine.FILTER_ALLOW_ONLY_LIST_FLAG = True
+        self.engine.NEW_ENTITY_FILTER_ALLOW_ONLY_LIST = {'zombieC': "test", 'animalStag': "test"}
+        loaded = self.engine.parse_entity_classes(self.path)
+        self.assertSameClasses(loaded, self.expected())
+        self.assertEqual(sorted(entity.get('name') for entity in loaded),
+                         ['animalBase', 'animalBear', 'animalStag', 'zombieA', 'zombieB', 'zombieC'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#  coding: utf-8
+#  Unit checks of the freaky material draws (see MaterialSampler)
+################################################################################
+
+import itertools
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from randomizer import MaterialSampler  # noqa: E402
+
+GROUPS = (["HD_ZombieGreen", "HD_ZombieRed", "HD_ZombieGreen"], None, ["HD_Burnt", "HD_Frozen", "HD_Toxic"])
+
+
+class TestMaterialSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.sampler = MaterialSampler(GROUPS)
+        self.rand = random.Random("test")
+
+    def test_space(self):
+        self.assertEqual(self.sampler.groups[0], ("HD_ZombieGreen", "HD_ZombieRed"))  # duplicates dropped
+        self.assertEqual(self.sampler.space, 3 * 4 - 1)
+
+    def test_unique_until_exhausted(self):
+        size = 2 * 3  # both replaceable slots replaced
+        draws = [self.sampler.draw(self.rand, 1.0) for _ in range(size)]
+        self.assertTrue(all(fresh for _, fresh in draws))
+        self.assertEqual(len({choices for choices, _ in draws}), size)
+        self.assertEqual({choices for choices, _ in draws},
+                         {(first, None, third) for first, third in itertools.product(GROUPS[0], GROUPS[2])})
+        self.assertEqual(self.sampler.drawn, size)
+
+        repeats = [self.sampler.draw(self.rand, 1.0) for _ in range(20)]
+        self.assertFalse(any(fresh for _, fresh in repeats))
+        self.assertTrue({choices for choices, _ in repeats} <= {choices for choices, _ in draws})
+        self.assertEqual(self.sampler.drawn, size)
+
+    def test_draws_map_to_allowed_materials(self):
+        seen = {}
+        for _ in range(200):
+            choices, fresh = self.sampler.draw(self.rand, 0.5)
+            self.assertEqual(len(choices), len(GROUPS))
+            self.assertIsNone(choices[1])
+            for choice, group in zip(choices, GROUPS):
+                self.assertTrue(choice is None or choice in group)
+            if fresh and any(choice is not None for choice in choices):
+                self.assertNotIn(choices, seen)
+                seen[choices] = True
+        self.assertEqual(len(seen), self.sampler.drawn)
+        self.assertLessEqual(self.sampler.drawn, self.sampler.space)
+
+    def test_nothing_replaced(self):
+        self.assertEqual(self.sampler.draw(self.rand, 0.0), ((None, None, None), True))
+        self.assertEqual(self.sampler.drawn, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#  coding: utf-8
+#  Unit checks of the XPath patches applied by the mod overlays (see RandEnt.apply_patch)
+################################################################################
+
+import os
+import sys
+import unittest
+# noinspection PyPep8Naming,StandardLibraryXml
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from randomizer import PROFILE_COUNTERS, RandEnt  # noqa: E402
+
+GAME_FILE = """<entity_classes>
+  <entity_class name="zombieArlene">
+    <property name="Mass" value="170"/>
+    <property name="Tags" value="zombie"/>
+  </entity_class>
+  <entity_class name="zombieBoe">
+    <property name="Mass" value="180"/>
+  </entity_class>
+</entity_classes>"""
+
+
+class TestModOverlays(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = RandEnt.__new__(RandEnt)  # patches need no config or game install
+        self.engine.counters = dict.fromkeys(PROFILE_COUNTERS, 0)
+        self.root = ET.fromstring(GAME_FILE)
+        self.parents = {child: parent for parent in self.root.iter() for child in parent}
+
+    def patch(self, xml: str) -> bool:
+        return self.engine.apply_patch(self.root, ET.fromstring(xml), self.parents)
+
+    def arlene(self) -> ET.Element:
+        return self.root.find("entity_class[@name='zombieArlene']")
+
+    def test_split_xpath(self):
+        steps, attribute = RandEnt.split_xpath("/entity_classes/entity_class[@name='a/b']/@value")
+        self.assertEqual(steps, ["", "entity_classes", "entity_class[@name='a/b']"])
+        self.assertEqual(attribute, "value")
+
+    def test_set_attribute(self):
+        self.assertTrue(self.patch(
+            "<set xpath=\"/entity_classes/entity_class[@name='zombieArlene']/property[@name='Mass']/@value\">"
+            "999</set>"))
+        self.assertEqual(self.arlene().find("property[@name='Mass']").get('value'), "999")
+        self.assertEqual(self.root.find("entity_class[@name='zombieBoe']/property").get('value'), "180")
+
+    def test_remove(self):
+        self.assertTrue(self.patch("<remove xpath=\"//entity_class[@name='zombieArlene']/property[@name='Tags']\"/>"))
+        self.assertEqual([prop.get('name') for prop in self.arlene()], ["Mass"])
+
+    def test_insert_after(self):
+        self.assertTrue(self.patch(
+            "<insertAfter xpath=\"/entity_classes/entity_class[@name='zombieArlene']/property[@name='Mass']\">"
+            "<property name=\"Weight\" value=\"80\"/></insertAfter>"))
+        self.assertEqual([prop.get('name') for prop in self.arlene()], ["Mass", "Weight", "Tags"])
+
+    def test_patch_added_nodes(self):
+        self.assertTrue(self.patch(
+            "<append xpath=\"/entity_classes\"><entity_class name=\"zombieNew\">"
+            "<property name=\"Mass\" value=\"90\"/></entity_class></append>"))
+        self.assertTrue(self.patch(
+            "<insertBefore xpath=\"//entity_class[@name='zombieNew']/property[@name='Mass']\">"
+            "<property name=\"Tags\" value=\"zombie\"/></insertBefore>"))
+        self.assertTrue(self.patch(
+            "<remove xpath=\"//entity_class[@name='zombieNew']/property[@name='Mass']\"/>"))
+        new = self.root.find("entity_class[@name='zombieNew']")
+        self.assertEqual([prop.get('name') for prop in new], ["Tags"])
+        self.assertTrue(self.patch("<remove xpath=\"//entity_class[@name='zombieNew']/property\"/>"))
+        self.assertEqual(len(new), 0)
+
+    def test_unmatched(self):
+        self.assertFalse(self.patch("<remove xpath=\"/entity_classes/entity_class[@name='zombieNobody']\"/>"))
+        self.assertFalse(self.patch("<remove xpath=\"/entitygroups/entitygroup\"/>"))
+
+    def test_unsupported_predicate(self):
+        with self.assertRaises(SyntaxError):
+            self.patch("<set xpath=\"/entity_classes/entity_class[starts-with(@name, 'zombie')]/@foo\">1</set>")
+        self.assertIsNone(self.arlene().get('foo'))
+
+
+if __name__ == '__main__':
+    unittest.main()